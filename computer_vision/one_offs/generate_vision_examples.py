@@ -13,7 +13,7 @@ import cv2
 import numpy as np
 import pandas as pd
 from PIL import Image, ImageDraw, ImageFont
-from src.gbif.clean import (
+from src.gbif.constants import (
     GBIF_MEDIA_CSV,
 )
 from src.utils.data_utils import (
@@ -7,6 +7,7 @@
 
 import os
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 import numpy as np
@@ -15,11 +16,10 @@ from PIL import Image
 from src.utils.data_utils import (
     folder_exists,
 )
-from transformers import (  # For DINOv2
-    AutoImageProcessor,
-    AutoModel,  # For MiewID
+from src.utils.executor_utils import (
+    iter_ordered_results,
 )
-from transformers import AutoModel as HF_AutoModel
+from src.utils.lazy_utils import lazy_import
 
 from ..raw_training.handle_yolo_model import (
     get_yolo_model,
@@ -33,6 +33,13 @@ from ..vision_utils.embedding_utils import (
 )
 from ..vision_utils.io_utils import get_image_records  # noqa: F401
 
+# Hugging Face models (MiewID + DINOv2), imported only when first loaded
+transformers = lazy_import("transformers")
+
+# Images downloaded at once, ahead of (serial) model inference. Per-host
+# request scheduler keeps this within what the media hosts allow
+DOWNLOAD_WORKERS = 8
+
 # ---------- MiewID embeddings model ----------
 
 _EMBEDDINGS_MODEL = None
@@ -47,7 +54,7 @@ def get_embeddings_model():
             warnings.filterwarnings("ignore")
             MODEL_TAG_MiewIDmsv3 = "conservationxlabs/miewid-msv3"
 
-            _EMBEDDINGS_MODEL = AutoModel.from_pretrained(
+            _EMBEDDINGS_MODEL = transformers.AutoModel.from_pretrained(
                 MODEL_TAG_MiewIDmsv3, trust_remote_code=True
             )
 
@@ -64,8 +71,10 @@ def get_dinov2_model():
     global _DINOV2_MODEL, _DINOV2_PROCESSOR
 
     if _DINOV2_MODEL is None:
-        _DINOV2_PROCESSOR = AutoImageProcessor.from_pretrained("facebook/dinov2-base")
-        _DINOV2_MODEL = HF_AutoModel.from_pretrained("facebook/dinov2-base")
+        _DINOV2_PROCESSOR = transformers.AutoImageProcessor.from_pretrained(
+            "facebook/dinov2-base"
+        )
+        _DINOV2_MODEL = transformers.AutoModel.from_pretrained("facebook/dinov2-base")
 
     return _DINOV2_PROCESSOR, _DINOV2_MODEL
 
@@ -138,10 +147,15 @@ def get_dinov2_embedding(cropped_img: Image.Image) -> np.ndarray:
     return compute_dinov2_embedding(cropped_img, processor, model)
 
 
-def process_single_image(row) -> dict:
+def load_row_image(row) -> Optional[Image.Image]:
+    # Download image temporarily (using PIL), to then pass to YOLOv8
+    return load_image_from_url(row["identifier"])
+
+
+def process_single_image(row, image: Optional[Image.Image] = None) -> dict:
     try:
-        # Download image temporarily (using PIL), then pass to YOLOv8
-        image = load_image_from_url(row["identifier"])
+        if image is None:
+            image = load_row_image(row)
         if image is None:
             return {}
         bbox = calculate_bbox(image)
@@ -198,11 +212,22 @@ def process_all_images(media_df: pd.DataFrame) -> None:
 
     results = []
 
-    # Calculate BBOX + embeddings for each new image in media records
-    for _, row in new_media_df.iterrows():
-        result = process_single_image(row)
-        if result:
-            results.append(result)
+    rows = [row for _, row in new_media_df.iterrows()]
+
+    # Download upcoming images concurrently while models run on current one,
+    # then calculate BBOX + embeddings for each new image in media records
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        images = iter_ordered_results(
+            executor, load_row_image, rows, window=2 * DOWNLOAD_WORKERS
+        )
+
+        for row, image in zip(rows, images):
+            if image is None:
+                continue
+
+            result = process_single_image(row, image)
+            if result:
+                results.append(result)
 
     if not results:
         print("No new images to process, embeddings file unchanged.")
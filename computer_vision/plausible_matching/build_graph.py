@@ -10,9 +10,8 @@ import json
 import networkx as nx
 import numpy as np
 import pandas as pd
-import umap
-from src.gbif.constants import GBIF_CLEAN_CSV
-from src.utils.data_utils import read_csv
+from src.gbif.clean_store import EXCLUSION_MAP_COLUMNS, read_clean_occurrences
+from src.utils.lazy_utils import lazy_import
 
 from ..root_constants import (
     GBIF_OUTPUT_NPZ_FILE,
@@ -24,6 +23,9 @@ from .plausible_matching_constants import (
     GRAPH_DATA_FILE,
 )
 
+# UMAP (+ numba JIT) is slow to import, so only load when projecting
+umap = lazy_import("umap")
+
 
 def load_data() -> tuple[dict, dict, pd.DataFrame]:
     ningaloo = np.load(OUTPUT_NPZ_FILE, allow_pickle=True)
@@ -273,7 +275,7 @@ if __name__ == "__main__":
     G = build_graph(ningaloo, gbif, matches_df, coords)
 
     print("Loading GBIF clean data for exclusion map...")
-    gbif_clean_df = read_csv(GBIF_CLEAN_CSV)
+    gbif_clean_df = read_clean_occurrences(columns=EXCLUSION_MAP_COLUMNS)
     exclusion_map = build_exclusion_map(gbif_clean_df)
 
     clusters_mutual = assign_clusters(G, mutual_only=True)
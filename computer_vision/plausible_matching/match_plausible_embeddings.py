@@ -11,7 +11,8 @@
 
 import numpy as np
 import pandas as pd
-from src.gbif.constants import GBIF_CLEAN_CSV, GBIF_INDIVIDUAL_SHARKS_STATS_CSV
+from src.gbif.clean_store import EXCLUSION_MAP_COLUMNS, read_clean_occurrences
+from src.gbif.constants import GBIF_INDIVIDUAL_SHARKS_STATS_CSV
 from src.utils.data_utils import export_to_csv, read_csv
 
 from ..root_constants import (
@@ -229,7 +230,7 @@ if __name__ == "__main__":
     new_data = np.load(GBIF_OUTPUT_NPZ_FILE)
 
     print("Loading GBIF clean data for plausibility filtering...")
-    gbif_df = read_csv(GBIF_CLEAN_CSV)
+    gbif_df = read_clean_occurrences(columns=EXCLUSION_MAP_COLUMNS)
     exclusion_map = build_exclusion_map(gbif_df)
     print(f"  {len(exclusion_map)} sharks have at least one IMPOSSIBLE pairing")
 
@@ -14,9 +14,8 @@ from typing import Dict, Set, Tuple
 import networkx as nx
 import numpy as np
 import pandas as pd
-import umap
-from src.gbif.constants import GBIF_CLEAN_CSV
-from src.utils.data_utils import read_csv
+from src.gbif.clean_store import EXCLUSION_MAP_COLUMNS, read_clean_occurrences
+from src.utils.lazy_utils import lazy_import
 
 from ..vision_utils.plausibility_utils import build_exclusion_map
 from ..vision_utils.shark_matching_utils import group_images_by_shark
@@ -26,6 +25,9 @@ from .shark_ranking_constants import (
     SHARK_RANKING_CSV,
 )
 
+# UMAP (+ numba JIT) is slow to import, so only load when projecting
+umap = lazy_import("umap")
+
 
 def compute_shark_centroids(
     embeddings: np.ndarray, shark_ids: np.ndarray
@@ -208,7 +210,7 @@ if __name__ == "__main__":
     clusters = assign_clusters(G)
 
     print("Loading GBIF clean data for exclusion map...")
-    gbif_df = read_csv(GBIF_CLEAN_CSV)
+    gbif_df = read_clean_occurrences(columns=EXCLUSION_MAP_COLUMNS)
     exclusion_map = build_exclusion_map(gbif_df)
 
     contradictions = find_contradictions(G, clusters, exclusion_map)
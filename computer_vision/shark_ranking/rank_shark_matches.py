@@ -13,8 +13,8 @@ from typing import Dict, Set, Tuple
 
 import numpy as np
 import pandas as pd
-from src.gbif.constants import GBIF_CLEAN_CSV
-from src.utils.data_utils import export_to_csv, read_csv
+from src.gbif.clean_store import EXCLUSION_MAP_COLUMNS, read_clean_occurrences
+from src.utils.data_utils import export_to_csv
 
 from ..vision_utils.io_utils import export_to_json
 from ..vision_utils.plausibility_utils import build_exclusion_map
@@ -134,7 +134,7 @@ if __name__ == "__main__":
 
     # Build plausibility exclusion map
     print("Loading GBIF clean data for plausibility filtering...")
-    gbif_df = read_csv(GBIF_CLEAN_CSV)
+    gbif_df = read_clean_occurrences(columns=EXCLUSION_MAP_COLUMNS)
     exclusion_map = build_exclusion_map(gbif_df)
     print(f"  {len(exclusion_map)} sharks have at least one IMPOSSIBLE pairing")
 
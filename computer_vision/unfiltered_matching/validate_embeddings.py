@@ -9,7 +9,8 @@ from typing import Tuple
 
 import numpy as np
 import pandas as pd
-from src.gbif.constants import GBIF_CLEAN_CSV, GBIF_MEDIA_CSV
+from src.gbif.clean_store import VALIDATION_COLUMNS, read_clean_occurrences
+from src.gbif.constants import GBIF_MEDIA_CSV
 from src.utils.data_utils import export_to_csv, read_csv
 
 from ..root_constants import NEW_EMBEDDINGS_FOLDER
@@ -537,7 +538,7 @@ def validate_shark_matches(
 if __name__ == "__main__":
     # Load GBIF clean data for coordinates and dates
     print("Loading GBIF clean data...")
-    gbif_df = read_csv(GBIF_CLEAN_CSV)
+    gbif_df = read_clean_occurrences(columns=VALIDATION_COLUMNS)
 
     # Load GBIF media data (needed to map miewid_gbif_matched_image_id back to keys)
     print("Loading GBIF media data...")
@@ -10,9 +10,12 @@
 from functools import lru_cache
 from math import asin, cos, radians, sin, sqrt
 
-import networkx as nx
 import numpy as np
-import searoute as sr
+from src.utils.lazy_utils import lazy_import, lazy_resource
+
+# searoute loads its marine network data on import, so defer until routing
+nx = lazy_import("networkx")
+sr = lazy_import("searoute")
 
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -53,11 +56,19 @@ def haversine_distance_matrix(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
     return 6371.0 * 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
 
 
+@lazy_resource
+def get_searoute_graph():
+    # Build searoute's marine network graph (+ its KD-tree) once, on first use
+    return sr.setup_M()
+
+
 @lru_cache(maxsize=None)
 def _distances_from_node(node: tuple) -> dict:
     # Single-source Dijkstra over searoute's marine network graph, cached per
     # origin node so repeated lookups from the same node are O(1)
-    return nx.single_source_dijkstra_path_length(sr.setup_M(), node, weight="weight")
+    return nx.single_source_dijkstra_path_length(
+        get_searoute_graph(), node, weight="weight"
+    )
 
 
 def searoute_distance_precise(
@@ -86,7 +97,7 @@ def searoute_distance(
     if precise:
         return searoute_distance_precise(lat1, lon1, lat2, lon2)
 
-    M = sr.setup_M()
+    M = get_searoute_graph()
     node1 = M.kdtree.query((lon1, lat1))
     node2 = M.kdtree.query((lon2, lat2))
 
@@ -125,7 +136,7 @@ def searoute_distance_matrix(
                 distance[j, i] = d
         return distance
 
-    M = sr.setup_M()
+    M = get_searoute_graph()
     nodes = [M.kdtree.query((lon_i, lat_i)) for lat_i, lon_i in zip(lat, lon)]
 
     distance = np.full((total_nodes, total_nodes), np.nan)
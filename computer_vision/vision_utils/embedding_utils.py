@@ -8,14 +8,20 @@
 
 
 from io import BytesIO
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Optional, Tuple
 
-import faiss
 import numpy as np
-import requests
-import torch
-import torchvision.transforms as transforms
 from PIL import Image
+from src.utils.http_cache import get_cached_session
+from src.utils.lazy_utils import lazy_import
+
+if TYPE_CHECKING:
+    import torchvision.transforms as transforms
+
+# Heavy ML libs only load once a model / index is actually used
+faiss = lazy_import("faiss")
+torch = lazy_import("torch")
+torchvision = lazy_import("torchvision")
 
 PREPROCESSING_MEAN = [0.485, 0.456, 0.406]
 PREPROCESSING_STD = [0.229, 0.224, 0.225]
@@ -33,11 +39,13 @@ def normalize_l2(embeddings: np.ndarray) -> np.ndarray:
     return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
 
 
-def build_miewid_preprocess() -> transforms.Compose:
+def build_miewid_preprocess() -> "transforms.Compose":
     """
     Build the MiewID preprocessing pipeline.
     Prep for resizing of image to work with model (requires 440 x 440 pixels).
     """
+    transforms = torchvision.transforms
+
     return transforms.Compose(
         [
             transforms.Resize(PREPROCESSING_SIZE),
@@ -49,8 +57,8 @@ def build_miewid_preprocess() -> transforms.Compose:
 
 def compute_miewid_embedding(
     cropped_img: Image.Image,
-    model: torch.nn.Module,
-    preprocess: transforms.Compose,
+    model: "torch.nn.Module",
+    preprocess: "transforms.Compose",
 ) -> np.ndarray:
     """Extract a MiewID embedding from a cropped image."""
     # Prepare MIEWID input
@@ -67,7 +75,7 @@ def compute_miewid_embedding(
 def compute_dinov2_embedding(
     cropped_img: Image.Image,
     processor,
-    model: torch.nn.Module,
+    model: "torch.nn.Module",
 ) -> np.ndarray:
     """Extract a DINOv2 embedding from a cropped image (mean-pooled)."""
     inputs = processor(images=cropped_img, return_tensors="pt")
@@ -114,7 +122,8 @@ def compute_pairwise_distances(
 def load_image_from_url(url: str) -> Optional[Image.Image]:
     """Download an image from a URL and return as PIL RGB Image."""
     try:
-        response = requests.get(url, timeout=10)
+        # Recorded to / replayed from local HTTP cache, per HTTP_CACHE_MODE
+        response = get_cached_session().get(url, timeout=10)
         response.raise_for_status()
 
         return Image.open(BytesIO(response.content)).convert("RGB")
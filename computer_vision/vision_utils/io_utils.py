@@ -10,7 +10,7 @@ import json
 import unicodedata
 
 import pandas as pd
-from src.gbif.clean import GBIF_MEDIA_CSV
+from src.gbif.constants import GBIF_MEDIA_CSV
 from src.utils.data_utils import read_csv
 
 
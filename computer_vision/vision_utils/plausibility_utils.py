@@ -11,8 +11,7 @@ from typing import Dict, Set
 
 import numpy as np
 import pandas as pd
-from src.gbif.constants import GBIF_CLEAN_CSV
-from src.utils.data_utils import read_csv
+from src.gbif.clean_store import EXCLUSION_MAP_COLUMNS, read_clean_occurrences
 
 from .coordinate_distance_utils import calculate_distance_matrix
 
@@ -81,7 +80,7 @@ def build_exclusion_map(
 
 if __name__ == "__main__":
     print("Loading GBIF clean data...")
-    gbif_df = read_csv(GBIF_CLEAN_CSV)
+    gbif_df = read_clean_occurrences(columns=EXCLUSION_MAP_COLUMNS)
 
     exclusion_map = build_exclusion_map(gbif_df)
 
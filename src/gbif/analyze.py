@@ -5,9 +5,17 @@
 ###############################################################################
 
 
+from functools import partial
+
 import pandas as pd
 
 # Import analysis modules
+from src.gbif.analyze_cube import (
+    COUNT_COLUMN,
+    OccurrenceCube,
+    build_occurrence_cube,
+    slice_cube,
+)
 from src.gbif.analyze_demographics import (
     make_lifeStage_df,
     make_sex_df,
@@ -22,70 +30,103 @@ from src.gbif.analyze_regions import (
     export_country_stats,
     export_publishingCountry_stats,
     make_basisOfRecord_df,
-    make_eventDate_df,
 )
 from src.gbif.analyze_time import (
     export_calendar_stats,
     make_year_total_df,
 )
-from src.gbif.constants import GBIF_CLEAN_CSV
-from src.utils.data_utils import read_csv, validate_and_dropna
+from src.gbif.clean_store import read_clean_occurrences
+from src.utils.task_graph import Task, run_task_graph
+
+# Widest stage of the graph: demographics, 3 region exports & individual sharks
+ANALYSIS_WORKERS = 5
+
+
+def make_demographic_counts(occurrence_cube: OccurrenceCube) -> dict:
+    # Generate demographic data needed by calendar stats
+    calendar_counts = slice_cube(occurrence_cube, na_subset=["year", "month"]).counts
+
+    return {
+        "sex_counts": make_sex_df(calendar_counts, count_column=COUNT_COLUMN),
+        "life_stage_counts": make_lifeStage_df(
+            calendar_counts, count_column=COUNT_COLUMN
+        ),
+        "basisOfRecord_counts": make_basisOfRecord_df(
+            calendar_counts, index=["year"], count_column=COUNT_COLUMN
+        ),
+    }
 
 
-def export_all_analyses(dataframe: pd.DataFrame) -> None:
+def make_analysis_tasks(dataframe: pd.DataFrame) -> dict[str, Task]:
+    # Exports that only roll up the cube (count & unique shark helpers shared)
+    export_region_stats = {
+        "country_stats": export_country_stats,
+        "continent_stats": export_continent_stats,
+        "publishingCountry_stats": export_publishingCountry_stats,
+    }
+
+    return {
+        # Annotate each occurrence with methodology & ID pattern so these
+        # columns are available to all downstream analysis functions
+        # (annotate_occurrences works on its own copy, original left as is)
+        "occurrences_df": Task(partial(annotate_occurrences, dataframe)),
+        # Count occurrences per combination of every stats dimension in one
+        # scan, so calendar / region / demographic tables just roll up the cube
+        "occurrence_cube": Task(build_occurrence_cube, ("occurrences_df",)),
+        "demographic_counts": Task(make_demographic_counts, ("occurrence_cube",)),
+        # Export calendar/time-based stats
+        "calendar_stats": Task(
+            lambda occurrence_cube, demographic_counts: export_calendar_stats(
+                occurrence_cube=occurrence_cube,
+                **demographic_counts,
+                make_unique_sharks_count_func=make_unique_sharks_count,
+            ),
+            ("occurrence_cube", "demographic_counts"),
+        ),
+        # Export region-based stats (independent of each other)
+        **{
+            name: Task(
+                partial(
+                    export_func,
+                    make_year_total_df_func=make_year_total_df,
+                    make_unique_sharks_count_func=make_unique_sharks_count,
+                ),
+                ("occurrence_cube",),
+            )
+            for name, export_func in export_region_stats.items()
+        },
+        # Export individual shark tracking stats (needs only annotated rows)
+        "individual_shark_stats": Task(
+            export_individual_shark_stats, ("occurrences_df",)
+        ),
+    }
+
+
+def export_all_analyses(
+    dataframe: pd.DataFrame,
+    max_workers: int = ANALYSIS_WORKERS,
+    trace_memory: bool = False,
+) -> None:
     """
     Main entry point for all GBIF data analysis.
     Coordinates all analysis modules and exports results.
-    """
-    # Use copy to generate specific CSVs (don't modify original DataFrame)
-    occurrences_df = dataframe.copy()
 
-    # Annotate each occurrence with methodology & ID pattern so these
-    # columns are available to all downstream analysis functions
-    occurrences_df = annotate_occurrences(occurrences_df)
-
-    # Generate demographic data needed by calendar stats
-    occurrences_with_year = validate_and_dropna(
-        occurrences_df.copy(), ["year", "month"]
-    )
-    sex_counts = make_sex_df(occurrences_with_year)
-    life_stage_counts = make_lifeStage_df(occurrences_with_year)
-    basisOfRecord_counts = make_basisOfRecord_df(occurrences_with_year, index=["year"])
-
-    # Export calendar/time-based stats
-    export_calendar_stats(
-        occurrences_df=occurrences_df,
-        sex_counts=sex_counts,
-        life_stage_counts=life_stage_counts,
-        basisOfRecord_counts=basisOfRecord_counts,
-        make_unique_sharks_count_func=make_unique_sharks_count,
-    )
-
-    # Export region-based stats
-    export_country_stats(
-        occurrences_df=occurrences_df,
-        make_year_total_df_func=make_year_total_df,
-        make_unique_sharks_count_func=make_unique_sharks_count,
-    )
-    export_continent_stats(
-        occurrences_df=occurrences_df,
-        make_year_total_df_func=make_year_total_df,
-        make_unique_sharks_count_func=make_unique_sharks_count,
-    )
-    export_publishingCountry_stats(
-        occurrences_df=occurrences_df,
-        make_year_total_df_func=make_year_total_df,
-        make_unique_sharks_count_func=make_unique_sharks_count,
-    )
-
-    # Export individual shark tracking stats
-    export_individual_shark_stats(
-        occurrences_df=occurrences_df,
-        make_basisOfRecord_df_func=make_basisOfRecord_df,
-        make_eventDate_df_func=make_eventDate_df,
-    )
+    Annotation (then the cube) runs first; every export after that only reads
+    them, so independent exports run concurrently on a thread pool (sharing
+    frames, no pickling) & each one's time is printed as it finishes.
+    With trace_memory, stages instead run one at a time & also report their
+    peak memory (see run_task_graph).
+    """
+    # Copy-on-write: slices, reorders & assign() share data with their source
+    # until written to, so the (read-only) stages never copy the full frame
+    with pd.option_context("mode.copy_on_write", True):
+        run_task_graph(
+            make_analysis_tasks(dataframe),
+            max_workers=max_workers,
+            trace_memory=trace_memory,
+        )
 
 
 if __name__ == "__main__":
-    occurrences_df = read_csv(GBIF_CLEAN_CSV, dtype={"year": "Int64", "day": "Int64"})
+    occurrences_df = read_clean_occurrences()
     export_all_analyses(occurrences_df)
@@ -0,0 +1,142 @@
+###############################################################################
+##  `analyze_cube.py`                                                        ##
+##                                                                           ##
+##  Purpose: Occurrence counts per combination of every stats dimension,     ##
+##           built in one scan & rolled up by calendar / region stats        ##
+###############################################################################
+
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils.data_utils import validate_and_dropna
+
+# Everything the calendar / region / demographic tables group, pivot or filter
+# on (country & publishing country codes ride along with their names)
+CUBE_DIMENSIONS = [
+    "year",
+    "month",
+    "countryCode",
+    "country",
+    "continent",
+    "publishingCountryCode",
+    "publishingCountry",
+    "sex",
+    "lifeStage",
+    "basisOfRecord",
+    "trackingMethodology",
+]
+
+# Stats only ever drop missing eventDates, so a flag per cell is enough
+HAS_EVENT_DATE_COLUMN = "hasEventDate"
+
+COUNT_COLUMN = "count"
+OLDEST_EVENT_DATE_COLUMN = "oldestEventDate"
+NEWEST_EVENT_DATE_COLUMN = "newestEventDate"
+FIRST_SEEN_COLUMN = "firstSeen"
+
+
+class OccurrenceCube(NamedTuple):
+    # Occurrences (& oldest / newest eventDate) per cell of dimensions
+    counts: pd.DataFrame
+
+    # First row each shark is seen at per cell, sorted by that row, so any
+    # slice's drop_duplicates("whaleSharkID") keeps each shark's first sighting
+    sharks: pd.DataFrame
+
+
+def build_occurrence_cube(occurrences_df: pd.DataFrame) -> OccurrenceCube:
+    if not isinstance(occurrences_df, pd.DataFrame):
+        raise ValueError("Error, must specify occurrences_df")
+
+    cell_columns = CUBE_DIMENSIONS + [HAS_EVENT_DATE_COLUMN]
+
+    # Ordered categories sort like the dates themselves, so per-cell min / max
+    # run on integer codes (not a string compare per row)
+    event_dates = occurrences_df["eventDate"].astype(pd.CategoricalDtype(ordered=True))
+
+    # Narrow view of just what the cube needs (columns aren't copied)
+    cube_source = pd.DataFrame(
+        {
+            **{dim: occurrences_df[dim] for dim in CUBE_DIMENSIONS},
+            HAS_EVENT_DATE_COLUMN: event_dates.notna(),
+            "eventDate": event_dates,
+            "whaleSharkID": occurrences_df["whaleSharkID"],
+            FIRST_SEEN_COLUMN: np.arange(len(occurrences_df)),
+        },
+        copy=False,
+    )
+
+    # Keep missing values as cells of their own, so each stat can drop its own
+    counts = (
+        cube_source.groupby(cell_columns, observed=True, dropna=False, sort=False)
+        .agg(
+            **{
+                COUNT_COLUMN: ("eventDate", "size"),
+                OLDEST_EVENT_DATE_COLUMN: ("eventDate", "min"),
+                NEWEST_EVENT_DATE_COLUMN: ("eventDate", "max"),
+            }
+        )
+        .reset_index()
+    )
+
+    sharks = (
+        cube_source.dropna(subset=["whaleSharkID"])
+        .groupby(
+            cell_columns + ["whaleSharkID"], observed=True, dropna=False, sort=False
+        )[FIRST_SEEN_COLUMN]
+        .min()
+        .reset_index()
+        .sort_values(FIRST_SEEN_COLUMN, ignore_index=True)
+    )
+
+    return OccurrenceCube(counts=counts, sharks=sharks)
+
+
+def slice_cube(
+    occurrence_cube: OccurrenceCube,
+    na_subset: list[str],
+    exclude: Optional[dict] = None,
+) -> OccurrenceCube:
+    if not isinstance(na_subset, list):
+        raise ValueError("Error, must specify na_subset")
+
+    # Same cells as dropping occurrences missing any of na_subset (eventDate
+    # via its flag), and those with an excluded value, e.g. {"continent": ...}
+    dims = [column for column in na_subset if column != "eventDate"]
+
+    sliced_frames = []
+    for frame in occurrence_cube:
+        frame = validate_and_dropna(frame, na_subset=dims)
+
+        if "eventDate" in na_subset:
+            frame = frame[frame[HAS_EVENT_DATE_COLUMN]]
+
+        for column, value in (exclude or {}).items():
+            frame = frame[frame[column] != value]
+
+        sliced_frames.append(frame)
+
+    return OccurrenceCube(*sliced_frames)
+
+
+def roll_up_event_dates(counts: pd.DataFrame, groupby: list[str]) -> pd.DataFrame:
+    if not isinstance(groupby, list):
+        raise ValueError("Error, must specify groupby")
+
+    # Oldest & most recent sightings
+    date_min_max = counts.groupby(groupby, observed=True).agg(
+        **{
+            "Oldest Occurrence": (OLDEST_EVENT_DATE_COLUMN, "min"),
+            "Newest Occurrence": (NEWEST_EVENT_DATE_COLUMN, "max"),
+        }
+    )
+
+    # Back from ordered categories to plain dates
+    for column in date_min_max.columns:
+        categories = date_min_max[column].cat.categories
+        date_min_max[column] = date_min_max[column].astype(categories.dtype)
+
+    return date_min_max
@@ -5,24 +5,28 @@
 ###############################################################################
 
 
+from typing import Optional
+
 import pandas as pd
 
+from src.utils.data_utils import pivot_counts
 
-def make_sex_df(occurrences_df: pd.DataFrame) -> pd.DataFrame:
-    df = occurrences_df.copy()
 
-    sex_counts = df.pivot_table(
-        index="year", columns="sex", aggfunc="size", fill_value=0
+def make_sex_df(
+    occurrences_df: pd.DataFrame, count_column: Optional[str] = None
+) -> pd.DataFrame:
+    sex_counts = pivot_counts(
+        occurrences_df, index=["year"], columns="sex", count_column=count_column
     )
     sex_counts = sex_counts.add_prefix("Sex: ")
     return sex_counts
 
 
-def make_lifeStage_df(occurrences_df: pd.DataFrame) -> pd.DataFrame:
-    df = occurrences_df.copy()
-
-    life_stage_counts = df.pivot_table(
-        index="year", columns="lifeStage", aggfunc="size", fill_value=0
+def make_lifeStage_df(
+    occurrences_df: pd.DataFrame, count_column: Optional[str] = None
+) -> pd.DataFrame:
+    life_stage_counts = pivot_counts(
+        occurrences_df, index=["year"], columns="lifeStage", count_column=count_column
     )
     life_stage_counts = life_stage_counts.add_prefix("Life Stage: ")
     return life_stage_counts
@@ -5,10 +5,11 @@
 ###############################################################################
 
 
-import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Callable, Union
+from typing import Iterable, Iterator, NamedTuple
 
+import numpy as np
 import pandas as pd
 
 from src.gbif.analyze_methodology import assemble_methodology_metrics
@@ -24,14 +25,63 @@ from src.gbif.constants import (
     GBIF_STORY_SHARKS_CSV,
 )
 from src.utils.data_utils import (
-    add_totals_column,
     export_to_csv,
     export_to_json,
+    format_columns,
+    join_unique_values,
     move_column_after,
+    move_columns,
     read_csv,
     validate_and_dropna,
 )
-from src.utils.geomap_utils import get_LME_from_coords
+from src.utils.geomap_utils import get_LMEs_from_coords
+
+# Per-shark coordinates history column (kept as str in CSV exports)
+COORDINATES_COLUMN = "lat:decimalLatitude long:decimalLongitude (eventDate)"
+
+# Fields of each track point, in tracking JSON order
+TRACK_FIELDS = ["lat", "long", "region", "eventDate", "parsedDate"]
+
+# Full date, year-month, year (anything else, e.g. with time, sorts last)
+TRACK_DATE_FORMATS = ("%Y-%m-%d", "%Y-%m", "%Y")
+
+# Per-shark "metric (time)" columns: (column, metric_subset, metric_timing,
+# format_str), each listing the distinct formatted values in order first seen
+INDIVIDUAL_METRICS = [
+    # == f"{stage} ({year})"
+    ("lifeStage (year)", ["lifeStage"], ["year"], "{0} ({1})"),
+    # == f"{continent} ({year})"
+    ("continent (year)", ["continent"], ["year"], "{0} ({1})"),
+    # == f"{publishingCountry} ({year})"
+    ("publishingCountry (year)", ["publishingCountry"], ["year"], "{0} ({1})"),
+    # == f"{country} ({year})"
+    ("country (year)", ["country"], ["year"], "{0} ({1})"),
+    # == f"{state} - {locality} ({month} {year})"
+    (
+        "stateProvince - verbatimLocality (month year)",
+        ["stateProvince", "verbatimLocality"],
+        ["month", "year"],
+        "{0} - {1} ({2} {3})",
+    ),
+]
+
+# Observation type (human/divers vs machine/satellites), counted per shark
+OBSERVATION_TYPES = ["HUMAN_OBSERVATION", "MACHINE_OBSERVATION"]
+
+# All shark tracks as GeoJSON, per geometry (all at once + chronological sequence)
+TRACKING_GEOJSON_FILES = {
+    "MultiPoint": GBIF_SHARK_TRACKING_MULTI_GEOJSON,
+    "LineString": GBIF_SHARK_TRACKING_LINE_GEOJSON,
+}
+
+
+class SharkTracks(NamedTuple):
+    # One row per distinct sighting (lat, long, eventDate) of each shark, with
+    # its region & parsed date, sorted chronologically (ties in sighting order)
+    points: pd.DataFrame
+
+    # Row positions in points for each whaleSharkID
+    positions: dict
 
 
 def make_unique_sharks_count(
@@ -41,12 +91,14 @@ def make_unique_sharks_count(
     source_df = validate_and_dropna(source_df, na_subset=["whaleSharkID"] + groupby)
     unique_sharks = source_df.drop_duplicates(subset=["whaleSharkID"]).reset_index()
 
-    # Copy to make pandas happy
-    target_df = target_df.copy()
-
-    target_df["Unique Sharks (with ID)"] = unique_sharks.groupby(groupby).size()
-    target_df["Unique Sharks (with ID)"] = (
-        target_df["Unique Sharks (with ID)"].fillna(0).astype(int)
+    # New frame with the extra column (target_df itself left as is)
+    unique_counts = unique_sharks.groupby(groupby, observed=True).size()
+    target_df = target_df.assign(
+        **{
+            "Unique Sharks (with ID)": unique_counts.reindex(target_df.index)
+            .fillna(0)
+            .astype(int)
+        }
     )
 
     target_df = move_column_after(
@@ -58,161 +110,218 @@ def make_unique_sharks_count(
     return target_df
 
 
-def make_individual_metric_df(
+def make_individual_metric_values(
     occurrences_df: pd.DataFrame,
-    individual_sharks: pd.DataFrame,
     metric_subset: list[str],
     metric_timing: list[str],
-    format_str_or_func: Union[str, Callable],
-    column_name: str,
-) -> pd.DataFrame:
-
-    # Combine metrics (e.g. ["decimalLatitude", "decimalLongitude"] + ["eventDate"])
-    all_metric_vals = metric_subset + metric_timing
-
-    # Now, non-null specific metric by chosen time views (e.g. month year)
-    valid_metric = occurrences_df.dropna(subset=metric_subset).copy()
+    format_str: str,
+) -> pd.Series:
+    # Combine metrics (e.g. ["stateProvince", "verbatimLocality"] + ["year"])
+    has_metric = occurrences_df[metric_subset].notna().all(axis=1)
 
     # Ugly type casting trick to populate & format null vals :/
     with pd.option_context("future.no_silent_downcasting", True):
-        for time_view in metric_timing:
-            valid_metric[time_view] = (
-                valid_metric[time_view]
-                .astype(object)
-                .fillna(f"{time_view} Unknown")
-                .astype(str)
-            )
+        timings = [
+            occurrences_df[time_view]
+            .astype(object)
+            .fillna(f"{time_view} Unknown")
+            .astype(str)
+            for time_view in metric_timing
+        ]
+
+    # Formatted value per occurrence (NaN if any metric value is missing)
+    metric_values = format_columns(
+        [occurrences_df[column] for column in metric_subset] + timings, format_str
+    )
+    return metric_values.where(has_metric)
 
-    # Allow passing of str OR formatting function (e.g. lat/lon region retrieval)
-    def format_row(vals):
-        if callable(format_str_or_func):
-            return format_str_or_func(*vals)
-        else:
-            return format_str_or_func.format(*vals)
-
-    # Assemble specific metric values over time per shark ID (e.g. lifeStage)
-    valid_metric = (
-        valid_metric.groupby("whaleSharkID")
-        .apply(
-            # Use `dict.fromkeys` instead of `sorted(set` to preserve original order
-            lambda x: ", ".join(
-                dict.fromkeys(
-                    # Example: zip occurrenceRemarks with eventDate
-                    format_row(vals)
-                    for vals in zip(*(x[col] for col in all_metric_vals))
-                )
-            ),
-            include_groups=False,
-        )
-        .reset_index()
-        .rename(columns={0: column_name})
+
+def parse_track_date(eventDate: str) -> datetime:
+    # Try parsing in order: full date, year-month, year
+    for time_format in TRACK_DATE_FORMATS:
+        try:
+            # e.g. "2024" defaults to "2024-01-01"
+            return datetime.strptime(eventDate.strip(), time_format)
+        except ValueError:
+            continue
+
+    # If no time formats matched, push to end
+    return datetime.max
+
+
+def make_shark_tracks(occurrences_df: pd.DataFrame) -> SharkTracks:
+    # Each distinct sighting once per shark, in occurrence order
+    points = (
+        occurrences_df.dropna(subset=["decimalLatitude", "decimalLongitude"])[
+            ["whaleSharkID", "decimalLatitude", "decimalLongitude", "eventDate"]
+        ]
+        .astype({"eventDate": str})
+        .drop_duplicates()
+        .rename(columns={"decimalLatitude": "lat", "decimalLongitude": "long"})
+        .reset_index(drop=True)
     )
 
-    individual_sharks = individual_sharks.merge(
-        valid_metric, on="whaleSharkID", how="left"
+    # Tag every point's region in one batch (LMEs looked up per distinct coord)
+    points["region"] = get_LMEs_from_coords(points["lat"], points["long"])
+
+    # Parse each distinct eventDate once, then broadcast back to every point
+    date_codes, event_dates = pd.factorize(points["eventDate"])
+    parsed_dates = [parse_track_date(event_date) for event_date in event_dates]
+    date_order = np.array([date.toordinal() for date in parsed_dates], dtype=np.int64)
+    points["parsedDate"] = np.array(
+        [date.strftime("%Y-%m-%d") for date in parsed_dates], dtype=object
+    )[date_codes]
+    points["sightingOrder"] = np.arange(len(points))
+
+    points = points.iloc[np.argsort(date_order[date_codes], kind="stable")]
+    points = points.reset_index(drop=True)
+
+    return SharkTracks(
+        points=points,
+        positions=points.groupby("whaleSharkID", sort=False).indices,
     )
-    individual_sharks.loc[:, column_name] = individual_sharks[column_name].fillna(
-        "Unknown"
+
+
+def make_coordinates_history(shark_tracks: SharkTracks) -> pd.Series:
+    # Render e.g. "lat:-21.9 long:113.9 (Region 2019-06-03), ..." per shark, in
+    # order first sighted (str form kept for CSV exports)
+    points = shark_tracks.points.sort_values("sightingOrder")
+    sightings = (
+        "lat:"
+        + points["lat"].astype(str)
+        + " long:"
+        + points["long"].astype(str)
+        + " ("
+        + points["region"]
+        + " "
+        + points["eventDate"]
+        + ")"
     )
 
-    return individual_sharks
+    return sightings.groupby(points["whaleSharkID"], sort=False).agg(", ".join)
+
 
+def iter_shark_tracks(
+    shark_ids: Iterable[str], shark_tracks: SharkTracks
+) -> Iterator[tuple[str, dict]]:
+    track_columns = {
+        field: shark_tracks.points[field].to_numpy() for field in TRACK_FIELDS
+    }
+
+    for shark_id in shark_ids:
+        positions = shark_tracks.positions.get(shark_id)
 
-def latlon_region_formatter(lat, long, eventDate):
-    region = get_LME_from_coords(lat, long)
+        # Skip sharks without any sightings with coords
+        if positions is None:
+            continue
 
-    if region is None:
-        region = "Unknown"
-    return f"lat:{lat} long:{long} ({region} {eventDate})"
+        yield shark_id, {
+            field: values[positions].tolist() for field, values in track_columns.items()
+        }
 
 
-def assemble_individual_metrics(
-    occurrences_df: pd.DataFrame, individual_sharks: pd.DataFrame
+def make_individual_sharks_df(
+    occurrences_df: pd.DataFrame, shark_tracks: SharkTracks
 ) -> pd.DataFrame:
-    # Build "lifeStage (year)" metric
-    individual_sharks = make_individual_metric_df(
-        occurrences_df=occurrences_df,
-        individual_sharks=individual_sharks,
-        metric_subset=["lifeStage"],
-        metric_timing=["year"],
-        format_str_or_func="{0} ({1})",  # == f"{stage} ({year})"
-        column_name="lifeStage (year)",
-    )
+    shark_ids = occurrences_df["whaleSharkID"]
+    observation_types = [
+        observation_type
+        for observation_type in OBSERVATION_TYPES
+        if (occurrences_df["basisOfRecord"] == observation_type).any()
+    ]
 
-    # Build "continent (year)" metric
-    individual_sharks = make_individual_metric_df(
-        occurrences_df=occurrences_df,
-        individual_sharks=individual_sharks,
-        metric_subset=["continent"],
-        metric_timing=["year"],
-        format_str_or_func="{0} ({1})",  # == f"{continent} ({year})"
-        column_name="continent (year)",
+    # Per-occurrence inputs, so each per-shark stat is one named aggregation
+    per_occurrence = pd.DataFrame(
+        {
+            "whaleSharkID": shark_ids,
+            # Ordered categories, so oldest / newest compare int codes
+            "eventDate": occurrences_df["eventDate"].astype(
+                pd.CategoricalDtype(ordered=True)
+            ),
+            # Only Female / Male count towards a shark's (first known) sex
+            "sex": occurrences_df["sex"].where(
+                occurrences_df["sex"].isin(["Female", "Male"])
+            ),
+            **{
+                observation_type: occurrences_df["basisOfRecord"] == observation_type
+                for observation_type in observation_types
+            },
+        },
+        copy=False,
     )
 
-    # Build "publishingCountry (year)" metric
-    individual_sharks = make_individual_metric_df(
-        occurrences_df=occurrences_df,
-        individual_sharks=individual_sharks,
-        metric_subset=["publishingCountry"],
-        metric_timing=["year"],
-        format_str_or_func="{0} ({1})",  # == f"{publishingCountry} ({year})"
-        column_name="publishingCountry (year)",
+    individual_sharks = per_occurrence.groupby("whaleSharkID").agg(
+        **{
+            "Total Occurrences": ("eventDate", "size"),
+            "Oldest Occurrence": ("eventDate", "min"),
+            "Newest Occurrence": ("eventDate", "max"),
+            **{
+                observation_type: (observation_type, "sum")
+                for observation_type in observation_types
+            },
+            "sex": ("sex", "first"),
+        }
     )
 
-    # Build "country (year)" metric
-    individual_sharks = make_individual_metric_df(
-        occurrences_df=occurrences_df,
-        individual_sharks=individual_sharks,
-        metric_subset=["country"],
-        metric_timing=["year"],
-        format_str_or_func="{0} ({1})",  # == f"{country} ({year})"
-        column_name="country (year)",
-    )
+    # Back from ordered categories to plain dates
+    for column in ["Oldest Occurrence", "Newest Occurrence"]:
+        categories = individual_sharks[column].cat.categories
+        individual_sharks[column] = individual_sharks[column].astype(categories.dtype)
+    individual_sharks["sex"] = individual_sharks["sex"].astype(object).fillna("Unknown")
 
-    # Build "stateProvince - verbatimLocality (month year)" metric
-    individual_sharks = make_individual_metric_df(
-        occurrences_df=occurrences_df,
-        individual_sharks=individual_sharks,
-        metric_subset=["stateProvince", "verbatimLocality"],
-        metric_timing=["month", "year"],
-        # == f"{state} - {locality} ({month} {year})"
-        format_str_or_func="{0} - {1} ({2} {3})",
-        column_name="stateProvince - verbatimLocality (month year)",
-    )
+    # Build "metric (time)" columns (e.g. lifeStage, locations, etc)
+    for column, metric_subset, metric_timing, format_str in INDIVIDUAL_METRICS:
+        metric_values = make_individual_metric_values(
+            occurrences_df, metric_subset, metric_timing, format_str
+        )
+        individual_sharks[column] = join_unique_values(shark_ids, metric_values)
 
     # Build "occurrenceRemarks (eventDate)" metric
     # Deduplicate by remark text per shark first. Identical remarks across
     # many detections (e.g. telemetry pings all sharing same remark) would
     # otherwise repeat in the output.
-    unique_remarks_df = occurrences_df.drop_duplicates(
-        subset=["whaleSharkID", "occurrenceRemarks"]
+    # == f"{occurrenceRemarks} ({eventDate})"
+    remarks = make_individual_metric_values(
+        occurrences_df, ["occurrenceRemarks"], ["eventDate"], "{0} ({1})"
     )
-    individual_sharks = make_individual_metric_df(
-        occurrences_df=unique_remarks_df,
-        individual_sharks=individual_sharks,
-        metric_subset=["occurrenceRemarks"],
-        metric_timing=["eventDate"],
-        format_str_or_func="{0} ({1})",  # == f"{occurrenceRemarks} ({eventDate})"
-        column_name="occurrenceRemarks (eventDate)",
+    is_repeat_remark = occurrences_df.duplicated(["whaleSharkID", "occurrenceRemarks"])
+    individual_sharks["occurrenceRemarks (eventDate)"] = join_unique_values(
+        shark_ids, remarks.where(~is_repeat_remark)
     )
 
     # Build "lat:decimalLatitude long:decimalLongitude (eventDate)" metric
-    individual_sharks = make_individual_metric_df(
-        occurrences_df=occurrences_df,
-        individual_sharks=individual_sharks,
-        metric_subset=["decimalLatitude", "decimalLongitude"],
-        metric_timing=["eventDate"],
-        # == f"lat:{latitude} long:{longitude} ({region}, {eventDate})"
-        format_str_or_func=latlon_region_formatter,
-        column_name="lat:decimalLatitude long:decimalLongitude (eventDate)",
+    # == f"lat:{latitude} long:{longitude} ({region} {eventDate})"
+    individual_sharks[COORDINATES_COLUMN] = make_coordinates_history(shark_tracks)
+
+    # Get any available media (+ licensing rights)
+    individual_sharks["imageURL (license, creator)"] = make_media_conditions(
+        occurrences_df
     )
 
-    return individual_sharks
+    metric_columns = (
+        [column for column, *_ in INDIVIDUAL_METRICS]
+        + ["occurrenceRemarks (eventDate)", COORDINATES_COLUMN]
+        + ["imageURL (license, creator)"]
+    )
+    individual_sharks[metric_columns] = individual_sharks[metric_columns].fillna(
+        "Unknown"
+    )
 
+    # Enrich with methodology classification, ID pattern, & coordinate precision
+    individual_sharks = assemble_methodology_metrics(occurrences_df, individual_sharks)
 
-def make_media_conditions(
-    occurrences_df: pd.DataFrame, individual_sharks: pd.DataFrame
-) -> pd.DataFrame:
+    # One row per distinct (whaleSharkID, organismID, identificationID)
+    individual_sharks = (
+        occurrences_df[["whaleSharkID", "organismID", "identificationID"]]
+        .drop_duplicates()
+        .reset_index(drop=True)
+        .merge(individual_sharks.reset_index(), on="whaleSharkID", how="left")
+    )
+
+    return move_columns(individual_sharks, ["Total Occurrences"], position=1)
+
+
+def make_media_conditions(occurrences_df: pd.DataFrame) -> pd.Series:
     # Anything more restrictive probably not usable
     license_types = {
         "http://creativecommons.org/licenses/by/4.0/": "CC BY [Attribution]",
@@ -238,119 +347,107 @@ def make_media_conditions(
     occurrences_media["license"] = occurrences_media["license"].replace(license_types)
 
     # Build "identifier (license: license, creator: creator)" metric
-    individual_sharks = make_individual_metric_df(
-        occurrences_df=occurrences_media,
-        individual_sharks=individual_sharks,
+    # == f"{identifier} (license: {license}, creator: {creator})"
+    image_urls = make_individual_metric_values(
+        occurrences_media,
         metric_subset=["identifier"],
         metric_timing=["license", "creator"],
-        # == f"{identifier} (license: {license}, creator: {creator})"
-        format_str_or_func="{0} (license: {1}, creator: {2})",
-        column_name="imageURL (license, creator)",
+        format_str="{0} (license: {1}, creator: {2})",
     )
 
-    return individual_sharks
-
-
-def parse_coordinates_history(coordinates_str_list: str) -> list[dict]:
-    if coordinates_str_list == "Unknown" or not isinstance(coordinates_str_list, str):
-        return []
-
-    entries = coordinates_str_list.split(", ")
-    parsed = []
-
-    for entry in entries:
-        match = re.match(r"lat:([-\d.]+) long:([-\d.]+) \(([^,]+) ([^)]+)\)", entry)
-        if match:
-            lat, long, region, eventDate = match.groups()
-
-            # Try parsing in order: full date, year-month, year
-            for time_format in ("%Y-%m-%d", "%Y-%m", "%Y"):
-                try:
-                    # e.g. "2024" defaults to "2024-01-01"
-                    parsed_date = datetime.strptime(eventDate.strip(), time_format)
-                    break
-                except ValueError:
-                    continue
-            else:
-                # If no time formats matched, push to end
-                parsed_date = datetime.max
-
-            parsed.append(
-                {
-                    "lat": float(lat),
-                    "long": float(long),
-                    "region": region.strip(),
-                    "eventDate": eventDate,
-                    "parsedDate": parsed_date,  # temp field for sort & display on globe
-                }
-            )
-
-    # Sort chronologically, then convert to str before return (avoid JSON errors)
-    parsed.sort(key=lambda x: x["parsedDate"])
-
-    for item in parsed:
-        item["parsedDate"] = item["parsedDate"].strftime("%Y-%m-%d")
-
-    return parsed
-
-
-def export_shark_tracking_json(shark_df: pd.DataFrame, json_file: str) -> None:
-    # Build export list
-    output = []
-    for _, row in shark_df.iterrows():
-        coords = parse_coordinates_history(
-            row["lat:decimalLatitude long:decimalLongitude (eventDate)"]
-        )
-
-        # Skip if "Unknown" or parsing failed
-        if coords:
-            output.append({"whaleSharkID": row["whaleSharkID"], "coordinates": coords})
-
-    export_to_json(json_file, output)
+    return join_unique_values(occurrences_media["whaleSharkID"], image_urls)
+
+
+def make_track_exports(shark_ids: Iterable[str], shark_tracks: SharkTracks) -> dict:
+    # Each shark's tracking JSON coords & GeoJSON parts, built just once and
+    # shared by every file that includes that shark
+    track_exports = {}
+
+    for shark_id, track in iter_shark_tracks(pd.unique(shark_ids), shark_tracks):
+        track_exports[shark_id] = {
+            "coordinates": [
+                dict(zip(TRACK_FIELDS, point))
+                for point in zip(*(track[field] for field in TRACK_FIELDS))
+            ],
+            # GeoJSON uses [lon, lat]
+            "geometry": [list(point) for point in zip(track["long"], track["lat"])],
+            "eventDates": track["eventDate"],
+            # Remove duplicates by creating a set, then restore to list for GeoJSON
+            "regions": list(set(track["region"])),
+        }
+
+    return track_exports
+
+
+def make_shark_tracking_json(shark_df: pd.DataFrame, track_exports: dict) -> list:
+    # Skip sharks without any coords
+    return [
+        {
+            "whaleSharkID": shark_id,
+            "coordinates": track_exports[shark_id]["coordinates"],
+        }
+        for shark_id in shark_df["whaleSharkID"]
+        if shark_id in track_exports
+    ]
 
 
 # Function to get coords data in GeoJSON format for Copernicus Marine MyOcean layer
-def export_shark_tracking_geojson(
-    shark_df: pd.DataFrame, geojson_file: str, geometry_type: str = "MultiPoint"
-) -> None:
-    features = []
+def make_shark_tracking_geojson(
+    shark_df: pd.DataFrame, track_exports: dict, geometry_type: str = "MultiPoint"
+) -> dict:
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {
+                "type": geometry_type,  # e.g. "MultiPoint" or "LineString"
+                "coordinates": track_exports[shark_id]["geometry"],
+            },
+            "properties": {
+                "whaleSharkID": shark_id,
+                "eventDates": track_exports[shark_id]["eventDates"],
+                "regions": track_exports[shark_id]["regions"],
+            },
+        }
+        for shark_id in shark_df["whaleSharkID"]
+        if shark_id in track_exports
+    ]
 
-    for _, row in shark_df.iterrows():
-        coords = parse_coordinates_history(
-            row["lat:decimalLatitude long:decimalLongitude (eventDate)"]
-        )
+    return {"type": "FeatureCollection", "features": features}
 
-        if not coords:
-            continue
 
-        # Prepare MultiPoint coords (+ metadata), given that GeoJSON uses [lon, lat]
-        coordinates = [[point["long"], point["lat"]] for point in coords]
-        event_dates = [point["eventDate"] for point in coords]
-
-        # Remove duplicates by creating a set, then restore to list for GeoJSON
-        regions = list({point["region"] for point in coords})
-
-        features.append(
-            {
-                "type": "Feature",
-                "geometry": {
-                    "type": geometry_type,  # e.g. "MultiPoint" or "LineString"
-                    "coordinates": coordinates,
-                },
-                "properties": {
-                    "whaleSharkID": row["whaleSharkID"],
-                    "eventDates": event_dates,
-                    "regions": regions,
-                },
-            }
-        )
-
-    geojson_data = {"type": "FeatureCollection", "features": features}
+def export_shark_tracking_files(
+    individual_sharks: pd.DataFrame,
+    story_sharks: pd.DataFrame,
+    media_sharks: pd.DataFrame,
+    shark_tracks: SharkTracks,
+) -> None:
+    # Story & media sharks are subsets, so all tracks come from the full list
+    track_exports = make_track_exports(individual_sharks["whaleSharkID"], shark_tracks)
+
+    tracking_files = {
+        GBIF_SHARK_TRACKING_JSON: make_shark_tracking_json(
+            individual_sharks, track_exports
+        ),
+        GBIF_STORY_SHARK_TRACKING_JSON: make_shark_tracking_json(
+            story_sharks, track_exports
+        ),
+        GBIF_MEDIA_SHARK_TRACKING_JSON: make_shark_tracking_json(
+            media_sharks, track_exports
+        ),
+        **{
+            geojson_file: make_shark_tracking_geojson(
+                individual_sharks, track_exports, geometry_type=geometry_type
+            )
+            for geometry_type, geojson_file in TRACKING_GEOJSON_FILES.items()
+        },
+    }
 
-    export_to_json(geojson_file, geojson_data)
+    # Files don't depend on each other, so write them all at once
+    with ThreadPoolExecutor(max_workers=len(tracking_files)) as executor:
+        list(executor.map(export_to_json, tracking_files, tracking_files.values()))
 
 
-def export_story_sharks(individual_sharks: pd.DataFrame) -> None:
+def export_story_sharks(individual_sharks: pd.DataFrame) -> pd.DataFrame:
     frequently_sighted = individual_sharks.loc[
         individual_sharks["Total Occurrences"] > 3
     ]
@@ -360,90 +457,40 @@ def export_story_sharks(individual_sharks: pd.DataFrame) -> None:
     ).reset_index(drop=True)
 
     export_to_csv(GBIF_STORY_SHARKS_CSV, frequently_sighted)
-    export_shark_tracking_json(
-        shark_df=frequently_sighted, json_file=GBIF_STORY_SHARK_TRACKING_JSON
-    )
+    return frequently_sighted
 
 
-def export_media_sharks(individual_sharks: pd.DataFrame) -> None:
+def export_media_sharks(individual_sharks: pd.DataFrame) -> pd.DataFrame:
     has_media = individual_sharks.loc[
         individual_sharks["imageURL (license, creator)"] != "Unknown"
     ]
-    valid = has_media.loc[
-        has_media["lat:decimalLatitude long:decimalLongitude (eventDate)"] != "Unknown"
-    ]
+    valid = has_media.loc[has_media[COORDINATES_COLUMN] != "Unknown"]
 
     export_to_csv(GBIF_MEDIA_SHARKS_CSV, valid)
-    export_shark_tracking_json(shark_df=valid, json_file=GBIF_MEDIA_SHARK_TRACKING_JSON)
+    return valid
 
 
-def export_individual_shark_stats(
-    occurrences_df: pd.DataFrame, make_basisOfRecord_df_func, make_eventDate_df_func
-) -> None:
+def export_individual_shark_stats(occurrences_df: pd.DataFrame) -> None:
     occurrences_df = validate_and_dropna(
         occurrences_df, na_subset=["whaleSharkID", "eventDate"]
     )
 
-    # Now focus on clean entries & map info (sex, lifeStage, etc) where available
-    individual_sharks = (
-        occurrences_df[["whaleSharkID", "organismID", "identificationID"]]
-        .drop_duplicates()
-        .reset_index(drop=True)
-    )
-    individual_sharks.set_index("whaleSharkID", inplace=True)
+    # Sorted coords / dates / regions per shark, shared by every tracking export
+    shark_tracks = make_shark_tracks(occurrences_df)
 
-    individual_sharks = add_totals_column(
-        source_df=occurrences_df, target_df=individual_sharks, groupby=["whaleSharkID"]
-    )
-
-    # Oldest & newest occurrence eventDates
-    date_min_max = make_eventDate_df_func(occurrences_df, groupby=["whaleSharkID"])
-    individual_sharks = individual_sharks.merge(
-        date_min_max, on=["whaleSharkID"], how="left"
-    )
-
-    # Observation type (human/divers vs machine/satellites)
-    basisOfRecord_counts = make_basisOfRecord_df_func(
-        occurrences_df, index=["whaleSharkID"]
-    )
-    individual_sharks = individual_sharks.merge(
-        basisOfRecord_counts, on="whaleSharkID", how="left"
-    )
-
-    sex_mappings = occurrences_df[
-        occurrences_df["sex"].isin(["Female", "Male"])
-    ].drop_duplicates(subset="whaleSharkID", keep="first")[["whaleSharkID", "sex"]]
-    individual_sharks = individual_sharks.merge(
-        sex_mappings, on="whaleSharkID", how="left"
-    )
-    individual_sharks.loc[:, "sex"] = individual_sharks["sex"].fillna("Unknown")
-
-    # Build & assemble all other relevant metrics (e.g. lifeStage, locations, etc)
-    individual_sharks = assemble_individual_metrics(occurrences_df, individual_sharks)
-
-    # Get any available media (+ licensing rights)
-    individual_sharks = make_media_conditions(occurrences_df, individual_sharks)
-
-    # Enrich with methodology classification, ID pattern, & coordinate precision
-    individual_sharks = assemble_methodology_metrics(occurrences_df, individual_sharks)
+    # Every per-shark column (sex, lifeStage, locations, media, etc) at once
+    individual_sharks = make_individual_sharks_df(occurrences_df, shark_tracks)
 
     export_to_csv(GBIF_INDIVIDUAL_SHARKS_STATS_CSV, individual_sharks)
 
     # Also build & export datasets for globe / storytelling
-    export_shark_tracking_json(
-        shark_df=individual_sharks, json_file=GBIF_SHARK_TRACKING_JSON
-    )
-    export_story_sharks(individual_sharks)
-    export_media_sharks(individual_sharks)
-
-    # Extract tracking coords as GeoJSON (all at once + chronological sequence)
-    export_shark_tracking_geojson(
-        shark_df=individual_sharks,
-        geojson_file=GBIF_SHARK_TRACKING_MULTI_GEOJSON,
-        geometry_type="MultiPoint",
-    )
-    export_shark_tracking_geojson(
-        shark_df=individual_sharks,
-        geojson_file=GBIF_SHARK_TRACKING_LINE_GEOJSON,
-        geometry_type="LineString",
+    story_sharks = export_story_sharks(individual_sharks)
+    media_sharks = export_media_sharks(individual_sharks)
+
+    # Tracking JSON (all, story, media) & GeoJSON, from each shark's track once
+    export_shark_tracking_files(
+        individual_sharks=individual_sharks,
+        story_sharks=story_sharks,
+        media_sharks=media_sharks,
+        shark_tracks=shark_tracks,
     )
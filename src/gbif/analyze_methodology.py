@@ -6,10 +6,13 @@
 ###############################################################################
 
 
-import re
+from typing import Optional
 
+import numpy as np
 import pandas as pd
 
+from src.utils.data_utils import join_unique_values
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Classification constants
 # ─────────────────────────────────────────────────────────────────────────────
@@ -35,64 +38,28 @@ COORD_PRECISION_COARSE = "Coarse (>50 km)"
 COORD_PRECISION_UNKNOWN = "Unknown"
 
 
-# ─────────────────────────────────────────────────────────────────────────────
-# Per-occurrence classifiers
-# ─────────────────────────────────────────────────────────────────────────────
-
+# VEMCO acoustic pinger hardware serial format
+ACOUSTIC_SERIAL_PATTERN = r"A69-\d+-\d+"
+ACOUSTIC_SERIAL_ID_PATTERN = "Acoustic Tag Serial (VEMCO)"
 
-def classify_methodology(row: pd.Series) -> str:
-    """
-    Classify a single occurrence into a tracking / observation methodology.
-
-    Priority: basisOfRecord → telemetry sub-type → photo-ID platform.
 
-    MACHINE_OBSERVATION sub-types (in priority order):
-      Aggregated Telemetry  occurrenceRemarks states 1-degree cell aggregation
-      Acoustic Tag          IMOS ATF collectionCode or VEMCO A69 serial pattern
-      SPOT Satellite Tag    "Shark ID:" remarks or "-track-" eventID convention
-      Satellite Tag         other machine telemetry not matched above
+# ─────────────────────────────────────────────────────────────────────────────
+# Per-occurrence classifiers (vectorized)
+# ─────────────────────────────────────────────────────────────────────────────
 
-    HUMAN_OBSERVATION sub-types:
-      Photo-ID (iNaturalist)       occurrenceID links to inaturalist.org
-      Photo-ID (Citizen Science)   occurrenceID links to observation.org
-      Photo-ID (Human Observation) all other human sightings
-    """
-    basis = str(row.get("basisOfRecord") or "")
-    remarks = str(row.get("occurrenceRemarks") or "")
-    coll = str(row.get("collectionCode") or "")
-    event = str(row.get("eventID") or "")
-    sid = str(row.get("whaleSharkID") or "")
-    occ_id = str(row.get("occurrenceID") or "")
-
-    if basis in BASIS_TO_METHODOLOGY:
-        return BASIS_TO_METHODOLOGY[basis]
-
-    if basis == "MACHINE_OBSERVATION":
-        if "aggregated per species per 1-degree cell" in remarks:
-            return "Aggregated Telemetry"
-        # IMOS_ATF is the IMOS Animal Tracking Facility collectionCode;
-        # A69-\d+-\d+ is the VEMCO acoustic pinger hardware serial format
-        if "IMOS_ATF" in coll or re.fullmatch(r"A69-\d+-\d+", sid):
-            return "Acoustic Tag"
-        # "Shark ID:" remarks and "-track-" eventIDs are a publishing convention
-        # used by several Australian SPOT satellite tagging programs
-        if "-track-" in event or remarks.startswith("Shark ID:"):
-            return "SPOT Satellite Tag"
-        return "Satellite Tag"
 
-    if basis == "HUMAN_OBSERVATION":
-        if "inaturalist.org" in occ_id.lower():
-            return "Photo-ID (iNaturalist)"
-        if "observation.org" in occ_id.lower():
-            return "Photo-ID (Citizen Science)"
-        return "Photo-ID (Human Observation)"
+def _text_column(occurrences_df: pd.DataFrame, column: str) -> pd.Series:
+    # Missing columns / values read as "" (plain Python str, so pattern
+    # matching below uses the same `re` rules as a per-value fullmatch)
+    if column not in occurrences_df.columns:
+        return pd.Series("", index=occurrences_df.index, dtype=object)
 
-    return "Unknown"
+    return occurrences_df[column].astype(object).fillna("").astype(str)
 
 
-def classify_id_pattern(shark_id: str) -> str:
+def classify_id_patterns(shark_ids: pd.Series) -> pd.Series:
     """
-    Classify the structural format of a whaleSharkID string.
+    Classify the structural format of each whaleSharkID string.
 
     Patterns describe format only — not assumed program origin — since the
     same format may be reused across different research groups or regions.
@@ -111,36 +78,137 @@ def classify_id_pattern(shark_id: str) -> str:
       Named Individual             alpha string    researcher-assigned name
       Researcher-Assigned Code     anything else
           local codes not matching known formats
+
+    Each distinct ID is classified once, then broadcast back to every row.
     """
-    if not shark_id or shark_id in ("nan", "None", ""):
-        return "Unknown"
+    id_codes, unique_ids = pd.factorize(shark_ids.astype(object).fillna("").astype(str))
+    ids = pd.Series(unique_ids, dtype=object)
+
+    conditions = [
+        ids.isin(["nan", "None", ""]),
+        # VEMCO acoustic hardware serial — model-specific & globally consistent
+        ids.str.fullmatch(ACOUSTIC_SERIAL_PATTERN),
+        # Single-letter prefix + digits: A-NNN, X-NNN, M-NNN, etc.
+        ids.str.fullmatch(r"[A-Z]-\d+"),
+        # Year-prefixed field survey codes: e.g. 2022_WS117
+        ids.str.fullmatch(r"\d{4}_[A-Z]+\d+"),
+        # 9+ digit IDs are typically per-observation platform IDs (e.g.
+        # iNaturalist), NOT individual animal IDs — each sighting gets a new one
+        ids.str.fullmatch(r"\d{9,}"),
+        # 4–8 digit numerics are typically internal deployment or database refs
+        ids.str.fullmatch(r"\d{4,8}"),
+        # All-alpha (with spaces/hyphens/apostrophes): researcher-assigned name
+        ids.str.fullmatch(r"[A-Za-z][A-Za-z\s\-']*"),
+    ]
+    choices = [
+        "Unknown",
+        ACOUSTIC_SERIAL_ID_PATTERN,
+        ("Satellite Tag Code (" + ids.str[0] + "-Series)").to_numpy(),
+        "Photo-ID Survey Code",
+        "Platform Observation ID",
+        "Database Record ID",
+        "Named Individual",
+    ]
+    id_patterns = np.select(
+        [condition.to_numpy(dtype=bool) for condition in conditions],
+        [np.asarray(choice, dtype=object) for choice in choices],
+        default="Researcher-Assigned Code",
+    )
 
-    # VEMCO acoustic hardware serial — format is model-specific and globally consistent
-    if re.fullmatch(r"A69-\d+-\d+", shark_id):
-        return "Acoustic Tag Serial (VEMCO)"
+    return pd.Series(id_patterns[id_codes], index=shark_ids.index, dtype=object)
 
-    # Single-letter prefix + digits: A-NNN, X-NNN, M-NNN, etc.
-    if re.fullmatch(r"[A-Z]-\d+", shark_id):
-        return f"Satellite Tag Code ({shark_id[0]}-Series)"
 
-    # Year-prefixed field survey codes: e.g. 2022_WS117
-    if re.fullmatch(r"\d{4}_[A-Z]+\d+", shark_id):
-        return "Photo-ID Survey Code"
+def classify_methodologies(
+    occurrences_df: pd.DataFrame, id_patterns: Optional[pd.Series] = None
+) -> pd.Series:
+    """
+    Classify each occurrence into a tracking / observation methodology.
 
-    # 9+ digit IDs are typically per-observation platform IDs (e.g. iNaturalist),
-    # NOT individual animal IDs — each sighting gets a new unique number
-    if re.fullmatch(r"\d{9,}", shark_id):
-        return "Platform Observation ID"
+    Priority: basisOfRecord → telemetry sub-type → photo-ID platform.
 
-    # 4–8 digit numerics are typically internal deployment or database record refs
-    if re.fullmatch(r"\d{4,8}", shark_id):
-        return "Database Record ID"
+    MACHINE_OBSERVATION sub-types (in priority order):
+      Aggregated Telemetry  occurrenceRemarks states 1-degree cell aggregation
+      Acoustic Tag          IMOS ATF collectionCode or VEMCO A69 serial pattern
+      SPOT Satellite Tag    "Shark ID:" remarks or "-track-" eventID convention
+      Satellite Tag         other machine telemetry not matched above
 
-    # All-alpha (with spaces/hyphens/apostrophes): researcher-assigned name
-    if re.fullmatch(r"[A-Za-z][A-Za-z\s\-']*", shark_id):
-        return "Named Individual"
+    HUMAN_OBSERVATION sub-types:
+      Photo-ID (iNaturalist)       occurrenceID links to inaturalist.org
+      Photo-ID (Citizen Science)   occurrenceID links to observation.org
+      Photo-ID (Human Observation) all other human sightings
 
-    return "Researcher-Assigned Code"
+    Pass id_patterns (from classify_id_patterns) to reuse already classified
+    whaleSharkIDs for the VEMCO serial check.
+    """
+    basis = _text_column(occurrences_df, "basisOfRecord")
+    remarks = _text_column(occurrences_df, "occurrenceRemarks")
+    coll = _text_column(occurrences_df, "collectionCode")
+    event = _text_column(occurrences_df, "eventID")
+    occ_id = _text_column(occurrences_df, "occurrenceID").str.lower()
+
+    if id_patterns is None:
+        id_patterns = classify_id_patterns(_text_column(occurrences_df, "whaleSharkID"))
+
+    is_machine = basis == "MACHINE_OBSERVATION"
+    is_human = basis == "HUMAN_OBSERVATION"
+
+    conditions = [
+        basis.isin(BASIS_TO_METHODOLOGY.keys()),
+        is_machine
+        & remarks.str.contains("aggregated per species per 1-degree cell", regex=False),
+        # IMOS_ATF is the IMOS Animal Tracking Facility collectionCode;
+        # A69-\d+-\d+ is the VEMCO acoustic pinger hardware serial format
+        is_machine
+        & (
+            coll.str.contains("IMOS_ATF", regex=False)
+            | (id_patterns == ACOUSTIC_SERIAL_ID_PATTERN)
+        ),
+        # "Shark ID:" remarks and "-track-" eventIDs are a publishing convention
+        # used by several Australian SPOT satellite tagging programs
+        is_machine
+        & (
+            event.str.contains("-track-", regex=False)
+            | remarks.str.startswith("Shark ID:")
+        ),
+        is_machine,
+        is_human & occ_id.str.contains("inaturalist.org", regex=False),
+        is_human & occ_id.str.contains("observation.org", regex=False),
+        is_human,
+    ]
+    choices = [
+        basis.map(BASIS_TO_METHODOLOGY).to_numpy(),
+        "Aggregated Telemetry",
+        "Acoustic Tag",
+        "SPOT Satellite Tag",
+        "Satellite Tag",
+        "Photo-ID (iNaturalist)",
+        "Photo-ID (Citizen Science)",
+        "Photo-ID (Human Observation)",
+    ]
+    methodologies = np.select(
+        [condition.to_numpy(dtype=bool) for condition in conditions],
+        [np.asarray(choice, dtype=object) for choice in choices],
+        default="Unknown",
+    )
+
+    return pd.Series(methodologies, index=occurrences_df.index, dtype=object)
+
+
+def classify_coordinate_precisions(uncertainties_m: pd.Series) -> pd.Series:
+    values = pd.to_numeric(uncertainties_m).to_numpy(dtype=float, na_value=np.nan)
+
+    # Bins are checked finest to coarsest, so first match wins
+    conditions = [np.isnan(values)] + [
+        values < threshold for threshold, _ in COORD_PRECISION_BINS
+    ]
+    choices = [COORD_PRECISION_UNKNOWN] + [label for _, label in COORD_PRECISION_BINS]
+    precisions = np.select(
+        conditions,
+        [np.asarray(choice, dtype=object) for choice in choices],
+        default=COORD_PRECISION_COARSE,
+    )
+
+    return pd.Series(precisions, index=uncertainties_m.index, dtype=object)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -158,12 +226,14 @@ def annotate_occurrences(occurrences_df: pd.DataFrame) -> pd.DataFrame:
       trackingMethodology  how this occurrence was observed / collected
       idPattern            structural format of the whaleSharkID
     """
-    df = occurrences_df.copy()
-    df["trackingMethodology"] = df.apply(classify_methodology, axis=1)
-    df["idPattern"] = (
-        df["whaleSharkID"].fillna("").astype(str).apply(classify_id_pattern)
+    # New frame sharing the original columns (no full copy of every row)
+    id_patterns = classify_id_patterns(occurrences_df["whaleSharkID"])
+    return occurrences_df.assign(
+        trackingMethodology=classify_methodologies(
+            occurrences_df, id_patterns=id_patterns
+        ),
+        idPattern=id_patterns,
     )
-    return df
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -171,15 +241,6 @@ def annotate_occurrences(occurrences_df: pd.DataFrame) -> pd.DataFrame:
 # ─────────────────────────────────────────────────────────────────────────────
 
 
-def _classify_single_precision(uncertainty_m) -> str:
-    if pd.isna(uncertainty_m):
-        return COORD_PRECISION_UNKNOWN
-    for threshold, label in COORD_PRECISION_BINS:
-        if uncertainty_m < threshold:
-            return label
-    return COORD_PRECISION_COARSE
-
-
 def assemble_methodology_metrics(
     occurrences_df: pd.DataFrame, individual_sharks: pd.DataFrame
 ) -> pd.DataFrame:
@@ -199,58 +260,34 @@ def assemble_methodology_metrics(
     (i.e. annotate_occurrences() was called upstream in analyze.py).
     Falls back to calling annotate_occurrences() here if the column is absent.
 
-    By the time this is called in export_individual_shark_stats, all prior
-    merge operations have promoted whaleSharkID from index to column,
-    so individual_sharks["whaleSharkID"] is safe to reference directly.
+    individual_sharks must be indexed by whaleSharkID (one row per shark, as
+    built by make_individual_sharks_df), so each per-shark join aligns on it.
     """
     if "trackingMethodology" not in occurrences_df.columns:
         occurrences_df = annotate_occurrences(occurrences_df)
 
-    individual_sharks = individual_sharks.copy()
+    shark_ids = occurrences_df["whaleSharkID"]
 
     # Unique methodologies per shark, alphabetically sorted for consistency
-    methodologies = (
-        occurrences_df.dropna(subset=["whaleSharkID", "trackingMethodology"])
-        .groupby("whaleSharkID")["trackingMethodology"]
-        .apply(lambda x: ", ".join(sorted(set(x))))
-        .rename("trackingMethodologies")
-        .reset_index()
-    )
-    individual_sharks = individual_sharks.merge(
-        methodologies, on="whaleSharkID", how="left"
-    )
-    individual_sharks["trackingMethodologies"] = individual_sharks[
-        "trackingMethodologies"
-    ].fillna("Unknown")
-
-    # idPattern is derivable from whaleSharkID alone — no merge needed
-    shark_id_col = (
-        individual_sharks["whaleSharkID"]
-        if "whaleSharkID" in individual_sharks.columns
-        else individual_sharks.index.to_series()
-    )
-    individual_sharks["idPattern"] = (
-        shark_id_col.fillna("").astype(str).apply(classify_id_pattern)
+    methodologies = join_unique_values(
+        shark_ids, occurrences_df["trackingMethodology"], sort=True
     )
 
     # All unique precision levels across a shark's occurrences (no filtering)
-    coord_precision = (
-        occurrences_df.dropna(subset=["whaleSharkID"])
-        .assign(
-            precLevel=lambda df: df["coordinateUncertaintyInMeters"].apply(
-                _classify_single_precision
-            )
-        )
-        .groupby("whaleSharkID")["precLevel"]
-        .apply(lambda x: ", ".join(sorted(set(x))))
-        .rename("coordinatePrecision")
-        .reset_index()
-    )
-    individual_sharks = individual_sharks.merge(
-        coord_precision, on="whaleSharkID", how="left"
+    coord_precision = join_unique_values(
+        shark_ids,
+        classify_coordinate_precisions(occurrences_df["coordinateUncertaintyInMeters"]),
+        sort=True,
     )
-    individual_sharks["coordinatePrecision"] = individual_sharks[
-        "coordinatePrecision"
-    ].fillna(COORD_PRECISION_UNKNOWN)
 
-    return individual_sharks
+    # New frame with the extra columns (individual_sharks itself left as is)
+    return individual_sharks.assign(
+        trackingMethodologies=methodologies.reindex(individual_sharks.index).fillna(
+            "Unknown"
+        ),
+        # idPattern is derivable from whaleSharkID alone — no join needed
+        idPattern=classify_id_patterns(individual_sharks.index.to_series()),
+        coordinatePrecision=coord_precision.reindex(individual_sharks.index).fillna(
+            COORD_PRECISION_UNKNOWN
+        ),
+    )
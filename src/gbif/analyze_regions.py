@@ -5,32 +5,53 @@
 ###############################################################################
 
 
+from typing import Optional
+
 import pandas as pd
 
 from src.config import MONTH_NAMES
+from src.gbif.analyze_cube import (
+    COUNT_COLUMN,
+    OccurrenceCube,
+    roll_up_event_dates,
+    slice_cube,
+)
 from src.gbif.constants import (
     GBIF_CONTINENT_STATS_CSV,
     GBIF_COUNTRY_STATS_CSV,
     GBIF_PUBLISHING_COUNTRY_STATS_CSV,
 )
 from src.utils.data_utils import (
-    add_avg_per_year,
+    add_avg_per_year_windows,
     add_top_x_metric,
     add_totals_column,
     export_to_csv,
+    pivot_counts,
     standardize_column_vals,
-    validate_and_dropna,
 )
 
-
-def make_region_df(occurrences_df: pd.DataFrame, index: list[str]) -> pd.DataFrame:
+# (after_year, before_year) windows for "Avg Per Year" columns, in column order
+# (None leaves that side open, so (None, None) averages over all years)
+REGION_YEAR_WINDOWS = [
+    (None, None),
+    (2020, None),
+    (2010, 2020),
+    (2000, 2010),
+    (None, 2000),
+]
+
+
+def make_region_df(
+    occurrences_df: pd.DataFrame,
+    index: list[str],
+    year_windows: list[tuple] = REGION_YEAR_WINDOWS,
+    count_column: Optional[str] = None,
+) -> pd.DataFrame:
     if not isinstance(index, list):
         raise ValueError("Error, must specify index/indices")
 
-    df = occurrences_df.copy()
-
-    region_counts = df.pivot_table(
-        index=index, columns="month", aggfunc="size", fill_value=0
+    region_counts = pivot_counts(
+        occurrences_df, index=index, columns="month", count_column=count_column
     )
 
     # Preserve month order appearance
@@ -39,110 +60,86 @@ def make_region_df(occurrences_df: pd.DataFrame, index: list[str]) -> pd.DataFra
     )
     region_counts = region_counts.sort_index(axis=1)
 
-    region_counts = add_avg_per_year(
-        source_df=df, target_df=region_counts, groupby=index, before_year=2000
-    )
-    region_counts = add_avg_per_year(
-        source_df=df,
+    region_counts = add_avg_per_year_windows(
+        source_df=occurrences_df,
         target_df=region_counts,
         groupby=index,
-        after_year=2000,
-        before_year=2010,
+        year_windows=year_windows,
+        count_column=count_column,
     )
-    region_counts = add_avg_per_year(
-        source_df=df,
+    region_counts = add_totals_column(
+        source_df=occurrences_df,
         target_df=region_counts,
         groupby=index,
-        after_year=2010,
-        before_year=2020,
-    )
-    region_counts = add_avg_per_year(
-        source_df=df, target_df=region_counts, groupby=index, after_year=2020
-    )
-
-    region_counts = add_avg_per_year(
-        source_df=df, target_df=region_counts, groupby=index
-    )
-    region_counts = add_totals_column(
-        source_df=df, target_df=region_counts, groupby=index
+        count_column=count_column,
     )
 
     return region_counts
 
 
-def make_eventDate_df(occurrences_df: pd.DataFrame, groupby: list[str]) -> pd.DataFrame:
-    if not isinstance(groupby, list):
-        raise ValueError("Error, must specify groupby")
-
-    df = occurrences_df.copy()
-
-    # Oldest & most recent sightings
-    date_min_max = df.groupby(groupby)["eventDate"].agg(["min", "max"])
-
-    date_min_max["Oldest Occurrence"] = date_min_max["min"]
-    date_min_max["Newest Occurrence"] = date_min_max["max"]
-    date_min_max.drop(columns=["min", "max"], inplace=True)
-
-    return date_min_max
-
-
 def make_basisOfRecord_df(
-    occurrences_df: pd.DataFrame, index: list[str]
+    occurrences_df: pd.DataFrame,
+    index: list[str],
+    count_column: Optional[str] = None,
 ) -> pd.DataFrame:
     if not isinstance(index, list):
         raise ValueError("Error, must specify index/indices")
 
-    df = occurrences_df.copy()
-
     df = standardize_column_vals(
-        df,
+        occurrences_df,
         col_name="basisOfRecord",
         valid_vals=["HUMAN_OBSERVATION", "MACHINE_OBSERVATION"],
         fill_val="Other (e.g. specimen sample)",
     )
 
-    basisOfRecord_counts = df.pivot_table(
-        index=index, columns="basisOfRecord", aggfunc="size", fill_value=0
+    basisOfRecord_counts = pivot_counts(
+        df, index=index, columns="basisOfRecord", count_column=count_column
     )
-    basisOfRecord_counts.drop("Other (e.g. specimen sample)", axis=1, inplace=True)
-
-    return basisOfRecord_counts
+    return basisOfRecord_counts.drop(columns="Other (e.g. specimen sample)")
 
 
 def export_country_stats(
-    occurrences_df: pd.DataFrame, make_year_total_df_func, make_unique_sharks_count_func
+    occurrence_cube: OccurrenceCube,
+    make_year_total_df_func,
+    make_unique_sharks_count_func,
 ) -> None:
-    occurrences_df = validate_and_dropna(
-        occurrences_df, na_subset=["countryCode", "country", "eventDate"]
+    occurrence_cube = slice_cube(
+        occurrence_cube, na_subset=["countryCode", "country", "eventDate"]
     )
+    counts = occurrence_cube.counts
 
     # Get data for country, basisOfRecord, eventDate
-    country_counts = make_region_df(occurrences_df, index=["countryCode", "country"])
+    country_counts = make_region_df(
+        counts, index=["countryCode", "country"], count_column=COUNT_COLUMN
+    )
     basisOfRecord_counts = make_basisOfRecord_df(
-        occurrences_df, index=["countryCode", "country"]
+        counts, index=["countryCode", "country"], count_column=COUNT_COLUMN
     )
-    date_min_max = make_eventDate_df(occurrences_df, groupby=["countryCode", "country"])
+    date_min_max = roll_up_event_dates(counts, groupby=["countryCode", "country"])
 
     # Get top 3 publishing countries per country
     country_stats = add_top_x_metric(
-        occurrences_df,
+        counts,
         country_counts,
         groupby=["country"],
         top_x=3,
         metric="publishingCountry",
         column_name="Top 3 Publishing Countries",
+        count_column=COUNT_COLUMN,
     )
 
     # Get count of unique sharks (to compare against total occurrences)
     country_stats = make_unique_sharks_count_func(
-        source_df=occurrences_df,
+        source_df=occurrence_cube.sharks,
         target_df=country_stats,
         groupby=["countryCode", "country"],
     )
 
     # Get total occurrences per year for that country
     country_year_summary = make_year_total_df_func(
-        occurrences_df=occurrences_df, groupby=["countryCode", "country"]
+        occurrences_df=counts,
+        groupby=["countryCode", "country"],
+        count_column=COUNT_COLUMN,
     )
 
     # Merge DataFrames
@@ -163,36 +160,47 @@ def export_country_stats(
 
 
 def export_continent_stats(
-    occurrences_df: pd.DataFrame, make_year_total_df_func, make_unique_sharks_count_func
+    occurrence_cube: OccurrenceCube,
+    make_year_total_df_func,
+    make_unique_sharks_count_func,
 ) -> None:
-    occurrences_df = validate_and_dropna(
-        occurrences_df, na_subset=["continent", "eventDate"]
+    occurrence_cube = slice_cube(
+        occurrence_cube,
+        na_subset=["continent", "eventDate"],
+        exclude={"continent": "Unknown"},
     )
-    occurrences_df = occurrences_df[occurrences_df["continent"] != "Unknown"]
+    counts = occurrence_cube.counts
 
     # Get data for continent, basisOfRecord, eventDate
-    continent_counts = make_region_df(occurrences_df, index=["continent"])
-    basisOfRecord_counts = make_basisOfRecord_df(occurrences_df, index=["continent"])
-    date_min_max = make_eventDate_df(occurrences_df, groupby=["continent"])
+    continent_counts = make_region_df(
+        counts, index=["continent"], count_column=COUNT_COLUMN
+    )
+    basisOfRecord_counts = make_basisOfRecord_df(
+        counts, index=["continent"], count_column=COUNT_COLUMN
+    )
+    date_min_max = roll_up_event_dates(counts, groupby=["continent"])
 
     # Get top 3 publishing countries per continent
     continent_stats = add_top_x_metric(
-        occurrences_df,
+        counts,
         continent_counts,
         groupby=["continent"],
         top_x=3,
         metric="publishingCountry",
         column_name="Top 3 Publishing Countries",
+        count_column=COUNT_COLUMN,
     )
 
     # Get count of unique sharks (to compare against total occurrences)
     continent_stats = make_unique_sharks_count_func(
-        source_df=occurrences_df, target_df=continent_stats, groupby=["continent"]
+        source_df=occurrence_cube.sharks,
+        target_df=continent_stats,
+        groupby=["continent"],
     )
 
     # Get total occurrences per year for that continent
     continent_year_summary = make_year_total_df_func(
-        occurrences_df=occurrences_df, groupby=["continent"]
+        occurrences_df=counts, groupby=["continent"], count_column=COUNT_COLUMN
     )
 
     # Merge DataFrames
@@ -211,45 +219,54 @@ def export_continent_stats(
 
 
 def export_publishingCountry_stats(
-    occurrences_df: pd.DataFrame, make_year_total_df_func, make_unique_sharks_count_func
+    occurrence_cube: OccurrenceCube,
+    make_year_total_df_func,
+    make_unique_sharks_count_func,
 ) -> None:
-    occurrences_df = validate_and_dropna(
-        occurrences_df,
+    occurrence_cube = slice_cube(
+        occurrence_cube,
         na_subset=["publishingCountryCode", "publishingCountry", "eventDate"],
     )
+    counts = occurrence_cube.counts
 
     # Get data for publishingCountry, basisOfRecord, eventDate
     publishingCountry_counts = make_region_df(
-        occurrences_df, index=["publishingCountryCode", "publishingCountry"]
+        counts,
+        index=["publishingCountryCode", "publishingCountry"],
+        count_column=COUNT_COLUMN,
     )
     basisOfRecord_counts = make_basisOfRecord_df(
-        occurrences_df, index=["publishingCountryCode", "publishingCountry"]
+        counts,
+        index=["publishingCountryCode", "publishingCountry"],
+        count_column=COUNT_COLUMN,
     )
-    date_min_max = make_eventDate_df(
-        occurrences_df, groupby=["publishingCountryCode", "publishingCountry"]
+    date_min_max = roll_up_event_dates(
+        counts, groupby=["publishingCountryCode", "publishingCountry"]
     )
 
     # Get top 3 visited / surveyed countries per publishingCountry
     publishingCountry_stats = add_top_x_metric(
-        occurrences_df,
+        counts,
         publishingCountry_counts,
         groupby=["publishingCountry"],
         top_x=3,
         metric="country",
         column_name="Top 3 Countries Visited",
+        count_column=COUNT_COLUMN,
     )
 
     # Get count of unique sharks (to compare against total occurrences)
     publishingCountry_stats = make_unique_sharks_count_func(
-        source_df=occurrences_df,
+        source_df=occurrence_cube.sharks,
         target_df=publishingCountry_stats,
         groupby=["publishingCountryCode", "publishingCountry"],
     )
 
     # Get total occurrences per year for that publishingCountry
     publishingCountry_year_summary = make_year_total_df_func(
-        occurrences_df=occurrences_df,
+        occurrences_df=counts,
         groupby=["publishingCountryCode", "publishingCountry"],
+        count_column=COUNT_COLUMN,
     )
 
     # Merge DataFrames
@@ -5,23 +5,28 @@
 ###############################################################################
 
 
+from typing import Optional
+
 import pandas as pd
 
 from src.config import MONTH_NAMES
+from src.gbif.analyze_cube import COUNT_COLUMN, OccurrenceCube, slice_cube
 from src.gbif.constants import GBIF_CALENDAR_STATS_CSV
 from src.utils.data_utils import (
     add_top_x_metric,
     add_totals_column,
+    count_rows,
     export_to_csv,
-    validate_and_dropna,
+    format_columns,
+    pivot_counts,
 )
 
 
-def make_calendar_df(occurrences_df: pd.DataFrame) -> pd.DataFrame:
-    df = occurrences_df.copy()
-
-    calendar_counts = df.pivot_table(
-        index="year", columns="month", aggfunc="size", fill_value=0
+def make_calendar_df(
+    occurrences_df: pd.DataFrame, count_column: Optional[str] = None
+) -> pd.DataFrame:
+    calendar_counts = pivot_counts(
+        occurrences_df, index=["year"], columns="month", count_column=count_column
     )
 
     # Preserve month order appearance
@@ -31,58 +36,67 @@ def make_calendar_df(occurrences_df: pd.DataFrame) -> pd.DataFrame:
     calendar_counts = calendar_counts.sort_index(axis=1)
 
     calendar_counts = add_totals_column(
-        source_df=df, target_df=calendar_counts, groupby=["year"]
+        source_df=occurrences_df,
+        target_df=calendar_counts,
+        groupby=["year"],
+        count_column=count_column,
     )
     return calendar_counts
 
 
 def make_year_total_df(
-    occurrences_df: pd.DataFrame, groupby: list[str]
+    occurrences_df: pd.DataFrame,
+    groupby: list[str],
+    count_column: Optional[str] = None,
 ) -> pd.DataFrame:
     occurrences_df = occurrences_df.dropna(subset=["year"])
-    counts = occurrences_df.groupby(groupby + ["year"]).size().reset_index(name="count")
+    counts = count_rows(occurrences_df, groupby + ["year"], count_column).reset_index(
+        name="count"
+    )
 
     # Get str of total counts per year for given metric, e.g. "56 (2017), 39 (2021)"
+    # Format every (metric, year) cell once, then join each group in year order
+    counts = counts.sort_values("year", kind="stable")
+    counts["occurrences (year)"] = format_columns(
+        [counts["count"], counts["year"].astype(int)], "{0} ({1})"
+    )
     year_counts = (
-        counts.sort_values("year")
-        .groupby(groupby)
-        .apply(
-            lambda x: ", ".join(
-                f"{row['count']} ({int(row['year'])})" for _, row in x.iterrows()
-            ),
-            include_groups=False,
-        )
-        .reset_index(name="occurrences (year)")
+        counts.groupby(groupby, observed=True)["occurrences (year)"]
+        .agg(", ".join)
+        .reset_index()
     )
     return year_counts
 
 
 def export_calendar_stats(
-    occurrences_df: pd.DataFrame,
+    occurrence_cube: OccurrenceCube,
     sex_counts: pd.DataFrame,
     life_stage_counts: pd.DataFrame,
     basisOfRecord_counts: pd.DataFrame,
     make_unique_sharks_count_func,
 ) -> None:
-    # Copy after dropping null so pandas doesn't warn about df.loc[:,] vs df[]
-    occurrences_df = validate_and_dropna(occurrences_df, ["year", "month"])
+    # Roll up only the cube cells with a year & month
+    occurrence_cube = slice_cube(occurrence_cube, na_subset=["year", "month"])
 
     # Get data for calendar
-    calendar_counts = make_calendar_df(occurrences_df)
+    calendar_counts = make_calendar_df(
+        occurrence_cube.counts, count_column=COUNT_COLUMN
+    )
 
     # Get top 3 publishing countries per year
     calendar_stats = add_top_x_metric(
-        occurrences_df,
+        occurrence_cube.counts,
         calendar_counts,
         groupby=["year"],
         top_x=3,
         metric="publishingCountry",
         column_name="Top 3 Publishing Countries",
+        count_column=COUNT_COLUMN,
     )
 
     # Get count of unique sharks (to compare against total occurrences)
     calendar_stats = make_unique_sharks_count_func(
-        source_df=occurrences_df, target_df=calendar_stats, groupby=["year"]
+        source_df=occurrence_cube.sharks, target_df=calendar_stats, groupby=["year"]
     )
 
     # Merge DataFrames
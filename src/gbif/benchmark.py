@@ -0,0 +1,235 @@
+###############################################################################
+##  `benchmark.py`                                                           ##
+##                                                                           ##
+##  Purpose: Micro-benchmarks for GBIF clean / analysis hot paths, run on    ##
+##           synthetic records (no network or real data needed)              ##
+###############################################################################
+
+
+import random
+import time
+from itertools import cycle, islice
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.gbif.analyze_time import make_year_total_df
+from src.gbif.clean import (
+    OCCURRENCE_RESULT_FIELDS,
+)
+from src.utils.api_utils import (
+    find_field,
+    find_fields,
+)
+
+# Distinct synthetic records generated, then cycled up to requested count
+# (keeps memory flat for 1M+ record runs)
+SYNTHETIC_POOL_SIZE = 1_000
+
+BENCHMARK_SEED = 42
+
+# Fields GBIF often leaves off a record entirely (so lookups must search nested)
+SOMETIMES_MISSING_FIELDS = [
+    "sex",
+    "lifeStage",
+    "dateIdentified",
+    "organismID",
+    "identificationID",
+    "occurrenceRemarks",
+    "projectId",
+    "identifiedBy",
+    "verbatimLocality",
+    "eventID",
+    "catalogNumber",
+]
+
+
+# Year totals: synthetic (metric, year) count cells, e.g. country x year
+YEAR_TOTAL_GROUPS = 2_000
+YEAR_TOTAL_YEARS = list(range(1990, 2026))
+
+
+def make_synthetic_occurrence(rng: random.Random, key: int) -> dict:
+    # Roughly the shape of an occurrence/search result (incl. nested lists)
+    occurrence = {
+        field: f"{field}-{rng.randint(0, 50)}" for field in OCCURRENCE_RESULT_FIELDS
+    }
+    occurrence.update(
+        {
+            "key": key,
+            "decimalLatitude": rng.uniform(-30, 30),
+            "decimalLongitude": rng.uniform(-180, 180),
+            "year": rng.randint(1990, 2025),
+            "month": rng.randint(1, 12),
+            "day": rng.randint(1, 28),
+            "issues": ["COORDINATE_ROUNDED", "GEODETIC_DATUM_ASSUMED_WGS84"],
+            "extensions": {},
+            "gadm": {
+                f"level{level}": {"gid": f"GID.{level}", "name": f"Region {level}"}
+                for level in range(3)
+            },
+            "identifiers": [{"identifier": f"urn:{key}"}],
+            "facts": [],
+            "relations": [],
+            "media": [
+                {
+                    "type": "StillImage",
+                    "format": "image/jpeg",
+                    "identifier": f"https://example.org/{key}/{i}.jpg",
+                    "references": f"https://example.org/{key}",
+                    "created": "2020-01-01T00:00:00",
+                    "creator": "Observer",
+                    "license": "http://creativecommons.org/licenses/by-nc/4.0/",
+                    "rightsHolder": "Observer",
+                }
+                for i in range(rng.randint(0, 4))
+            ],
+        }
+    )
+    occurrence.update({f"extraField{i}": rng.random() for i in range(40)})
+
+    for field in SOMETIMES_MISSING_FIELDS:
+        if rng.random() < 0.5:
+            del occurrence[field]
+
+    return occurrence
+
+
+def iter_synthetic_occurrences(n_records: int) -> Iterable[dict]:
+    rng = random.Random(BENCHMARK_SEED)
+    pool = [make_synthetic_occurrence(rng, key) for key in range(SYNTHETIC_POOL_SIZE)]
+    return islice(cycle(pool), n_records)
+
+
+def time_call(label: str, func: Callable, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+
+    print(f"{label}: {elapsed:.2f}s")
+    return result, elapsed
+
+
+#####
+## Field extraction: recursive find_field vs single-pass find_fields
+#####
+
+
+def extract_with_find_field(occurrences: Iterable[dict], fields: list) -> int:
+    count = 0
+    for occurrence in occurrences:
+        _ = {field: find_field(occurrence, field) for field in fields}
+        count += 1
+    return count
+
+
+def extract_with_find_fields(occurrences: Iterable[dict], fields: list) -> int:
+    count = 0
+    for occurrence in occurrences:
+        _ = find_fields(occurrence, fields)
+        count += 1
+    return count
+
+
+def benchmark_field_extraction(
+    n_records: int = 1_000_000, fields: list = OCCURRENCE_RESULT_FIELDS
+) -> dict:
+    # Both must agree exactly before speed means anything
+    for occurrence in iter_synthetic_occurrences(SYNTHETIC_POOL_SIZE):
+        expected = {field: find_field(occurrence, field) for field in fields}
+        if find_fields(occurrence, fields) != expected:
+            raise RuntimeError(f"Error, extractors disagree on key {occurrence['key']}")
+
+    print(f"Extracting {len(fields)} fields from {n_records:,} synthetic records")
+
+    _, baseline = time_call(
+        "find_field (per field)",
+        extract_with_find_field,
+        iter_synthetic_occurrences(n_records),
+        fields,
+    )
+    _, single_pass = time_call(
+        "find_fields (single pass)",
+        extract_with_find_fields,
+        iter_synthetic_occurrences(n_records),
+        fields,
+    )
+
+    print(f"Speedup: {baseline / single_pass:.1f}x")
+    return {"find_field": baseline, "find_fields": single_pass}
+
+
+#####
+## Year totals: iterrows per group vs column-wise format & join
+#####
+
+
+def make_year_total_df_iterrows(
+    occurrences_df: pd.DataFrame,
+    groupby: list[str],
+    count_column: Optional[str] = None,
+) -> pd.DataFrame:
+    # Previous make_year_total_df, kept as the baseline to compare against
+    occurrences_df = occurrences_df.dropna(subset=["year"])
+    counts = (
+        occurrences_df.groupby(groupby + ["year"], observed=True)[count_column]
+        .sum()
+        .reset_index(name="count")
+    )
+
+    return (
+        counts.sort_values("year")
+        .groupby(groupby, observed=True)
+        .apply(
+            lambda x: ", ".join(
+                f"{row['count']} ({int(row['year'])})" for _, row in x.iterrows()
+            ),
+            include_groups=False,
+        )
+        .reset_index(name="occurrences (year)")
+    )
+
+
+def make_synthetic_year_counts(n_groups: int) -> pd.DataFrame:
+    # Cube-like cells: most groups seen in most (but not all) years
+    rng = np.random.default_rng(BENCHMARK_SEED)
+    cells = pd.MultiIndex.from_product(
+        [[f"Country {i}" for i in range(n_groups)], YEAR_TOTAL_YEARS],
+        names=["country", "year"],
+    ).to_frame(index=False)
+    cells["count"] = rng.integers(1, 500, size=len(cells))
+
+    return cells[rng.random(len(cells)) < 0.8].reset_index(drop=True)
+
+
+def benchmark_year_totals(n_groups: int = YEAR_TOTAL_GROUPS) -> dict:
+    year_counts = make_synthetic_year_counts(n_groups)
+    print(f"Year totals for {len(year_counts):,} (country, year) cells")
+
+    baseline_df, baseline = time_call(
+        "make_year_total_df (iterrows)",
+        make_year_total_df_iterrows,
+        year_counts,
+        groupby=["country"],
+        count_column="count",
+    )
+    vectorized_df, vectorized = time_call(
+        "make_year_total_df (vectorized)",
+        make_year_total_df,
+        year_counts,
+        groupby=["country"],
+        count_column="count",
+    )
+
+    # Both must agree exactly for speed to mean anything
+    if not vectorized_df.equals(baseline_df):
+        raise RuntimeError("Error, year totals disagree")
+
+    print(f"Speedup: {baseline / vectorized:.1f}x")
+    return {"iterrows": baseline, "vectorized": vectorized}
+
+
+if __name__ == "__main__":
+    benchmark_field_extraction()
+    benchmark_year_totals()
@@ -5,25 +5,60 @@
 ###############################################################################
 
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from typing import Iterable, Iterator, Literal, Optional
+
 import pandas as pd
 
 from src.config import (
     MONTH_NAMES,
-    convert_country_to_continent,
-    convert_ISO_code_to_country,
+)
+from src.gbif.clean_store import (
+    FINGERPRINT_COLUMN,
+    add_row_fingerprints,
+    apply_clean_schema,
+    export_clean_store,
 )
 from src.gbif.constants import (
-    GBIF_CLEAN_CSV,
     GBIF_MEDIA_CSV,
+    GBIF_RAW_JSONL,
+    GBIF_STORE_DB,
 )
 from src.gbif.fetch import (
-    get_all_occurrences_raw,
+    stream_occurrences_raw,
+)
+from src.gbif.fetch_download import (
+    stream_download_occurrences_raw,
+)
+from src.gbif.fetch_partitioned import (
+    stream_partitioned_occurrences_raw,
+)
+from src.gbif.fetch_sync import (
+    sync_occurrences_raw,
+)
+from src.gbif.store import (
+    connect_store,
+    get_occurrences_to_clean,
+    load_clean_occurrences,
+    replace_clean_rows,
 )
 from src.utils.data_utils import (
     export_to_csv,
     extract_relevant_fields,
+    map_unique_values,
     move_column_after,
+    read_jsonl,
     standardize_column_vals,
+    stringify_nested_values,
+)
+from src.utils.executor_utils import (
+    iter_ordered_results,
+)
+from src.utils.geography_utils import (
+    lookup_continents,
+    lookup_country_names,
 )
 
 OCCURRENCE_RESULT_FIELDS = [
@@ -64,6 +99,11 @@ OCCURRENCE_RESULT_FIELDS = [
     "catalogNumber",
 ]
 
+# Row blocks cleaned per worker process (big enough that pickling a block is
+# cheap next to cleaning it); smaller inputs are just cleaned in-process
+CLEAN_CHUNK_SIZE = 50_000
+CLEAN_WORKERS = os.cpu_count() or 1
+
 MEDIA_RELEVANT_FIELDS = [
     "key",
     "occurrenceID",
@@ -79,45 +119,109 @@ MEDIA_RELEVANT_FIELDS = [
 #####
 
 
-def get_all_extracted_occurrences() -> list:
-    extracted_occurrences = []
+def get_all_extracted_occurrences(
+    source: Literal["search", "partitioned", "download"] = "search",
+) -> Iterator[dict]:
+    if source not in {"search", "partitioned", "download"}:
+        raise ValueError("Error, source must be 'search', 'partitioned' or 'download'")
+
+    # Stream raw records to disk as they arrive, then re-read lazily, so
+    # records are only ever held a chunk at a time (see build_occurrences_df).
+    # Download archives are already flat, so only the fields we need are kept
+    if source == "download":
+        stream_download_occurrences_raw(GBIF_RAW_JSONL, fields=OCCURRENCE_RESULT_FIELDS)
+        return read_jsonl(GBIF_RAW_JSONL)
+
+    # Partitioned harvesting scales past the search API's 100k offset cap
+    if source == "partitioned":
+        stream_partitioned_occurrences_raw(GBIF_RAW_JSONL)
+    else:
+        stream_occurrences_raw(GBIF_RAW_JSONL)
+
+    return (
+        extract_relevant_fields(occurrence, OCCURRENCE_RESULT_FIELDS)
+        for occurrence in read_jsonl(GBIF_RAW_JSONL)
+    )
+
 
-    # Returns array of dicts (also exports raw dataset in process)
-    raw_occurrences = get_all_occurrences_raw()
+def build_occurrences_df(
+    occurrences: Iterable[dict], chunk_size: int = CLEAN_CHUNK_SIZE
+) -> pd.DataFrame:
+    # Records become (untyped) columns a chunk at a time, so only one chunk of
+    # dicts is ever held; dtypes are inferred once at the end, over all rows,
+    # so they match building the frame from one big list
+    occurrences = iter(occurrences)
+    chunk_dfs = []
 
-    for occurrence in raw_occurrences:
-        # Returns list, which we then append
-        extracted_data = extract_relevant_fields(occurrence, OCCURRENCE_RESULT_FIELDS)
-        extracted_occurrences.append(extracted_data)
+    while chunk := list(islice(occurrences, chunk_size)):
+        chunk_dfs.append(pd.DataFrame(chunk, dtype=object))
 
-    return extracted_occurrences
+    if not chunk_dfs:
+        return pd.DataFrame()
 
+    # Align every chunk to all columns (first-seen order) before concat, since
+    # concat fills an all-null chunk of a missing column with NaN (not None)
+    columns = list(dict.fromkeys(chain.from_iterable(df.columns for df in chunk_dfs)))
+    chunk_dfs = [df.reindex(columns=columns).astype(object) for df in chunk_dfs]
 
-def export_gbif_occurrences() -> pd.DataFrame:
-    all_occurrences = get_all_extracted_occurrences()
+    return pd.concat(chunk_dfs, ignore_index=True).infer_objects()
 
-    if not all_occurrences:
-        raise ValueError("Error: No occurrences to export")
 
-    occurrences_df = pd.DataFrame(all_occurrences)
+def clean_occurrences(all_occurrences: Iterable[dict]) -> pd.DataFrame:
+    occurrences_df = build_occurrences_df(all_occurrences)
 
-    # Convert any unhashable types (lists, dicts) to strings for duplicate detection,
-    # but preserve media column so it can be exploded after cleaning
+    # Convert any unhashable values (lists, dicts) to strings for duplicate
+    # detection, but preserve media column so it can be exploded after cleaning.
+    # Done per value (not per column) so a row cleans the same in any batch,
+    # & only columns actually holding such values are rewritten
     for col in occurrences_df.columns:
-        if (
-            col != "media"
-            and occurrences_df[col].apply(lambda x: isinstance(x, (list, dict))).any()
-        ):
-            occurrences_df[col] = occurrences_df[col].astype(str)
-
-    occurrences_df = refactor_field_values(occurrences_df)
-
-    non_media_cols = [c for c in occurrences_df.columns if c != "media"]
-    print(
-        "Number of duplicate rows to drop (all columns):",
-        occurrences_df.duplicated(subset=non_media_cols).sum(),
+        if col == "media":
+            continue
+
+        column = occurrences_df[col]
+        stringified = stringify_nested_values(column)
+        if stringified is not column:
+            occurrences_df[col] = stringified
+
+    return refactor_field_values_chunked(occurrences_df)
+
+
+def build_media_table(media_source: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per image: the occurrence's (non-media) fields, then one column
+    per media dict key (first-seen order, NaN where an image lacks that key).
+
+    Flattens all media dicts in a single pass & builds the frame from plain
+    lists, rather than exploding then creating a Series per image dict.
+    """
+    source_positions = []
+    media_items = []
+
+    for position, media in enumerate(media_source["media"].to_numpy()):
+        # Lists hold one dict per image (None / NaN / [] mean no images)
+        for item in media if isinstance(media, list) else [media]:
+            if isinstance(item, dict):
+                source_positions.append(position)
+                media_items.append(item)
+
+    parent_df = (
+        media_source.drop(columns=["media"])
+        .iloc[source_positions]
+        .reset_index(drop=True)
     )
-    occurrences_df.drop_duplicates(subset=non_media_cols, inplace=True)
+    media_fields_df = pd.DataFrame.from_records(media_items)
+
+    return pd.concat([parent_df, media_fields_df], axis=1)
+
+
+def export_clean_occurrences(occurrences_df: pd.DataFrame) -> pd.DataFrame:
+    # Duplicates (all columns but media) are found on 1 integer fingerprint
+    # column, rather than comparing every object column row by row
+    occurrences_df = add_row_fingerprints(apply_clean_schema(occurrences_df))
+    is_duplicate = occurrences_df[FINGERPRINT_COLUMN].duplicated()
+
+    print("Number of duplicate rows to drop (all columns):", is_duplicate.sum())
+    occurrences_df = occurrences_df[~is_duplicate]
 
     # Derive media CSV from cleaned occurrences (whaleSharkID already fully populated)
     if "media" in occurrences_df.columns:
@@ -125,21 +229,66 @@ def export_gbif_occurrences() -> pd.DataFrame:
             [c for c in MEDIA_RELEVANT_FIELDS if c in occurrences_df.columns]
         ].drop_duplicates(subset=["key"])
 
-        media_rows = media_source.explode("media").dropna(subset=["media"])
-        media_df = pd.concat(
-            [media_rows.drop("media", axis=1), media_rows["media"].apply(pd.Series)],
-            axis=1,
-        ).reset_index(drop=True)
+        media_df = build_media_table(media_source)
 
         occurrences_df = occurrences_df.drop(columns=["media"])
 
         if not media_df.empty:
             export_to_csv(GBIF_MEDIA_CSV, media_df)
 
-    export_to_csv(GBIF_CLEAN_CSV, occurrences_df)
+    # Typed Parquet store (categoricals, nullable ints, string IDs)
+    occurrences_df = export_clean_store(occurrences_df)
     return occurrences_df
 
 
+def export_gbif_occurrences(
+    source: Literal["search", "partitioned", "download"] = "search",
+) -> pd.DataFrame:
+    all_occurrences = get_all_extracted_occurrences(source=source)
+
+    first_occurrence = next(all_occurrences, None)
+    if first_occurrence is None:
+        raise ValueError("Error: No occurrences to export")
+
+    occurrences_df = clean_occurrences(chain([first_occurrence], all_occurrences))
+    return export_clean_occurrences(occurrences_df)
+
+
+def sync_gbif_occurrences(
+    db_file: str = GBIF_STORE_DB, full: bool = False
+) -> pd.DataFrame:
+    # Fetch & upsert only records changed since last sync
+    sync_occurrences_raw(db_file=db_file, full=full)
+
+    conn = connect_store(db_file)
+
+    try:
+        # Re-clean just the new / changed records, then reassemble from store
+        to_clean = get_occurrences_to_clean(conn)
+
+        if to_clean:
+            extracted_occurrences = [
+                extract_relevant_fields(occurrence, OCCURRENCE_RESULT_FIELDS)
+                for occurrence in to_clean
+            ]
+            replace_clean_rows(
+                conn,
+                keys=[occurrence["key"] for occurrence in to_clean],
+                clean_df=clean_occurrences(extracted_occurrences),
+            )
+        print(f"Re-cleaned {len(to_clean)} changed records")
+
+        occurrences_df = load_clean_occurrences(conn)
+
+    finally:
+        conn.close()
+
+    if occurrences_df.empty:
+        raise ValueError("Error: No occurrences to export")
+
+    return export_clean_occurrences(occurrences_df)
+
+
 #####
 ## Format & standardize DataFrames
 #####
@@ -149,22 +298,39 @@ def format_continents(occurrences_df: pd.DataFrame) -> pd.DataFrame:
     if not isinstance(occurrences_df, pd.DataFrame):
         raise ValueError("Error, must specify occurrences_df")
 
-    def standardize_continent(row: pd.Series) -> str:
-        raw_continent = (row.get("continent") or "").strip()
+    index = occurrences_df.index
+    empty_column = pd.Series(None, index=index, dtype=object)
 
-        if raw_continent:
-            # Standardize (e.g. NORTH_AMERICA -> North America)
-            clean = raw_continent.replace("_", " ").title()
-            return clean
+    def standardize_continent(raw_continent) -> Optional[str]:
+        raw_continent = raw_continent.strip() if isinstance(raw_continent, str) else ""
 
-        # Step 2: Try using the 'country' field
-        country = (row.get("country") or "").strip()
-        if country:
-            return convert_country_to_continent(country)
+        # Standardize (e.g. NORTH_AMERICA -> North America)
+        return raw_continent.replace("_", " ").title() if raw_continent else None
 
-        return "Unknown"
+    # Step 1: Use 'continent' field (mapped per unique value, not per row)
+    continents = pd.Series(
+        map_unique_values(
+            occurrences_df.get("continent", empty_column), standardize_continent
+        ),
+        index=index,
+    )
 
-    occurrences_df["continent"] = occurrences_df.apply(standardize_continent, axis=1)
+    # Step 2: Otherwise try using the 'country' field (via cached lookup table)
+    countries = pd.Series(
+        map_unique_values(
+            occurrences_df.get("country", empty_column),
+            lambda country: country.strip() if isinstance(country, str) else "",
+        ),
+        index=index,
+    )
+    country_continents = lookup_continents(
+        country for country in countries.unique() if country
+    )
+    country_continents[""] = "Unknown"
+
+    occurrences_df["continent"] = continents.where(
+        continents.notna(), countries.map(country_continents)
+    )
     return occurrences_df
 
 
@@ -172,21 +338,26 @@ def map_codes_to_countries(occurrences_df: pd.DataFrame, code_column: str) -> di
     if not isinstance(code_column, str):
         raise ValueError("Error, must specify code_column")
 
-    # Get unique codes in occurrences, then populate map via country_converter
+    # Get unique codes in occurrences, then populate map via cached lookup table
     unique_codes = occurrences_df[code_column].dropna().unique()
-    country_mappings = {
-        code: convert_ISO_code_to_country(code) for code in unique_codes
-    }
+    country_mappings = lookup_country_names(unique_codes)
 
     return country_mappings
 
 
+def apply_country_mappings(codes: pd.Series, country_mappings: dict) -> pd.Series:
+    # Same as codes.replace(country_mappings) (unmapped values kept), but hashed
+    return codes.map(country_mappings).where(codes.isin(country_mappings), codes)
+
+
 def format_country_names(occurrences_df: pd.DataFrame) -> pd.DataFrame:
     if not isinstance(occurrences_df, pd.DataFrame):
         raise ValueError("Error, must specify occurrences_df")
 
     country_mappings = map_codes_to_countries(occurrences_df, code_column="countryCode")
-    occurrences_df["country"] = occurrences_df["countryCode"].replace(country_mappings)
+    occurrences_df["country"] = apply_country_mappings(
+        occurrences_df["countryCode"], country_mappings
+    )
 
     return occurrences_df
 
@@ -202,9 +373,9 @@ def format_publishingCountry(occurrences_df: pd.DataFrame) -> pd.DataFrame:
         occurrences_df, code_column="publishingCountryCode"
     )
 
-    occurrences_df["publishingCountry"] = occurrences_df[
-        "publishingCountryCode"
-    ].replace(country_mappings)
+    occurrences_df["publishingCountry"] = apply_country_mappings(
+        occurrences_df["publishingCountryCode"], country_mappings
+    )
     occurrences_df = move_column_after(
         occurrences_df,
         col_to_move="publishingCountry",
@@ -256,11 +427,10 @@ def format_sex_lifeStage(occurrences_df: pd.DataFrame) -> pd.DataFrame:
     return occurrences_df
 
 
-def fill_whaleshark_id_from_fallbacks(df: pd.DataFrame) -> pd.DataFrame:
-    # Called after whaleSharkID is built from organismID / identificationID.
-    # Only fills rows where whaleSharkID is still null (standard fields take priority).
-
-    null_id = df["whaleSharkID"].isna()
+def get_fallback_shark_IDs(df: pd.DataFrame) -> pd.Series:
+    # Per record shark ID from remarks / eventID, only used where organismID &
+    # identificationID give none (standard fields take priority)
+    fallback_ids = pd.Series(pd.NA, index=df.index, dtype=object)
 
     # Rule 1: occurrenceRemarks = "Shark ID: {X}"
     # Strict match: free-text fields risk false positives with looser
@@ -282,9 +452,8 @@ def fill_whaleshark_id_from_fallbacks(df: pd.DataFrame) -> pd.DataFrame:
             regex=True,
         )
 
-        fill = null_id & extracted.notna()
-        df.loc[fill, "whaleSharkID"] = extracted[fill]
-        null_id = df["whaleSharkID"].isna()
+        fill = fallback_ids.isna() & extracted.notna()
+        fallback_ids[fill] = extracted[fill]
 
     # Rule 2: eventID prefix "{sharkID}-track-{N}"
     # The "-track-" keyword is semantically specific to individual animal deployments,
@@ -295,43 +464,86 @@ def fill_whaleshark_id_from_fallbacks(df: pd.DataFrame) -> pd.DataFrame:
         extracted = (
             df["eventID"].str.extract(r"^(.+?)-track-", expand=False).str.strip()
         )
-        fill = null_id & extracted.notna()
-        df.loc[fill, "whaleSharkID"] = extracted[fill]
+        fill = fallback_ids.isna() & extracted.notna()
+        fallback_ids[fill] = extracted[fill]
 
-    return df
+    return fallback_ids
+
+
+def clean_shark_IDs(ids: pd.Series) -> pd.Series:
+    # Remove any spaces or weird formatting chars, e.g. "{" (";" still
+    # separates multiple sharks)
+    return ids.fillna("").astype(str).str.replace(r"[{} ]", "", regex=True)
+
+
+def resolve_shark_IDs(
+    organism_ids: list[str], identification_ids: list[str], fallback_id
+) -> list[tuple]:
+    # One (organismID, identificationID, whaleSharkID) per distinct shark, in
+    # the order pairing every organismID with every identificationID would
+    # first produce it. organismID wins, then identificationID, then fallback
+    resolved = {}
+
+    for organism_id in organism_ids:
+        for identification_id in identification_ids:
+            shark_id = organism_id or identification_id or fallback_id
+
+            if shark_id not in resolved:
+                resolved[shark_id] = (
+                    organism_id or pd.NA,
+                    identification_id or pd.NA,
+                    shark_id,
+                )
+
+    return list(resolved.values())
 
 
 def format_individual_shark_IDs(occurrences_df: pd.DataFrame) -> pd.DataFrame:
     # Work with copy to satisfy pandas DataFrame slice concerns
     df = occurrences_df.copy()
 
-    # Split entries with multiple IDs (multiple sharks) into separate rows
-    df["organismID"] = df["organismID"].fillna("").astype(str).str.split(";")
-    df = df.explode("organismID")
+    organism_ids = clean_shark_IDs(df["organismID"])
+    identification_ids = clean_shark_IDs(df["identificationID"])
 
-    # Remove any spaces or weird formatting chars, e.g. "{"
-    df["organismID"] = df["organismID"].str.replace(r"[{} ]", "", regex=True)
+    # If organismID / identificationID are both empty, fall back to remarks /
+    # eventID. Note that this will almost certainly be telemetry data from
+    # satellite tracking, with minimal info beyond timestamps & coords
+    fallback_ids = get_fallback_shark_IDs(df)
 
-    # Repeat with identificationID field (just to be safe)
-    df["identificationID"] = (
-        df["identificationID"].fillna("").astype(str).str.split(";")
-    )
-    df = df.explode("identificationID")
-    df["identificationID"] = df["identificationID"].str.replace(
-        r"[{} ]", "", regex=True
+    # Single-ID records (nearly all) resolve column-wise: empty strings become
+    # NA so combine_first works, then organismID > identificationID > fallback
+    df["organismID"] = organism_ids.where(organism_ids != "", pd.NA)
+    df["identificationID"] = identification_ids.where(identification_ids != "", pd.NA)
+    df["whaleSharkID"] = (
+        df["organismID"].combine_first(df["identificationID"]).fillna(fallback_ids)
     )
 
-    # Replace empty strings with NaN so combine_first works
-    df.replace({"organismID": {"": pd.NA}}, inplace=True)
-    df.replace({"identificationID": {"": pd.NA}}, inplace=True)
-
-    # Consolidate organismID / identificationID into 1 column (whaleSharkID)
-    df["whaleSharkID"] = df["organismID"].combine_first(df["identificationID"])
+    # Entries with multiple IDs (multiple sharks) get 1 row per distinct shark,
+    # rather than 1 row per organismID x identificationID pair
+    is_multi_id = organism_ids.str.contains(";", regex=False) | (
+        identification_ids.str.contains(";", regex=False)
+    )
 
-    # If whaleSharkID is still null, fall back to remarks / eventID
-    # Note that this will almost certainly be telemetry data from satellite tracking,
-    # with minimal info beyond timestamps & coords (i.e. limited metadata)
-    df = fill_whaleshark_id_from_fallbacks(df)
+    if is_multi_id.any():
+        resolved = [
+            resolve_shark_IDs(organism_id.split(";"), identification_id.split(";"), fb)
+            for organism_id, identification_id, fb in zip(
+                organism_ids[is_multi_id],
+                identification_ids[is_multi_id],
+                fallback_ids[is_multi_id],
+            )
+        ]
+
+        id_columns = ["organismID", "identificationID", "whaleSharkID"]
+        for position, column in enumerate(id_columns):
+            df.loc[is_multi_id, column] = pd.Series(
+                [[ids[position] for ids in shark_ids] for shark_ids in resolved],
+                index=df.index[is_multi_id],
+                dtype=object,
+            )
+
+        # Single explode, only ever as many rows as distinct sharks
+        df = df.explode(id_columns)
 
     df = move_column_after(df, col_to_move="whaleSharkID", after_col="identificationID")
 
@@ -356,5 +568,38 @@ def refactor_field_values(occurrences_df: pd.DataFrame) -> pd.DataFrame:
     return occurrences_df
 
 
+def refactor_field_values_chunked(
+    occurrences_df: pd.DataFrame,
+    max_workers: int = CLEAN_WORKERS,
+    chunk_size: int = CLEAN_CHUNK_SIZE,
+) -> pd.DataFrame:
+    if not isinstance(occurrences_df, pd.DataFrame):
+        raise ValueError("Error, must specify occurrences_df")
+
+    if max_workers < 1 or chunk_size < 1:
+        raise ValueError("Error, max_workers & chunk_size must be positive")
+
+    if max_workers == 1 or len(occurrences_df) <= chunk_size:
+        return refactor_field_values(occurrences_df)
+
+    # Every normalizer works row by row, so blocks can be cleaned independently.
+    # Blocks are sliced from the full frame (not rebuilt from raw records), so
+    # each keeps the full frame's dtypes & cleans exactly as it would in-process
+    chunks = (
+        occurrences_df.iloc[start : start + chunk_size]
+        for start in range(0, len(occurrences_df), chunk_size)
+    )
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        cleaned_chunks = list(
+            iter_ordered_results(
+                executor, refactor_field_values, chunks, window=2 * max_workers
+            )
+        )
+
+    # Blocks come back in original order (IDs exploded within each block)
+    return pd.concat(cleaned_chunks, ignore_index=True)
+
+
 if __name__ == "__main__":
     occurrences_df = export_gbif_occurrences()
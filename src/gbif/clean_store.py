@@ -0,0 +1,142 @@
+###############################################################################
+##  `clean_store.py`                                                         ##
+##                                                                           ##
+##  Purpose: Typed schema for the cleaned occurrence table, persisted as     ##
+##           Parquet so consumers load only the columns they need            ##
+###############################################################################
+
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.gbif.constants import (
+    GBIF_CLEAN_PARQUET,
+)
+from src.utils.data_utils import (
+    export_to_parquet,
+    hash_rows,
+    read_parquet,
+)
+
+# Text stays text (IDs like "0123" or "101376a" never get re-cast to numbers),
+# with NaN for missing values, same as object columns read from CSV
+STRING_DTYPE = pd.StringDtype("pyarrow", na_value=np.nan)
+
+# Low-cardinality labels repeated across every row
+CATEGORY_COLUMNS = ["country", "continent", "basisOfRecord", "sex", "lifeStage"]
+
+# Nullable ints, so missing years / days don't turn into floats (e.g. 2019.0)
+INT_COLUMNS = ["key", "year", "day"]
+
+FLOAT_COLUMNS = ["decimalLatitude", "decimalLongitude", "coordinateUncertaintyInMeters"]
+
+# Stable 64-bit hash of each cleaned row (all fields but media), kept in the
+# store so later exports can tell which rows actually changed
+FINGERPRINT_COLUMN = "rowFingerprint"
+
+STRING_COLUMNS = [
+    "datasetKey",
+    "publishingOrgKey",
+    "publishingCountryCode",
+    "publishingCountry",
+    "dateIdentified",
+    "stateProvince",
+    "month",
+    "eventDate",
+    "countryCode",
+    "gbifRegion",
+    "collectionCode",
+    "verbatimLocality",
+    "occurrenceID",
+    "organismID",
+    "identificationID",
+    "whaleSharkID",
+    "occurrenceRemarks",
+    "projectId",
+    "recordedBy",
+    "identifiedBy",
+    "locality",
+    "verbatimEventDate",
+    "eventID",
+    "catalogNumber",
+]
+
+CLEAN_OCCURRENCE_SCHEMA = {
+    **{column: "category" for column in CATEGORY_COLUMNS},
+    **{column: "Int64" for column in INT_COLUMNS},
+    **{column: "float64" for column in FLOAT_COLUMNS},
+    **{column: STRING_DTYPE for column in STRING_COLUMNS},
+    FINGERPRINT_COLUMN: "uint64",
+}
+
+# Columns needed per consumer (see read_clean_occurrences)
+EXCLUSION_MAP_COLUMNS = [
+    "whaleSharkID",
+    "decimalLatitude",
+    "decimalLongitude",
+    "eventDate",
+]
+VALIDATION_COLUMNS = EXCLUSION_MAP_COLUMNS + ["key", "identificationID", "occurrenceID"]
+
+
+def apply_clean_schema(occurrences_df: pd.DataFrame) -> pd.DataFrame:
+    if not isinstance(occurrences_df, pd.DataFrame):
+        raise ValueError("Error, must specify occurrences_df")
+
+    typed_columns = {}
+
+    for column, dtype in CLEAN_OCCURRENCE_SCHEMA.items():
+        if column not in occurrences_df.columns:
+            continue
+
+        values = occurrences_df[column]
+
+        # Cleaned years / days are text (e.g. "2019", "nan"), so parse first
+        if column in INT_COLUMNS or column in FLOAT_COLUMNS:
+            values = pd.to_numeric(values, errors="coerce")
+
+        typed_columns[column] = values.astype(dtype)
+
+    # Unknown (non-schema) columns pass through untouched & uncopied
+    return pd.DataFrame(
+        {
+            column: typed_columns.get(column, occurrences_df[column])
+            for column in occurrences_df.columns
+        },
+        copy=False,
+    )
+
+
+def add_row_fingerprints(occurrences_df: pd.DataFrame) -> pd.DataFrame:
+    if not isinstance(occurrences_df, pd.DataFrame):
+        raise ValueError("Error, must specify occurrences_df")
+
+    # Hash typed values, so a row fingerprints the same however it was loaded
+    hashed_columns = [
+        column
+        for column in occurrences_df.columns
+        if column not in ("media", FINGERPRINT_COLUMN)
+    ]
+    occurrences_df[FINGERPRINT_COLUMN] = hash_rows(occurrences_df, hashed_columns)
+
+    return occurrences_df
+
+
+def export_clean_store(
+    occurrences_df: pd.DataFrame, parquet_file: str = GBIF_CLEAN_PARQUET
+) -> pd.DataFrame:
+    typed_df = apply_clean_schema(occurrences_df)
+    export_to_parquet(parquet_file, typed_df)
+
+    return typed_df
+
+
+def read_clean_occurrences(
+    columns: Optional[list[str]] = None, parquet_file: str = GBIF_CLEAN_PARQUET
+) -> pd.DataFrame:
+    # Read only requested columns, then restore exact dtypes (e.g. NaN-backed
+    # strings, which Parquet round-trips as plain object columns)
+    occurrences_df = read_parquet(parquet_file, columns=columns)
+    return apply_clean_schema(occurrences_df)
@@ -7,9 +7,17 @@
 
 # Raw data files
 GBIF_RAW_CSV = "data/gbif_raw.csv"
+GBIF_RAW_JSONL = "data/gbif_raw.jsonl.gz"
+GBIF_DOWNLOAD_ZIP = "data/gbif_download.zip"
+
+# Local occurrence store for incremental sync (raw + cleaned rows per key)
+GBIF_STORE_DB = "data/gbif_store.sqlite"
+
+# Cached ISO code -> country -> continent lookup table (built once, on first clean)
+GEOGRAPHY_LOOKUP_JSON = "data/geography_lookup.json"
 
 # Cleaned data files
-GBIF_CLEAN_CSV = "data/gbif_clean.csv"
+GBIF_CLEAN_PARQUET = "data/gbif_clean.parquet"
 GBIF_MEDIA_CSV = "data/gbif_media.csv"
 
 # Analysis output files
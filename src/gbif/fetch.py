@@ -5,20 +5,37 @@
 ###############################################################################
 
 
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Iterator, Optional
+
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 
 from src.config import (
     SPECIES_NAME,
 )
 from src.gbif.constants import (
     GBIF_RAW_CSV,
+    GBIF_RAW_JSONL,
 )
 from src.utils.api_utils import (
     find_field,
 )
 from src.utils.data_utils import (
     export_to_csv,
+    export_to_jsonl,
+)
+from src.utils.executor_utils import (
+    iter_ordered_results,
+)
+from src.utils.http_cache import (
+    CachedSession,
+    get_cached_session,
+)
+from src.utils.lazy_utils import (
+    lazy_resource,
 )
 
 BASE_URL = "https://api.gbif.org/v1"
@@ -29,12 +46,33 @@ OCCURRENCE_SEARCH_ENDPOINT = "occurrence/search"
 # GBIF allows maximum limit of 300 per query as of March 2025
 LIMIT = 200
 
+# Search API rejects any page where offset + limit exceeds this
+SEARCH_OFFSET_CAP = 100_000
+
+# Number of occurrence pages requested at once (keep modest, GBIF is shared)
+MAX_WORKERS = 8
+
+
+def make_session(pool_size: int = MAX_WORKERS) -> requests.Session:
+    # Keep-alive session whose connection pool fits every worker thread,
+    # so concurrent pages reuse sockets instead of re-handshaking (responses
+    # recorded to / replayed from local HTTP cache, per HTTP_CACHE_MODE)
+    session = CachedSession()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
 
+    return session
+
+
+# Resolved once per name on first use (never at import time)
+@lazy_resource
 def get_species_key(name: str = SPECIES_NAME) -> int:
     url_endpoint = f"{BASE_URL}/{SPECIES_MATCH_ENDPOINT}"
     params = {"scientificName": name}
 
-    response = requests.get(url_endpoint, params=params)
+    response = get_cached_session().get(url_endpoint, params=params)
     response.raise_for_status()
 
     data = response.json()
@@ -49,35 +87,55 @@ def get_occurrence_search(
     offset: int,
     limit: int = LIMIT,
     name: str = SPECIES_NAME,
-    key: int = get_species_key(),
+    key: Optional[int] = None,
+    session: Optional[requests.Session] = None,
+    extra_params: Optional[dict] = None,
+    base_url: str = BASE_URL,
 ) -> dict:
     if offset is None:
         raise ValueError("ERROR: missing offset")
 
-    url_endpoint = f"{BASE_URL}/{OCCURRENCE_SEARCH_ENDPOINT}"
+    if key is None:
+        key = get_species_key(name)
+
+    url_endpoint = f"{base_url}/{OCCURRENCE_SEARCH_ENDPOINT}"
     params = {
         "offset": offset,
         "limit": limit,
         "scientificName": name,
         "speciesKey": key,
+        **(extra_params or {}),
     }
 
-    response = requests.get(url_endpoint, params=params)
+    # Fall back to shared (cached) session if none provided
+    http = session if session is not None else get_cached_session()
+
+    response = http.get(url_endpoint, params=params)
     response.raise_for_status()
 
     data = response.json()
     return data
 
 
-def get_all_occurrences_raw() -> list:
-    raw_occurrences = []
+def check_offset_cap(total_count: int) -> None:
+    # Pages past the cap come back as 400s, so fail up front rather than
+    # part way through (partitioned harvest splits the search under the cap)
+    if total_count > SEARCH_OFFSET_CAP:
+        raise ValueError(
+            f"Error, {total_count} records exceeds the search API's offset cap "
+            f"({SEARCH_OFFSET_CAP}), use the partitioned harvest instead"
+        )
+
+
+def iter_pages_serial(extra_params: Optional[dict] = None) -> Iterator[list]:
     offset = 0
 
     while True:
-        raw_data = get_occurrence_search(offset)
+        raw_data = get_occurrence_search(offset, extra_params=extra_params)
+        if offset == 0:
+            check_offset_cap(raw_data.get("count", 0))
 
-        for occurrence in raw_data["results"]:
-            raw_occurrences.append(occurrence)
+        yield raw_data["results"]
 
         # Stop if fetched all records
         if offset + LIMIT >= raw_data.get("count", 0):
@@ -85,6 +143,66 @@ def get_all_occurrences_raw() -> list:
 
         offset += LIMIT
 
+
+def iter_pages_concurrent(
+    max_workers: int = MAX_WORKERS, extra_params: Optional[dict] = None
+) -> Iterator[list]:
+    if not isinstance(max_workers, int) or max_workers < 1:
+        raise ValueError("Error, max_workers must be a positive int")
+
+    with make_session(pool_size=max_workers) as session:
+        # First page tells us how many records (and so which offsets) exist
+        first_page = get_occurrence_search(
+            0, session=session, extra_params=extra_params
+        )
+        total_count = first_page.get("count", 0)
+        check_offset_cap(total_count)
+
+        yield first_page["results"]
+
+        def fetch_page(offset: int) -> dict:
+            return get_occurrence_search(
+                offset, session=session, extra_params=extra_params
+            )
+
+        remaining_offsets = range(LIMIT, total_count, LIMIT)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for page in iter_ordered_results(
+                executor, fetch_page, remaining_offsets, window=2 * max_workers
+            ):
+                yield page["results"]
+
+
+def iter_all_pages(
+    concurrent: bool = True,
+    max_workers: int = MAX_WORKERS,
+    extra_params: Optional[dict] = None,
+) -> Iterator[list]:
+    if concurrent:
+        return iter_pages_concurrent(max_workers=max_workers, extra_params=extra_params)
+    return iter_pages_serial(extra_params=extra_params)
+
+
+def get_all_pages_serial(extra_params: Optional[dict] = None) -> list:
+    return list(chain.from_iterable(iter_pages_serial(extra_params=extra_params)))
+
+
+def get_all_pages_concurrent(
+    max_workers: int = MAX_WORKERS, extra_params: Optional[dict] = None
+) -> list:
+    pages = iter_pages_concurrent(max_workers=max_workers, extra_params=extra_params)
+    return list(chain.from_iterable(pages))
+
+
+def get_all_occurrences_raw(
+    concurrent: bool = True, max_workers: int = MAX_WORKERS
+) -> list:
+    if concurrent:
+        raw_occurrences = get_all_pages_concurrent(max_workers=max_workers)
+    else:
+        raw_occurrences = get_all_pages_serial()
+
     # Export raw dataset
     raw_occurrencess_df = pd.DataFrame(raw_occurrences)
     export_to_csv(GBIF_RAW_CSV, raw_occurrencess_df)
@@ -92,5 +210,16 @@ def get_all_occurrences_raw() -> list:
     return raw_occurrences
 
 
+def stream_occurrences_raw(
+    jsonl_file: str = GBIF_RAW_JSONL,
+    concurrent: bool = True,
+    max_workers: int = MAX_WORKERS,
+) -> int:
+    # Append each page to (gzipped) JSONL as it arrives, instead of holding
+    # the full history in memory. Nested fields (media, etc) stay as JSON
+    pages = iter_all_pages(concurrent=concurrent, max_workers=max_workers)
+    return export_to_jsonl(jsonl_file, chain.from_iterable(pages))
+
+
 if __name__ == "__main__":
-    occurrences_df = get_all_occurrences_raw()
+    occurrences_count = stream_occurrences_raw()
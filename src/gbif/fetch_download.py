@@ -0,0 +1,377 @@
+###############################################################################
+##  `fetch_download.py`                                                      ##
+##                                                                           ##
+##  Purpose: Bulk GBIF ingestion via the occurrence download API (no 100k    ##
+##           search offset ceiling), streamed straight from the zip archive  ##
+###############################################################################
+
+
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+import time
+import zipfile
+from itertools import islice
+from typing import Iterator, Literal, Optional
+
+import requests
+from dotenv import load_dotenv
+
+from src.gbif.constants import (
+    GBIF_DOWNLOAD_ZIP,
+    GBIF_RAW_JSONL,
+)
+from src.gbif.fetch import (
+    BASE_URL,
+    get_species_key,
+    make_session,
+)
+from src.utils.data_utils import (
+    export_to_jsonl,
+    folder_exists,
+)
+from src.utils.http_cache import (
+    CachedSession,
+    get_cached_session,
+)
+
+load_dotenv()
+
+# Downloads require a (free) GBIF account
+GBIF_USER = os.getenv("GBIF_USER")
+GBIF_PASS = os.getenv("GBIF_PASS")
+GBIF_EMAIL = os.getenv("GBIF_EMAIL")
+
+DOWNLOAD_REQUEST_ENDPOINT = "occurrence/download/request"
+DOWNLOAD_STATUS_ENDPOINT = "occurrence/download"
+
+# Download jobs take minutes, so poll gently
+POLL_INTERVAL_SECONDS = 30
+POLL_TIMEOUT_SECONDS = 3 * 60 * 60
+
+DOWNLOAD_FAILED_STATUSES = {"FAILED", "KILLED", "CANCELLED", "FILE_ERASED"}
+
+# Archive columns use Darwin Core names, which mostly match the search API's
+# JSON keys (exception: the occurrence `key` is `gbifID` in archives)
+DOWNLOAD_FIELD_ALIASES = {
+    "key": "gbifID",
+}
+
+# Cast archive text back to the types the search API returns
+DOWNLOAD_FIELD_TYPES = {
+    "key": int,
+    "year": int,
+    "month": int,
+    "day": int,
+    "decimalLatitude": float,
+    "decimalLongitude": float,
+    "coordinateUncertaintyInMeters": float,
+}
+
+# DWCA extension holding per-image rows (linked back to occurrences by gbifID)
+DWCA_OCCURRENCE_FILE = "occurrence.txt"
+DWCA_MULTIMEDIA_FILE = "multimedia.txt"
+
+# Occurrences are parsed (& joined to their images) this many rows at a time
+DOWNLOAD_CHUNK_SIZE = 10_000
+
+# Keep IN (...) lookups under SQLite's bound parameter limit (999 on old builds)
+SQLITE_MAX_PARAMS = 500
+
+# Occurrence remarks can be very long, so lift csv's default 128KB cell cap
+csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+
+
+#####
+## Request, poll, & download archive
+#####
+
+
+def request_occurrence_download(
+    download_format: Literal["DWCA", "SIMPLE_CSV"] = "DWCA",
+    key: Optional[int] = None,
+    base_url: str = BASE_URL,
+    session: Optional[requests.Session] = None,
+) -> str:
+    if not GBIF_USER or not GBIF_PASS:
+        raise ValueError("Error, must set GBIF_USER & GBIF_PASS to request downloads")
+
+    if key is None:
+        key = get_species_key()
+
+    url_endpoint = f"{base_url}/{DOWNLOAD_REQUEST_ENDPOINT}"
+    body = {
+        "creator": GBIF_USER,
+        "notificationAddresses": [GBIF_EMAIL] if GBIF_EMAIL else [],
+        "sendNotification": False,
+        "format": download_format,
+        "predicate": {"type": "equals", "key": "TAXON_KEY", "value": str(key)},
+    }
+
+    http = session if session is not None else get_cached_session()
+
+    # Each POST creates a new download job, so it's never served from (or
+    # recorded to) the HTTP cache, only rate limited; the scheduler sends it
+    # just once (retrying could queue a duplicate job)
+    if isinstance(http, CachedSession):
+        response = http.send_scheduled(
+            "POST", url_endpoint, json=body, auth=(GBIF_USER, GBIF_PASS)
+        )
+    else:
+        response = http.post(url_endpoint, json=body, auth=(GBIF_USER, GBIF_PASS))
+    response.raise_for_status()
+
+    # GBIF responds with the bare download key as plain text
+    download_key = response.text.strip()
+    print(f"Requested GBIF download {download_key} ({download_format})")
+
+    return download_key
+
+
+def wait_for_download(
+    download_key: str,
+    poll_interval: float = POLL_INTERVAL_SECONDS,
+    timeout: float = POLL_TIMEOUT_SECONDS,
+    base_url: str = BASE_URL,
+    session: Optional[requests.Session] = None,
+) -> str:
+    if not download_key:
+        raise ValueError("Error, must specify download_key")
+
+    url_endpoint = f"{base_url}/{DOWNLOAD_STATUS_ENDPOINT}/{download_key}"
+    http = session if session is not None else get_cached_session()
+    deadline = time.monotonic() + timeout
+
+    while True:
+        # Status changes while the job runs, so it's never served from cache
+        # (only sent through the scheduler), except in strict offline replay
+        if isinstance(http, CachedSession) and http.mode != "replay":
+            response = http.send_scheduled("GET", url_endpoint)
+        else:
+            response = http.get(url_endpoint)
+        response.raise_for_status()
+
+        data = response.json()
+        status = data.get("status")
+
+        if status == "SUCCEEDED":
+            return data["downloadLink"]
+
+        if status in DOWNLOAD_FAILED_STATUSES:
+            raise RuntimeError(f"Error, GBIF download {download_key} ended: {status}")
+
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Error, GBIF download {download_key} still {status}")
+
+        print(f"GBIF download {download_key} is {status}, checking again shortly...")
+        time.sleep(poll_interval)
+
+
+def download_archive(
+    download_link: str,
+    zip_file: str = GBIF_DOWNLOAD_ZIP,
+    session: Optional[requests.Session] = None,
+) -> str:
+    if not download_link:
+        raise ValueError("Error, must specify download_link")
+
+    _ = folder_exists(zip_file, True)
+    http = session if session is not None else get_cached_session()
+
+    # Stream to disk in chunks (archives can be several hundred MB). Streamed
+    # requests bypass the HTTP cache, but still go through the scheduler
+    with http.get(download_link, stream=True) as response:
+        response.raise_for_status()
+
+        with open(zip_file, "wb") as f:
+            for chunk in response.iter_content(chunk_size=1 << 20):
+                f.write(chunk)
+
+    print(f"Downloaded GBIF archive to {zip_file}")
+    return zip_file
+
+
+#####
+## Stream-parse archive
+#####
+
+
+def convert_download_value(field: str, value: Optional[str]):
+    # Archives use empty cells for nulls (search API uses missing keys)
+    if value is None or value == "":
+        return None
+
+    cast = DOWNLOAD_FIELD_TYPES.get(field)
+    if cast is None:
+        return value
+
+    try:
+        # e.g. "2017" -> 2017, but also tolerate "2017.0"
+        return cast(float(value)) if cast is int else cast(value)
+    except ValueError:
+        return None
+
+
+def iter_tsv_member(archive: zipfile.ZipFile, member: str) -> Iterator[dict]:
+    with archive.open(member) as raw:
+        text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+
+        # GBIF archives are tab-separated & unquoted
+        reader = csv.DictReader(text, delimiter="\t", quoting=csv.QUOTE_NONE)
+        yield from reader
+
+
+def find_occurrence_member(archive: zipfile.ZipFile) -> str:
+    names = archive.namelist()
+
+    # DWCA: interpreted occurrence core; SIMPLE_CSV: single "{downloadKey}.csv"
+    if DWCA_OCCURRENCE_FILE in names:
+        return DWCA_OCCURRENCE_FILE
+
+    csv_members = [name for name in names if name.endswith(".csv")]
+    if len(csv_members) == 1:
+        return csv_members[0]
+
+    raise ValueError(f"Error, no occurrence table found in archive: {names}")
+
+
+def index_media_by_occurrence(archive: zipfile.ZipFile) -> sqlite3.Connection:
+    # Images go to a temporary on-disk SQLite table (gbifID -> image JSON),
+    # so each chunk of occurrences looks up only its own images
+    conn = sqlite3.connect("")
+    conn.execute("CREATE TABLE media (gbif_id INTEGER NOT NULL, item TEXT NOT NULL)")
+
+    if DWCA_MULTIMEDIA_FILE in archive.namelist():
+        media_rows = (
+            (
+                int(row.pop("gbifID")),
+                json.dumps({field: value for field, value in row.items() if value}),
+            )
+            for row in iter_tsv_member(archive, DWCA_MULTIMEDIA_FILE)
+            if row.get("gbifID")
+        )
+        conn.executemany("INSERT INTO media VALUES (?, ?)", media_rows)
+
+    conn.execute("CREATE INDEX idx_media_gbif_id ON media (gbif_id)")
+    return conn
+
+
+def get_media_by_occurrence(conn: sqlite3.Connection, gbif_ids: list[int]) -> dict:
+    media_by_occurrence = {}
+
+    for start in range(0, len(gbif_ids), SQLITE_MAX_PARAMS):
+        batch = gbif_ids[start : start + SQLITE_MAX_PARAMS]
+        placeholders = ", ".join("?" * len(batch))
+
+        # rowid order == archive order, so each occurrence's images keep theirs
+        rows = conn.execute(
+            f"SELECT gbif_id, item FROM media WHERE gbif_id IN ({placeholders}) "
+            "ORDER BY rowid",
+            batch,
+        )
+        for gbif_id, item in rows:
+            media_by_occurrence.setdefault(gbif_id, []).append(json.loads(item))
+
+    return media_by_occurrence
+
+
+def iter_download_occurrences(
+    zip_file: str = GBIF_DOWNLOAD_ZIP,
+    fields: Optional[list[str]] = None,
+    chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+) -> Iterator[dict]:
+    """
+    Yield one dict per occurrence from a GBIF download archive, row by row.
+
+    Each dict holds just `fields` (same names as the search API's JSON, so
+    records slot into the existing clean pipeline). `media` is rebuilt as a
+    list of image dicts from the DWCA multimedia extension, joined one chunk
+    of occurrences at a time; SIMPLE_CSV archives carry no image URLs, so
+    it's left empty there.
+    """
+    if not zip_file:
+        raise ValueError("Error, must specify zip_file")
+    if chunk_size < 1:
+        raise ValueError("Error, chunk_size must be positive")
+
+    with_media = fields is None or "media" in fields
+
+    with zipfile.ZipFile(zip_file) as archive:
+        occurrence_member = find_occurrence_member(archive)
+        media_conn = index_media_by_occurrence(archive) if with_media else None
+
+        try:
+            rows = iter_tsv_member(archive, occurrence_member)
+
+            while chunk := list(islice(rows, chunk_size)):
+                gbif_ids = [
+                    convert_download_value("key", row.get("gbifID")) for row in chunk
+                ]
+                media_by_occurrence = (
+                    get_media_by_occurrence(
+                        media_conn,
+                        [gbif_id for gbif_id in gbif_ids if gbif_id is not None],
+                    )
+                    if with_media
+                    else {}
+                )
+
+                for row, gbif_id in zip(chunk, gbif_ids):
+                    record_fields = fields if fields is not None else list(row)
+
+                    record = {
+                        field: convert_download_value(
+                            field, row.get(DOWNLOAD_FIELD_ALIASES.get(field, field))
+                        )
+                        for field in record_fields
+                        if field != "media"
+                    }
+
+                    if with_media:
+                        record["media"] = media_by_occurrence.get(gbif_id, [])
+
+                    yield record
+
+        finally:
+            if media_conn is not None:
+                media_conn.close()
+
+
+def get_all_occurrences_download(
+    fields: Optional[list[str]] = None,
+    download_format: Literal["DWCA", "SIMPLE_CSV"] = "DWCA",
+    zip_file: str = GBIF_DOWNLOAD_ZIP,
+    base_url: str = BASE_URL,
+) -> Iterator[dict]:
+    # Request -> poll -> download, then stream records from archive on disk
+    with make_session(pool_size=1) as session:
+        download_key = request_occurrence_download(
+            download_format=download_format, base_url=base_url, session=session
+        )
+        download_link = wait_for_download(
+            download_key, base_url=base_url, session=session
+        )
+        download_archive(download_link, zip_file=zip_file, session=session)
+
+    return iter_download_occurrences(zip_file=zip_file, fields=fields)
+
+
+def stream_download_occurrences_raw(
+    jsonl_file: str = GBIF_RAW_JSONL,
+    fields: Optional[list[str]] = None,
+    download_format: Literal["DWCA", "SIMPLE_CSV"] = "DWCA",
+    zip_file: str = GBIF_DOWNLOAD_ZIP,
+) -> int:
+    # Same as stream_occurrences_raw: records go to (gzipped) JSONL as they're
+    # parsed from the archive, never all held in memory
+    occurrences = get_all_occurrences_download(
+        fields=fields, download_format=download_format, zip_file=zip_file
+    )
+    return export_to_jsonl(jsonl_file, occurrences)
+
+
+if __name__ == "__main__":
+    occurrences_count = stream_download_occurrences_raw()
@@ -0,0 +1,217 @@
+###############################################################################
+##  `fetch_partitioned.py`                                                   ##
+##                                                                           ##
+##  Purpose: Splits the occurrence search into facet partitions (each under  ##
+##           GBIF's offset cap) & harvests them concurrently                 ##
+###############################################################################
+
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Iterator, NamedTuple, Optional
+
+import requests
+
+from src.gbif.constants import (
+    GBIF_RAW_JSONL,
+)
+from src.gbif.fetch import (
+    BASE_URL,
+    LIMIT,
+    MAX_WORKERS,
+    SEARCH_OFFSET_CAP,
+    get_occurrence_search,
+    make_session,
+)
+from src.utils.data_utils import (
+    export_to_jsonl,
+)
+from src.utils.executor_utils import (
+    iter_ordered_results,
+)
+
+# Facets tried in order when a partition is still too big. datasetKey comes
+# first since every record has one (null years / countries fall outside
+# their facet counts, so those are only used to split further)
+PARTITION_FACETS = ["datasetKey", "year", "country"]
+
+# GBIF only returns the top 10 facet values unless told otherwise
+FACET_LIMIT = 10_000
+
+
+class PartitionPlan(NamedTuple):
+    # (filters, record count to harvest) per partition
+    partitions: list[tuple[dict, int]]
+
+    # Records no partition reaches: those with no value for a facet split on,
+    # & those past the cap in partitions that couldn't be split further
+    uncovered_count: int = 0
+    capped_count: int = 0
+
+    @property
+    def is_complete(self) -> bool:
+        return self.uncovered_count == 0 and self.capped_count == 0
+
+
+def get_facet_counts(
+    field: str,
+    filters: Optional[dict] = None,
+    key: Optional[int] = None,
+    session: Optional[requests.Session] = None,
+    base_url: str = BASE_URL,
+) -> tuple[int, dict]:
+    # limit=0 skips records entirely, returning just total count + facets
+    data = get_occurrence_search(
+        0,
+        limit=0,
+        key=key,
+        session=session,
+        extra_params={**(filters or {}), "facet": field, "facetLimit": FACET_LIMIT},
+        base_url=base_url,
+    )
+
+    facet_counts = {}
+    for facet in data.get("facets", []):
+        for entry in facet.get("counts", []):
+            facet_counts[entry["name"]] = entry["count"]
+
+    return data.get("count", 0), facet_counts
+
+
+def plan_partitions(
+    filters: Optional[dict] = None,
+    facet_fields: list[str] = PARTITION_FACETS,
+    cap: int = SEARCH_OFFSET_CAP,
+    key: Optional[int] = None,
+    session: Optional[requests.Session] = None,
+    base_url: str = BASE_URL,
+) -> PartitionPlan:
+    """
+    Recursively split the search into (filters, record count) partitions
+    that each fit under the search API's offset cap.
+
+    Records with no value for the facet being split on (e.g. a null year)
+    can't be targeted by the search API, so any such gap is reported (& so
+    is any partition still over the cap once out of facets), both in the
+    returned plan's counts & as warnings, rather than silently dropped.
+    """
+    if not facet_fields:
+        raise ValueError("Error, must specify at least one facet field")
+
+    filters = filters or {}
+    field, remaining_fields = facet_fields[0], facet_fields[1:]
+    total_count, facet_counts = get_facet_counts(
+        field, filters, key=key, session=session, base_url=base_url
+    )
+
+    if total_count <= cap:
+        return PartitionPlan([(filters, total_count)])
+
+    partitions = []
+    uncovered_count, capped_count = 0, 0
+    for value, count in facet_counts.items():
+        partition_filters = {**filters, field: value}
+
+        if count <= cap:
+            partitions.append((partition_filters, count))
+        elif not remaining_fields:
+            # Out of facets to split on, so harvest as much as the cap allows
+            print(f"Warning: partition {partition_filters} ({count}) exceeds cap")
+            partitions.append((partition_filters, cap))
+            capped_count += count - cap
+        else:
+            sub_plan = plan_partitions(
+                partition_filters,
+                remaining_fields,
+                cap=cap,
+                key=key,
+                session=session,
+                base_url=base_url,
+            )
+            partitions.extend(sub_plan.partitions)
+            uncovered_count += sub_plan.uncovered_count
+            capped_count += sub_plan.capped_count
+
+    missing_value_count = total_count - sum(facet_counts.values())
+    if missing_value_count > 0:
+        print(
+            f"Warning: {missing_value_count} records in {filters or 'all'} have no "
+            f"'{field}' value, so can't be reached by partitioning on it"
+        )
+        uncovered_count += missing_value_count
+
+    return PartitionPlan(partitions, uncovered_count, capped_count)
+
+
+def iter_partitioned_occurrences(
+    filters: Optional[dict] = None,
+    facet_fields: list[str] = PARTITION_FACETS,
+    max_workers: int = MAX_WORKERS,
+    cap: int = SEARCH_OFFSET_CAP,
+    key: Optional[int] = None,
+    base_url: str = BASE_URL,
+    plan: Optional[PartitionPlan] = None,
+) -> Iterator[dict]:
+    """
+    Yield every occurrence once (matching any base `filters`, e.g. a
+    lastInterpreted range), harvested across facet partitions (planned here
+    unless an already made `plan` is passed in).
+
+    All (partition, offset) pages are fetched through one shared worker pool,
+    so small partitions don't leave workers idle. Pages come back in plan
+    order & records are de-duplicated on `key` (GBIF can shift records
+    between partitions mid-harvest), so output is deterministic.
+    """
+    with make_session(pool_size=max_workers) as session:
+        if plan is None:
+            plan = plan_partitions(
+                filters=filters,
+                facet_fields=facet_fields,
+                cap=cap,
+                key=key,
+                session=session,
+                base_url=base_url,
+            )
+        print(f"Harvesting {len(plan.partitions)} partitions")
+
+        page_requests = chain.from_iterable(
+            ((filters, offset) for offset in range(0, count, LIMIT))
+            for filters, count in plan.partitions
+        )
+
+        def fetch_page(page_request: tuple[dict, int]) -> list:
+            filters, offset = page_request
+            page = get_occurrence_search(
+                offset,
+                key=key,
+                session=session,
+                extra_params=filters,
+                base_url=base_url,
+            )
+            return page["results"]
+
+        seen_keys = set()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for results in iter_ordered_results(
+                executor, fetch_page, page_requests, window=2 * max_workers
+            ):
+                for occurrence in results:
+                    if occurrence["key"] not in seen_keys:
+                        seen_keys.add(occurrence["key"])
+                        yield occurrence
+
+
+def stream_partitioned_occurrences_raw(
+    jsonl_file: str = GBIF_RAW_JSONL,
+    facet_fields: list[str] = PARTITION_FACETS,
+    max_workers: int = MAX_WORKERS,
+) -> int:
+    occurrences = iter_partitioned_occurrences(
+        facet_fields=facet_fields, max_workers=max_workers
+    )
+    return export_to_jsonl(jsonl_file, occurrences)
+
+
+if __name__ == "__main__":
+    occurrences_count = stream_partitioned_occurrences_raw()
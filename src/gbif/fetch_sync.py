@@ -0,0 +1,129 @@
+###############################################################################
+##  `fetch_sync.py`                                                          ##
+##                                                                           ##
+##  Purpose: Incremental GBIF sync: fetches records (re)interpreted since    ##
+##           the local store's watermark & upserts them page by page         ##
+###############################################################################
+
+
+from itertools import islice
+from typing import Iterator, Optional
+
+from src.gbif.constants import (
+    GBIF_STORE_DB,
+)
+from src.gbif.fetch import (
+    LIMIT,
+    MAX_WORKERS,
+    SEARCH_OFFSET_CAP,
+    get_occurrence_search,
+    iter_pages_concurrent,
+)
+from src.gbif.fetch_partitioned import (
+    PartitionPlan,
+    iter_partitioned_occurrences,
+    plan_partitions,
+)
+from src.gbif.store import (
+    connect_store,
+    delete_missing_occurrences,
+    get_watermark,
+    upsert_raw_occurrences,
+)
+
+
+def plan_sync(extra_params: Optional[dict] = None) -> Optional[PartitionPlan]:
+    # limit=0 skips records entirely, returning just the total count
+    total_count = get_occurrence_search(0, limit=0, extra_params=extra_params).get(
+        "count", 0
+    )
+
+    # Plain paging works under the offset cap (no partition plan needed)
+    if total_count <= SEARCH_OFFSET_CAP:
+        return None
+
+    # First / full syncs of a large species can't be paged past the offset
+    # cap, so harvest across facet partitions instead
+    print(f"{total_count} records exceeds the offset cap, harvesting by partition")
+    return plan_partitions(filters=extra_params)
+
+
+def iter_sync_pages(
+    extra_params: Optional[dict] = None,
+    max_workers: int = MAX_WORKERS,
+    plan: Optional[PartitionPlan] = None,
+) -> Iterator[list]:
+    if plan is None:
+        yield from iter_pages_concurrent(
+            max_workers=max_workers, extra_params=extra_params
+        )
+        return
+
+    # Partitioned harvest, regrouped into pages
+    occurrences = iter_partitioned_occurrences(
+        filters=extra_params, max_workers=max_workers, plan=plan
+    )
+
+    while page := list(islice(occurrences, LIMIT)):
+        yield page
+
+
+def sync_occurrences_raw(
+    db_file: str = GBIF_STORE_DB, full: bool = False, max_workers: int = MAX_WORKERS
+) -> int:
+    """
+    Fetch only records GBIF (re)interpreted since the store's latest
+    lastInterpreted watermark, & upsert them into the local store.
+
+    full=True ignores the watermark & refetches everything, which is also the
+    only way to notice (and drop) records GBIF has since deleted. Nothing is
+    dropped if a partitioned harvest couldn't reach every record, since those
+    unreached (but still valid) records would look deleted.
+    Returns number of records inserted or updated.
+    """
+    conn = connect_store(db_file)
+
+    try:
+        watermark = None if full else get_watermark(conn)
+
+        # GBIF search accepts ranges, e.g. lastInterpreted=2025-01-01T00:00:00,*
+        # (start is inclusive, so unchanged boundary records are skipped on upsert)
+        extra_params = {"lastInterpreted": f"{watermark},*"} if watermark else None
+
+        # Upsert page by page, so memory stays flat however many records changed
+        fetched_count, changed_count = 0, 0
+        seen_keys = set()
+
+        plan = plan_sync(extra_params)
+        pages = iter_sync_pages(
+            extra_params=extra_params, max_workers=max_workers, plan=plan
+        )
+
+        for page in pages:
+            fetched_count += len(page)
+            changed_count += upsert_raw_occurrences(conn, page)
+            seen_keys.update(occurrence["key"] for occurrence in page)
+
+        print(
+            f"Fetched {fetched_count} records since {watermark or 'the beginning'}; "
+            f"{changed_count} new or changed"
+        )
+
+        if full and plan is not None and not plan.is_complete:
+            print(
+                f"Warning: partitioned harvest missed {plan.uncovered_count} "
+                f"records with no facet value & {plan.capped_count} past the cap, "
+                "so no stored records were removed"
+            )
+        elif full:
+            removed_count = delete_missing_occurrences(conn, seen_keys)
+            print(f"Removed {removed_count} records no longer served by GBIF")
+
+    finally:
+        conn.close()
+
+    return changed_count
+
+
+if __name__ == "__main__":
+    changed_count = sync_occurrences_raw()
@@ -0,0 +1,155 @@
+###############################################################################
+##  `store.py`                                                               ##
+##                                                                           ##
+##  Purpose: Local SQLite occurrence store (keyed on GBIF `key`) backing     ##
+##           incremental sync & re-cleaning of changed records only          ##
+###############################################################################
+
+
+import json
+import sqlite3
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from src.gbif.constants import (
+    GBIF_STORE_DB,
+)
+from src.utils.data_utils import (
+    folder_exists,
+)
+
+# raw_occurrences: latest raw API record per key (+ its GBIF watermark)
+# clean_occurrences: cleaned row(s) derived from each raw record, since
+#   ID explosion can turn 1 raw record into several cleaned rows
+STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS raw_occurrences (
+    key INTEGER PRIMARY KEY,
+    last_interpreted TEXT,
+    record TEXT NOT NULL,
+    needs_clean INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_raw_needs_clean ON raw_occurrences (needs_clean);
+
+CREATE TABLE IF NOT EXISTS clean_occurrences (
+    key INTEGER PRIMARY KEY,
+    rows TEXT NOT NULL
+);
+"""
+
+
+def connect_store(db_file: str = GBIF_STORE_DB) -> sqlite3.Connection:
+    if not db_file:
+        raise ValueError("Error, must specify db_file")
+
+    _ = folder_exists(db_file, True)
+
+    conn = sqlite3.connect(db_file)
+    conn.executescript(STORE_SCHEMA)
+
+    return conn
+
+
+def get_watermark(conn: sqlite3.Connection) -> Optional[str]:
+    # Latest lastInterpreted seen so far (ISO 8601 strings sort chronologically)
+    (watermark,) = conn.execute(
+        "SELECT MAX(last_interpreted) FROM raw_occurrences"
+    ).fetchone()
+
+    return watermark
+
+
+def get_record_watermark(occurrence: dict) -> Optional[str]:
+    return occurrence.get("lastInterpreted") or occurrence.get("modified")
+
+
+def upsert_raw_occurrences(conn: sqlite3.Connection, occurrences: list) -> int:
+    """
+    Insert new records & overwrite changed ones, flagging both for cleaning.
+    Records whose watermark hasn't moved are left untouched (not re-cleaned).
+    Returns number of records inserted or updated.
+    """
+    rows = [
+        (
+            occurrence["key"],
+            get_record_watermark(occurrence),
+            json.dumps(occurrence, separators=(",", ":")),
+        )
+        for occurrence in occurrences
+    ]
+
+    before = conn.total_changes
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO raw_occurrences (key, last_interpreted, record, needs_clean)
+            VALUES (?, ?, ?, 1)
+            ON CONFLICT (key) DO UPDATE SET
+                last_interpreted = excluded.last_interpreted,
+                record = excluded.record,
+                needs_clean = 1
+            WHERE excluded.last_interpreted IS NOT raw_occurrences.last_interpreted
+            """,
+            rows,
+        )
+
+    return conn.total_changes - before
+
+
+def delete_missing_occurrences(conn: sqlite3.Connection, seen_keys: set) -> int:
+    # Only meaningful after a FULL fetch: drops records GBIF no longer serves
+    stored_keys = {key for (key,) in conn.execute("SELECT key FROM raw_occurrences")}
+    missing = [(key,) for key in stored_keys - set(seen_keys)]
+
+    with conn:
+        conn.executemany("DELETE FROM raw_occurrences WHERE key = ?", missing)
+        conn.executemany("DELETE FROM clean_occurrences WHERE key = ?", missing)
+
+    return len(missing)
+
+
+def get_occurrences_to_clean(conn: sqlite3.Connection) -> list:
+    return [
+        json.loads(record)
+        for (record,) in conn.execute(
+            "SELECT record FROM raw_occurrences WHERE needs_clean = 1 ORDER BY key"
+        )
+    ]
+
+
+def replace_clean_rows(
+    conn: sqlite3.Connection, keys: Iterable[int], clean_df: pd.DataFrame
+) -> None:
+    """
+    Store freshly cleaned rows for `keys` & clear their needs_clean flag.
+    Keys that produced no cleaned rows are stored as empty (not re-tried).
+    """
+    keys = [int(key) for key in keys]
+
+    # JSON-safe: missing values (NaN / pd.NA / None) all become null
+    records = clean_df.astype(object).where(clean_df.notna(), None)
+    rows_by_key = {key: [] for key in keys}
+    for record in records.to_dict("records"):
+        rows_by_key.setdefault(int(record["key"]), []).append(record)
+
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO clean_occurrences (key, rows) VALUES (?, ?)",
+            [
+                (key, json.dumps(rows, separators=(",", ":"), default=str))
+                for key, rows in rows_by_key.items()
+            ],
+        )
+        conn.executemany(
+            "UPDATE raw_occurrences SET needs_clean = 0 WHERE key = ?",
+            [(key,) for key in keys],
+        )
+
+
+def load_clean_occurrences(conn: sqlite3.Connection) -> pd.DataFrame:
+    # Stored in key order so output is stable run-to-run
+    clean_rows = []
+    for (rows,) in conn.execute("SELECT rows FROM clean_occurrences ORDER BY key"):
+        clean_rows.extend(json.loads(rows))
+
+    return pd.DataFrame(clean_rows)
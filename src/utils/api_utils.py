@@ -29,3 +29,60 @@ def find_field(data, key):
                 return result
 
     return None  # Otherwise key not found
+
+
+# Walk nested values once, collecting first non-None match for each pending key
+def collect_nested_fields(data, pending: set, found: dict) -> None:
+    if isinstance(data, dict):
+        # Like find_field, a dict holding a key ends the search in that subtree
+        # (even if its value is None), so only descend for keys it lacks
+        descend = set()
+        for key in pending:
+            if key not in data:
+                descend.add(key)
+            elif data[key] is not None:
+                found[key] = data[key]
+        children = data.values()
+
+    elif isinstance(data, list):
+        descend = pending
+        children = data
+
+    else:
+        return
+
+    found_count = len(found)
+
+    for child in children:
+        if not descend:
+            return
+        if not isinstance(child, (dict, list)):
+            continue
+
+        collect_nested_fields(child, descend, found)
+
+        # Drop keys matched in that child, so later siblings skip them
+        if len(found) != found_count:
+            descend = {key for key in descend if key not in found}
+            found_count = len(found)
+
+
+# Same result as {key: find_field(data, key) for key in keys}, in one pass:
+# top-level keys are direct lookups, & all missing ones share a single walk
+def find_fields(data: dict, keys: list) -> dict:
+    extracted = {}
+    missing = set()
+
+    for key in keys:
+        if key in data:
+            extracted[key] = data[key]
+        else:
+            missing.add(key)
+
+    if not missing:
+        return extracted
+
+    found = {}
+    collect_nested_fields(data, missing, found)
+
+    return {key: extracted[key] if key in extracted else found.get(key) for key in keys}
@@ -5,19 +5,28 @@
 ###############################################################################
 
 
+import gzip
 import json
 import os
-from typing import Literal, Optional, Union
+from string import Formatter
+from typing import Callable, Iterable, Iterator, Literal, Optional, Union
 
+import numpy as np
 import pandas as pd
 
 from src.utils.api_utils import (
-    find_field,
+    find_fields,
 )
 
 DATA_FOLDER_PY_CSV = "outputs"
 DATA_FOLDER_WEB_JSON = "website/src/assets/data/json"
 
+# What pandas infers for object columns holding lists / dicts (vs plain values)
+NESTED_INFERRED_TYPES = {"mixed", "mixed-integer"}
+
+# Odd 64-bit multiplier (FNV prime) for folding per-column hashes into 1 per row
+ROW_HASH_MULTIPLIER = np.uint64(0x100000001B3)
+
 
 def get_folder_name(file_name: str) -> str:
     if not file_name:
@@ -33,7 +42,8 @@ def folder_exists(file_name: str, create: bool = False) -> bool:
 
     if create and not os.path.exists(folder):
         print(f"Folder '{folder}' not found. Creating it...")
-        os.makedirs(folder)
+        # Another thread may create it at the same time (e.g. parallel exports)
+        os.makedirs(folder, exist_ok=True)
 
     return os.path.exists(folder)
 
@@ -77,6 +87,36 @@ def export_to_csv(csv_file: str, dataframe: pd.DataFrame) -> None:
     print(f"Exported {len(dataframe)} entries to {csv_file}")
 
 
+def read_parquet(
+    parquet_file: str, columns: Optional[list[str]] = None
+) -> pd.DataFrame:
+    if not parquet_file:
+        raise ValueError("Error, must specify Parquet file to read")
+
+    if not os.path.exists(parquet_file):
+        raise ValueError("Error, Parquet file does not exist")
+
+    # Columnar, so only the requested columns are ever read from disk
+    return pd.read_parquet(parquet_file, columns=columns, engine="pyarrow")
+
+
+def export_to_parquet(parquet_file: str, dataframe: pd.DataFrame) -> None:
+    if not parquet_file:
+        raise ValueError("Error, must specify Parquet file path")
+
+    if not isinstance(dataframe, pd.DataFrame):
+        raise ValueError("Error, must specify a valid DataFrame to export")
+
+    if dataframe.empty:
+        raise ValueError("Error, must specify a non-empty DataFrame to export")
+
+    # Proceed with creating folder if doesn't exist, then export Parquet
+    _ = folder_exists(parquet_file, True)
+    dataframe.to_parquet(parquet_file, index=False, engine="pyarrow")
+
+    print(f"Exported {len(dataframe)} entries to {parquet_file}")
+
+
 def export_to_json(json_file: str, output_item: Union[list, dict]) -> None:
     if not json_file:
         raise ValueError("Error, must specify JSON file path")
@@ -99,6 +139,51 @@ def export_to_json(json_file: str, output_item: Union[list, dict]) -> None:
     print(f"Exported JSON to {json_file} ({description})")
 
 
+def open_maybe_gzip(file_name: str, mode: str):
+    # Transparently (de)compress any file path ending in ".gz"
+    if file_name.endswith(".gz"):
+        return gzip.open(file_name, mode + "t", encoding="utf-8")
+    return open(file_name, mode, encoding="utf-8")
+
+
+def export_to_jsonl(jsonl_file: str, records: Iterable[dict]) -> int:
+    if not jsonl_file:
+        raise ValueError("Error, must specify JSONL file path")
+
+    # Write to temp file first, so a failed fetch never clobbers a good file
+    # (prefixed rather than suffixed, to keep any ".gz" extension intact)
+    _ = folder_exists(jsonl_file, True)
+    temp_file = os.path.join(
+        get_folder_name(jsonl_file), f".partial-{os.path.basename(jsonl_file)}"
+    )
+    count = 0
+
+    with open_maybe_gzip(temp_file, "w") as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")))
+            f.write("\n")
+            count += 1
+
+    os.replace(temp_file, jsonl_file)
+
+    print(f"Exported {count} entries to {jsonl_file}")
+    return count
+
+
+def read_jsonl(jsonl_file: str) -> Iterator[dict]:
+    if not jsonl_file:
+        raise ValueError("Error, must specify JSONL to read")
+
+    if not os.path.exists(jsonl_file):
+        raise ValueError("Error, JSONL does not exist")
+
+    # Lazily yield one record per line (never loads whole file)
+    with open_maybe_gzip(jsonl_file, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
 def csv_to_json(
     input_csv_file: str, output_json_file: str, convert_types: Optional[bool] = False
 ) -> None:
@@ -187,7 +272,8 @@ def extract_relevant_fields(data: dict, fields: list) -> dict:
     if not fields and isinstance(fields, list):
         raise ValueError("ERROR: must specify fields (list)")
 
-    extracted_data = {field: find_field(data, field) for field in fields}
+    # Single walk per record for all fields (first match wins, as find_field)
+    extracted_data = find_fields(data, fields)
     return extracted_data
 
 
@@ -207,6 +293,91 @@ def validate_and_dropna(
     return dataframe.dropna(subset=na_subset, how=how)
 
 
+def map_unique_values(series: pd.Series, func: Callable) -> np.ndarray:
+    # Apply func once per distinct value (not per row), then broadcast back
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    mapped = np.empty(len(uniques), dtype=object)
+    mapped[:] = [func(value) for value in uniques]
+
+    return mapped[codes]
+
+
+def format_columns(columns: list[pd.Series], format_str: str) -> pd.Series:
+    # Same as format_str.format(*row) per row (e.g. "{0} ({1})"), but built
+    # column-wise from the literal text & str values of each column
+    formatted = pd.Series("", index=columns[0].index, dtype=object)
+
+    for literal, field, _, _ in Formatter().parse(format_str):
+        formatted = formatted + literal
+        if field is not None:
+            formatted = formatted + columns[int(field)].astype(object).astype(str)
+
+    return formatted
+
+
+def join_unique_values(
+    groups: pd.Series, values: pd.Series, sort: bool = False, sep: str = ", "
+) -> pd.Series:
+    # Distinct (non-null) values per group as one str, e.g. "Adult (2019), ...",
+    # in order first seen (or sorted). One dedupe & stable sort for all groups,
+    # then each group's run of values is joined (no Python lambda per group)
+    pairs = pd.DataFrame({"group": groups, "value": values}).dropna()
+    pairs = pairs.drop_duplicates()
+    if pairs.empty:
+        return pd.Series(dtype=object)
+
+    if sort:
+        pairs = pairs.sort_values("value", kind="stable")
+
+    group_codes, group_keys = pd.factorize(pairs["group"])
+    order = np.argsort(group_codes, kind="stable")
+    sorted_values = pairs["value"].to_numpy()[order].tolist()
+
+    bounds = np.flatnonzero(np.diff(group_codes[order])) + 1
+    starts = np.concatenate([[0], bounds])
+    ends = np.concatenate([bounds, [len(sorted_values)]])
+
+    joined = [sep.join(sorted_values[start:end]) for start, end in zip(starts, ends)]
+    return pd.Series(joined, index=group_keys, dtype=object)
+
+
+def stringify_nested_values(series: pd.Series) -> pd.Series:
+    # Only object columns holding non-scalars (lists, dicts) infer as "mixed",
+    # so plain text / numeric columns are returned as-is (no per-value copy)
+    if series.dtype != object:
+        return series
+    if pd.api.types.infer_dtype(series, skipna=True) not in NESTED_INFERRED_TYPES:
+        return series
+
+    is_nested = np.fromiter(
+        (isinstance(value, (list, dict)) for value in series.to_numpy()),
+        dtype=bool,
+        count=len(series),
+    )
+    return series.where(~is_nested, series[is_nested].map(str))
+
+
+def hash_rows(
+    dataframe: pd.DataFrame, columns: Optional[list[str]] = None
+) -> np.ndarray:
+    # Stable 64-bit fingerprint per row. Columns are hashed one at a time (no
+    # wide copy of the frame), then folded together in sorted name order
+    columns = sorted(dataframe.columns if columns is None else columns)
+
+    fingerprints = np.zeros(len(dataframe), dtype=np.uint64)
+    for column in columns:
+        # Hash each distinct value once, then broadcast back to every row
+        codes, uniques = pd.factorize(dataframe[column], use_na_sentinel=False)
+        unique_hashes = pd.util.hash_pandas_object(
+            pd.Series(uniques), index=False, categorize=False
+        )
+        fingerprints = (
+            fingerprints * ROW_HASH_MULTIPLIER ^ unique_hashes.to_numpy()[codes]
+        )
+
+    return fingerprints
+
+
 def move_columns(
     dataframe: pd.DataFrame,
     cols_to_move: list[str],
@@ -235,6 +406,7 @@ def move_columns(
         position = max(0, min(position, len(remaining_cols)))
         new_order = remaining_cols[:position] + cols_to_move + remaining_cols[position:]
 
+    # Under copy-on-write, a reordered view (columns only copied if written to)
     return dataframe[new_order]
 
 
@@ -268,11 +440,15 @@ def standardize_column_vals(
     if not all(isinstance(val, type(valid_vals[0])) for val in valid_vals):
         raise ValueError("Error, fill_val type must match valid_vals type")
 
-    # Standardize values for column (fill with default if not in list)
-    dataframe.loc[:, col_name] = dataframe[col_name].apply(
-        lambda x: x if x in valid_vals else fill_val
+    # Standardize values for column (fill with default if not in list),
+    # returned as a new frame so the caller's frame is left as is
+    return dataframe.assign(
+        **{
+            col_name: dataframe[col_name].apply(
+                lambda x: x if x in valid_vals else fill_val
+            )
+        }
     )
-    return dataframe
 
 
 #####
@@ -280,14 +456,58 @@ def standardize_column_vals(
 #####
 
 
+def count_rows(
+    dataframe: pd.DataFrame, groupby: list[str], count_column: Optional[str] = None
+) -> pd.Series:
+    if not isinstance(groupby, list):
+        raise ValueError("Error, must specify groupby")
+
+    # Pre-aggregated frames (e.g. occurrence cube) carry a count per row instead
+    grouped = dataframe.groupby(groupby, observed=True)
+    if count_column is None:
+        return grouped.size()
+    return grouped[count_column].sum()
+
+
+def pivot_counts(
+    dataframe: pd.DataFrame,
+    index: list[str],
+    columns: str,
+    count_column: Optional[str] = None,
+) -> pd.DataFrame:
+    if count_column is None:
+        return dataframe.pivot_table(
+            index=index, columns=columns, aggfunc="size", fill_value=0, observed=True
+        )
+    return dataframe.pivot_table(
+        index=index,
+        columns=columns,
+        values=count_column,
+        aggfunc="sum",
+        fill_value=0,
+        observed=True,
+    )
+
+
 def add_totals_column(
-    source_df: pd.DataFrame, target_df: pd.DataFrame, groupby: list[str]
+    source_df: pd.DataFrame,
+    target_df: pd.DataFrame,
+    groupby: list[str],
+    count_column: Optional[str] = None,
 ) -> pd.DataFrame:
     if not isinstance(groupby, list):
         raise ValueError("Error, must specify groupby")
 
-    target_df["Total Occurrences"] = target_df.index.map(
-        source_df.groupby(groupby).size()
+    # Reindex rather than index.map: a CategoricalIndex maps its unused
+    # categories too (e.g. an excluded "Unknown"), turning counts into floats
+    totals = count_rows(source_df, groupby, count_column=count_column)
+    target_df = target_df.assign(
+        **{
+            "Total Occurrences": totals.reindex(target_df.index)
+            .fillna(0)
+            .astype(int)
+            .to_numpy()
+        }
     )
     target_df = move_columns(
         target_df, cols_to_move=["Total Occurrences"], position="front"
@@ -317,38 +537,86 @@ def get_str_with_year_range(
     return full_str
 
 
-def add_avg_per_year(
+def get_year_window_mask(
+    years: np.ndarray,
+    after_year: Optional[int] = None,
+    before_year: Optional[int] = None,
+) -> np.ndarray:
+    # Same bounds as labelled by get_str_with_year_range (range is inclusive)
+    if after_year and before_year:
+        return (years >= after_year) & (years <= before_year)
+    elif after_year:
+        return years > after_year
+    elif before_year:
+        return years < before_year
+
+    return np.ones(len(years), dtype=bool)
+
+
+def add_avg_per_year_windows(
     source_df: pd.DataFrame,
     target_df: pd.DataFrame,
     groupby: list[str],
-    after_year: Optional[int] = None,
-    before_year: Optional[int] = None,
+    year_windows: list[tuple[Optional[int], Optional[int]]],
+    count_column: Optional[str] = None,
 ) -> pd.DataFrame:
     if not isinstance(groupby, list):
         raise ValueError("Error, must specify groupby")
+    if not year_windows:
+        raise ValueError("Error, must specify year_windows")
 
     source_df = validate_and_dropna(source_df, na_subset=["year"])
 
-    column_name_base = "Avg Per Year"
-    column_name = get_str_with_year_range(
-        column_name_base, after_year=after_year, before_year=before_year
+    # Get total occurrences per [{metric}, year] grouping just once, then
+    # average each (after_year, before_year) window from those counts
+    yearly_counts = count_rows(source_df, groupby + ["year"], count_column)
+    group_codes, groups = pd.factorize(yearly_counts.index.droplevel("year"))
+    years = yearly_counts.index.get_level_values("year").to_numpy(dtype=float)
+    counts = yearly_counts.to_numpy(dtype=float)
+
+    window_columns = {}
+    for after_year, before_year in year_windows:
+        column_name = get_str_with_year_range(
+            "Avg Per Year", after_year=after_year, before_year=before_year
+        )
+        in_window = get_year_window_mask(years, after_year, before_year)
+
+        # Mean over years (with any occurrences) in window, NaN if there are none
+        window_totals = np.bincount(
+            group_codes, weights=counts * in_window, minlength=len(groups)
+        )
+        window_years = np.bincount(
+            group_codes, weights=in_window, minlength=len(groups)
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            avg_per_year = pd.Series(window_totals / window_years, index=groups)
+
+        window_columns[column_name] = target_df.index.map(avg_per_year.round(2))
+
+    # Windows lead in the order given
+    target_df = target_df.assign(**window_columns)
+    target_df = move_columns(
+        target_df, cols_to_move=list(window_columns), position="front"
     )
 
-    if after_year and before_year:
-        source_df = source_df[source_df["year"].between(after_year, before_year)]
-    elif after_year:
-        source_df = source_df[source_df["year"] > after_year]
-    elif before_year:
-        source_df = source_df[source_df["year"] < before_year]
-
-    # Get total occurrences per [{metric}, year] grouping, then average
-    yearly_counts = source_df.groupby(groupby + ["year"]).size()
-    avg_per_year = yearly_counts.groupby(groupby).mean().round(2)
+    return target_df
 
-    target_df[column_name] = target_df.index.map(avg_per_year)
-    target_df = move_columns(target_df, cols_to_move=[column_name], position="front")
 
-    return target_df
+def add_avg_per_year(
+    source_df: pd.DataFrame,
+    target_df: pd.DataFrame,
+    groupby: list[str],
+    after_year: Optional[int] = None,
+    before_year: Optional[int] = None,
+    count_column: Optional[str] = None,
+) -> pd.DataFrame:
+    return add_avg_per_year_windows(
+        source_df,
+        target_df,
+        groupby,
+        year_windows=[(after_year, before_year)],
+        count_column=count_column,
+    )
 
 
 def add_top_x_metric(
@@ -358,6 +626,7 @@ def add_top_x_metric(
     top_x: int,
     metric: str,
     column_name: str,
+    count_column: Optional[str] = None,
 ) -> pd.DataFrame:
     if not isinstance(groupby, list):
         raise ValueError("Error, must specify groupby")
@@ -369,25 +638,24 @@ def add_top_x_metric(
         raise ValueError("Error, must specify column_name")
 
     top_metric = (
-        occurrences_df.groupby(groupby + [metric])
-        .size()
+        count_rows(occurrences_df, groupby + [metric], count_column)
         .reset_index(name="count")
         .sort_values(groupby + ["count"], ascending=[True] * len(groupby) + [False])
     )
 
     # Keep only top {x} {metric} per {category}
     # e.g. top 3 countries / regions visited by publishingCountry
-    top_metric["rank"] = top_metric.groupby(groupby)["count"].rank(
+    top_metric["rank"] = top_metric.groupby(groupby, observed=True)["count"].rank(
         method="first", ascending=False
     )
     top_metric = top_metric[top_metric["rank"] <= top_x].drop(columns=["rank", "count"])
 
     # Convert to single column format (countries separated by commas)
-    top_metric = top_metric.groupby(groupby)[metric].apply(
+    top_metric = top_metric.groupby(groupby, observed=True)[metric].apply(
         lambda x: " > ".join(x.tolist())
     )
-    target_df[column_name] = target_df.index.get_level_values(groupby[0]).map(
-        top_metric
+    target_df = target_df.assign(
+        **{column_name: target_df.index.get_level_values(groupby[0]).map(top_metric)}
     )
 
     target_df = move_column_after(
@@ -0,0 +1,32 @@
+###############################################################################
+##  `executor_utils.py`                                                      ##
+##                                                                           ##
+##  Purpose: Shared helpers for running work on thread / process pools       ##
+###############################################################################
+
+
+from collections import deque
+from concurrent.futures import Executor
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+
+
+def iter_ordered_results(
+    executor: Executor, func: Callable, args: Iterable, window: int
+) -> Iterator:
+    """
+    Run `func(arg)` for each arg on the executor & yield results in `args`
+    order (regardless of which finishes first), keeping at most `window`
+    calls in flight so memory stays flat even if the consumer (e.g. a file
+    writer) is slower than the network.
+    """
+    args = iter(args)
+    pending = deque(executor.submit(func, arg) for arg in islice(args, window))
+
+    while pending:
+        result = pending.popleft().result()
+
+        for next_arg in islice(args, 1):
+            pending.append(executor.submit(func, next_arg))
+
+        yield result
@@ -0,0 +1,116 @@
+###############################################################################
+##  `geography_utils.py`                                                     ##
+##                                                                           ##
+##  Purpose: Disk-cached ISO code -> country -> continent lookup table, so   ##
+##           cleaning maps each unique value once instead of once per row    ##
+###############################################################################
+
+
+import json
+import os
+import re
+from typing import Callable, Iterable
+
+import country_converter as coco
+import pycountry_convert as pc
+
+from src.config import (
+    convert_country_to_continent,
+    convert_ISO_code_to_country,
+)
+from src.gbif.constants import (
+    GEOGRAPHY_LOOKUP_JSON,
+)
+from src.utils.data_utils import (
+    folder_exists,
+)
+from src.utils.lazy_utils import (
+    lazy_resource,
+)
+
+# Table is rebuilt whenever either library (i.e. its country data) changes
+PYCOUNTRY_CONVERT_VERSION = getattr(pc, "__version__", "unknown")
+GEOGRAPHY_LOOKUP_VERSION = f"coco={coco.__version__};pc={PYCOUNTRY_CONVERT_VERSION}"
+
+ISO2_CODE_PATTERN = re.compile(r"^[A-Z]{2}$")
+
+
+def build_geography_lookup() -> dict:
+    # country_converter's batch convert loads its data once for all codes
+    # (calling it per code reloads everything each time)
+    iso2_codes = [
+        code
+        for code in coco.CountryConverter().data["ISO2"]
+        if ISO2_CODE_PATTERN.match(code)
+    ]
+    country_names = coco.convert(names=iso2_codes, to="name")
+
+    code_to_country = dict(zip(iso2_codes, country_names))
+    code_to_country.update({code: "Unknown" for code in ["ZZ", "XX", ""]})
+
+    # Seed with every name pycountry_convert knows, plus coco's short names
+    known_names = set(pc.map_countries()) | set(country_names)
+    country_to_continent = {
+        name: convert_country_to_continent(name) for name in sorted(known_names)
+    }
+
+    return {
+        "version": GEOGRAPHY_LOOKUP_VERSION,
+        "code_to_country": code_to_country,
+        "country_to_continent": country_to_continent,
+    }
+
+
+def save_geography_lookup(lookup: dict, json_file: str = GEOGRAPHY_LOOKUP_JSON) -> None:
+    _ = folder_exists(json_file, True)
+
+    # Swap in complete file, so parallel cleaners never read half a table
+    temp_file = f"{json_file}.{os.getpid()}.tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(lookup, f, ensure_ascii=False, sort_keys=True)
+    os.replace(temp_file, json_file)
+
+
+@lazy_resource
+def get_geography_lookup(json_file: str = GEOGRAPHY_LOOKUP_JSON) -> dict:
+    if os.path.exists(json_file):
+        with open(json_file, "r", encoding="utf-8") as f:
+            lookup = json.load(f)
+
+        if lookup.get("version") == GEOGRAPHY_LOOKUP_VERSION:
+            return lookup
+
+    print(f"Building geography lookup table: {json_file}")
+    lookup = build_geography_lookup()
+    save_geography_lookup(lookup, json_file)
+
+    return lookup
+
+
+def lookup_values(
+    table_name: str,
+    values: Iterable[str],
+    convert: Callable[[str], str],
+    json_file: str = GEOGRAPHY_LOOKUP_JSON,
+) -> dict:
+    values = list(values)
+    lookup = get_geography_lookup(json_file)
+    table = lookup[table_name]
+
+    # Anything not seen before is converted once, then remembered on disk
+    misses = list(dict.fromkeys(value for value in values if value not in table))
+    if misses:
+        table.update({value: convert(value) for value in misses})
+        save_geography_lookup(lookup, json_file)
+
+    return {value: table[value] for value in values}
+
+
+def lookup_country_names(codes: Iterable[str]) -> dict:
+    return lookup_values("code_to_country", codes, convert_ISO_code_to_country)
+
+
+def lookup_continents(country_names: Iterable[str]) -> dict:
+    return lookup_values(
+        "country_to_continent", country_names, convert_country_to_continent
+    )
@@ -5,27 +5,99 @@
 ###############################################################################
 
 
-import geopandas as gpd
-from shapely.geometry import Point
+from functools import lru_cache
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from src.utils.lazy_utils import (
+    lazy_import,
+    lazy_resource,
+)
+
+gpd = lazy_import("geopandas")
+shapely = lazy_import("shapely")
 
 LME_SHAPEFILE = "data/lme66/lme66.shp"
 
+# Coords are rounded (~1 m) before lookup, so repeat fixes share one result
+LME_COORD_DECIMALS = 5
+
+# Single-point lookups remembered (bounded, least recently used dropped first)
+LME_CACHE_SIZE = 65_536
+
+
+# Load all possible LMEs (Large Marine Ecosystems) just ONCE from shapefile,
+# on first lookup rather than at import
+@lazy_resource
+def get_lme_gdf():
+    return gpd.read_file(LME_SHAPEFILE)
+
+
+# Spatial index over prepared LME polygons: bounding boxes narrow each point
+# down to a few candidates, then only those get an exact containment test
+@lazy_resource
+def get_lme_tree():
+    lme_gdf = get_lme_gdf()
+
+    geometries = lme_gdf.geometry.to_numpy()
+    shapely.prepare(geometries)
+
+    return shapely.STRtree(geometries), lme_gdf["LME_NAME"].to_numpy(dtype=object)
+
+
+def get_LMEs_from_coords(lats: Iterable[float], lons: Iterable[float]) -> np.ndarray:
+    lats = np.round(np.asarray(lats, dtype=float), LME_COORD_DECIMALS)
+    lons = np.round(np.asarray(lons, dtype=float), LME_COORD_DECIMALS)
+    if lats.shape != lons.shape:
+        raise ValueError("Error, lats & lons must be the same length")
+
+    # Missing / non-finite coords can't fall in any LME
+    lme_per_coord = np.full(lats.shape, "Unknown", dtype=object)
+    is_valid = np.isfinite(lats) & np.isfinite(lons)
+    if not is_valid.any():
+        return lme_per_coord
+
+    # Look up each distinct coord just once
+    coord_codes, coords = pd.factorize(
+        pd.MultiIndex.from_arrays([lats[is_valid], lons[is_valid]])
+    )
+    lme_tree, lme_names = get_lme_tree()
+
+    unique_lats, unique_lons = np.array(coords.tolist(), dtype=float).T
+    points = shapely.points(unique_lons, unique_lats)
+
+    # Bounding-box candidates, then exact test with the (prepared) polygons
+    # as the tested side: polygon.contains(point) == point.within(polygon)
+    point_idx, lme_idx = lme_tree.query(points)
+    is_inside = shapely.contains(lme_tree.geometries[lme_idx], points[point_idx])
+    point_idx, lme_idx = point_idx[is_inside], lme_idx[is_inside]
+
+    # First LME (in shapefile order) that contains each point, else Unknown
+    first_lme = np.full(len(coords), len(lme_names))
+    np.minimum.at(first_lme, point_idx, lme_idx)
+    coord_names = np.append(lme_names, "Unknown")[first_lme]
+
+    # Code -1 (no distinct coord) must not wrap around to the last coord's LME
+    lme_per_coord[is_valid] = np.where(
+        coord_codes == -1, "Unknown", coord_names[coord_codes]
+    )
+    return lme_per_coord
+
 
-# Load all possible LMEs (Large Marine Ecosystems) just ONCE from shapefile
-lme_gdf = gpd.read_file(LME_SHAPEFILE)
+@lru_cache(maxsize=LME_CACHE_SIZE)
+def _get_LME_from_rounded_coords(lat: float, lon: float) -> str:
+    return get_LMEs_from_coords([lat], [lon])[0]
 
 
 def get_LME_from_coords(lat: float, lon: float) -> str:
-    # Create a point geometry & find LME that contains it
-    point = Point(lon, lat)
-    lme_match = lme_gdf[lme_gdf.contains(point)]
-
-    if not lme_match.empty:
-        lme_name = lme_match.iloc[0]["LME_NAME"]
-        return lme_name
-    else:
-        # print(f"Point ({lat},{lon}) is not inside any LME boundary.")
-        return "Unknown"
+    # Round before the cache (as the batch lookup does), so near-identical
+    # GPS fixes share one cache entry & one result
+    return _get_LME_from_rounded_coords(
+        float(np.round(lat, LME_COORD_DECIMALS)),
+        float(np.round(lon, LME_COORD_DECIMALS)),
+    )
 
 
 if __name__ == "__main__":
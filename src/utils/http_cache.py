@@ -0,0 +1,312 @@
+###############################################################################
+##  `http_cache.py`                                                          ##
+##                                                                           ##
+##  Purpose: On-disk record/replay cache for pipeline network calls, with    ##
+##           ETag / Last-Modified revalidation & size-based eviction         ##
+###############################################################################
+
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from dotenv import load_dotenv
+from requests.structures import CaseInsensitiveDict
+
+from src.utils.lazy_utils import lazy_resource
+from src.utils.request_scheduler import RequestScheduler, get_request_scheduler
+
+load_dotenv()
+
+# Kept outside data/ (which zip_data bundles into data.zip)
+HTTP_CACHE_FOLDER = os.getenv("HTTP_CACHE_FOLDER", ".http_cache")
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", 2 * 1024**3))
+
+# Cache modes:
+#   off           always go to network, never read or record
+#   revalidate    always go to network (conditionally, if validators stored)
+#                 & record responses; 304 Not Modified is served from disk
+#   prefer_cache  serve from disk when present, otherwise fetch & record
+#   replay        strict offline: serve from disk, raise on any cache miss
+# Off unless a run opts in (e.g. HTTP_CACHE_MODE=revalidate), so normal
+# fetches don't quietly fill up to HTTP_CACHE_MAX_BYTES of disk
+CACHE_MODES = {"off", "revalidate", "prefer_cache", "replay"}
+HTTP_CACHE_MODE = os.getenv("HTTP_CACHE_MODE", "off")
+
+
+class CacheMissError(RuntimeError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def canonicalize_url(url: str) -> str:
+    # Sort query params so {"a": 1, "b": 2} & {"b": 2, "a": 1} share an entry
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit(parts._replace(query=query, fragment=""))
+
+
+def make_cache_key(method: str, url: str, body: Optional[bytes] = None) -> str:
+    hasher = hashlib.sha256()
+    hasher.update(method.upper().encode())
+    hasher.update(b"\n")
+    hasher.update(canonicalize_url(url).encode())
+    hasher.update(b"\n")
+    hasher.update(body or b"")
+    return hasher.hexdigest()
+
+
+class HTTPCache:
+    """
+    Content-addressed response store: each request hashes (method, URL +
+    params, body) to a key, saved as `{key}.json` (status, headers, url)
+    plus `{key}.body` (raw bytes), fanned out by key prefix.
+
+    Least-recently-used entries are evicted once total size exceeds
+    max_bytes (access time tracked via file mtime, touched on every hit).
+    """
+
+    def __init__(
+        self, folder: str = HTTP_CACHE_FOLDER, max_bytes: int = HTTP_CACHE_MAX_BYTES
+    ):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+    def _paths(self, key: str) -> tuple[str, str]:
+        base = os.path.join(self.folder, key[:2], key)
+        return f"{base}.json", f"{base}.body"
+
+    def load(self, key: str) -> Optional[tuple[dict, bytes]]:
+        meta_path, body_path = self._paths(key)
+
+        # A concurrent store() may evict the entry at any point (between
+        # reads, or before the touch), which just counts as a cache miss
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+
+            # Mark as recently used (for LRU eviction)
+            now = time.time()
+            os.utime(body_path, (now, now))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        return meta, body
+
+    def store(self, key: str, meta: dict, body: bytes) -> None:
+        meta_path, body_path = self._paths(key)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+
+        with self._lock:
+            previous_size = self._entry_size(key)
+
+            # Write to temp files then swap in, so readers never see half an entry
+            for path, content, mode in [
+                (body_path, body, "wb"),
+                (meta_path, json.dumps(meta).encode("utf-8"), "wb"),
+            ]:
+                temp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(temp_path, mode) as f:
+                    f.write(content)
+                os.replace(temp_path, path)
+
+            self._add_bytes(self._entry_size(key) - previous_size)
+            self._evict_if_needed()
+
+    def _entry_size(self, key: str) -> int:
+        return sum(
+            os.path.getsize(path) for path in self._paths(key) if os.path.exists(path)
+        )
+
+    def _add_bytes(self, size_delta: int) -> None:
+        # Scan folder size just once, then track running total
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._scan_entries())
+        else:
+            self._total_bytes += size_delta
+
+    def _scan_entries(self) -> list[tuple[str, int, float]]:
+        entries = []
+
+        for root, _, files in os.walk(self.folder):
+            for file_name in files:
+                if not file_name.endswith(".body"):
+                    continue
+
+                key = file_name[: -len(".body")]
+                size = self._entry_size(key)
+                last_used = os.path.getmtime(os.path.join(root, file_name))
+                entries.append((key, size, last_used))
+
+        return entries
+
+    def _evict_if_needed(self) -> None:
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        # Drop least-recently-used entries until back under budget
+        for key, size, _ in sorted(self._scan_entries(), key=lambda x: x[2]):
+            if self._total_bytes <= self.max_bytes:
+                break
+
+            for path in self._paths(key):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._total_bytes -= size
+
+
+def build_cached_response(
+    meta: dict, body: bytes, request: Optional[requests.PreparedRequest] = None
+) -> requests.Response:
+    response = requests.Response()
+    response.status_code = meta["status_code"]
+    response.reason = meta.get("reason", "OK")
+    response.headers = CaseInsensitiveDict(meta.get("headers", {}))
+    response.url = meta.get("url", "")
+    response.encoding = meta.get("encoding")
+    response._content = body
+    response.request = request
+
+    return response
+
+
+class CachedSession(requests.Session):
+    """
+    Drop-in requests.Session that records responses to (& replays them from)
+    an HTTPCache, according to `mode` (see CACHE_MODES).
+
+    Streaming requests (e.g. multi-GB download archives) bypass the cache.
+    Cache misses go out through the (shared) RequestScheduler, so they're
+    rate limited per host & retried on transient failures.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[HTTPCache] = None,
+        mode: str = HTTP_CACHE_MODE,
+        scheduler: Optional[RequestScheduler] = None,
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Error, cache mode must be one of {CACHE_MODES}")
+
+        super().__init__()
+        self.cache = cache if cache is not None else get_http_cache()
+        self.mode = mode
+        self.scheduler = scheduler if scheduler is not None else get_request_scheduler()
+
+    def send_scheduled(self, method, url, **kwargs) -> requests.Response:
+        return self.scheduler.request(
+            url,
+            lambda: super(CachedSession, self).request(method, url, **kwargs),
+            method=method,
+            stream=bool(kwargs.get("stream")),
+        )
+
+    def request(self, method, url, **kwargs) -> requests.Response:
+        if self.mode == "off" or kwargs.get("stream"):
+            return self.send_scheduled(method, url, **kwargs)
+
+        prepared = self.prepare_request(
+            requests.Request(
+                method=method.upper(),
+                url=url,
+                params=kwargs.get("params"),
+                data=kwargs.get("data"),
+                json=kwargs.get("json"),
+            )
+        )
+        body = (
+            prepared.body.encode() if isinstance(prepared.body, str) else prepared.body
+        )
+        key = make_cache_key(prepared.method, prepared.url, body)
+        cached = self.cache.load(key)
+
+        if cached is not None and self.mode in {"prefer_cache", "replay"}:
+            return build_cached_response(*cached, request=prepared)
+
+        if self.mode == "replay":
+            raise CacheMissError(f"Error, no recorded response for {method} {url}")
+
+        # Revalidate: only download body again if server says it changed
+        if cached is not None:
+            meta, _ = cached
+            validators = {}
+            if meta.get("etag"):
+                validators["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                validators["If-Modified-Since"] = meta["last_modified"]
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **validators}
+
+        response = self.send_scheduled(method, url, **kwargs)
+
+        if response.status_code == 304 and cached is not None:
+            return build_cached_response(*cached, request=response.request)
+
+        if response.status_code == 200:
+            meta = {
+                "status_code": response.status_code,
+                "reason": response.reason,
+                "headers": dict(response.headers),
+                "url": response.url,
+                "encoding": response.encoding,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            self.cache.store(key, meta, response.content)
+
+        return response
+
+
+def cached_call(
+    namespace: str,
+    payload: Any,
+    func: Callable[[], Any],
+    mode: str = HTTP_CACHE_MODE,
+    cache: Optional[HTTPCache] = None,
+) -> Any:
+    """
+    Record/replay for non-HTTP-library calls (e.g. Ollama client), keyed on
+    a namespace (e.g. "ollama/generate") & JSON-serializable payload.
+    The result of `func()` must be JSON-serializable too.
+    """
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Error, cache mode must be one of {CACHE_MODES}")
+
+    if mode == "off":
+        return func()
+
+    cache = cache if cache is not None else get_http_cache()
+    body = json.dumps(payload, sort_keys=True).encode("utf-8")
+    key = make_cache_key("CALL", namespace, body)
+    cached = cache.load(key)
+
+    # Plain function calls have no validators, so revalidate == re-record
+    if cached is not None and mode in {"prefer_cache", "replay"}:
+        return json.loads(cached[1])
+
+    if mode == "replay":
+        raise CacheMissError(f"Error, no recorded result for {namespace}")
+
+    result = func()
+    cache.store(key, {"status_code": 200}, json.dumps(result).encode("utf-8"))
+
+    return result
+
+
+@lazy_resource
+def get_http_cache() -> HTTPCache:
+    return HTTPCache()
+
+
+@lazy_resource
+def get_cached_session() -> CachedSession:
+    # Shared session for one-off calls (keep-alive + cache)
+    return CachedSession()
@@ -0,0 +1,128 @@
+###############################################################################
+##  `lazy_utils.py`                                                          ##
+##                                                                           ##
+##  Purpose: Defers heavy imports & startup resources until first use, and   ##
+##           benchmarks module import time (offline)                         ##
+###############################################################################
+
+
+import importlib
+import importlib.util
+import subprocess
+import sys
+from functools import lru_cache
+from types import ModuleType
+
+# Entry points that should import quickly (& without touching the network)
+IMPORT_BENCHMARK_MODULES = [
+    "src.gbif.fetch",
+    "src.gbif.clean",
+    "src.gbif.analyze",
+    "computer_vision.unfiltered_matching.match_embeddings",
+    "computer_vision.unfiltered_matching.validate_embeddings",
+    "computer_vision.plausible_matching.match_plausible_embeddings",
+    "computer_vision.shark_ranking.rank_shark_matches",
+]
+
+# Any socket connection during import is a bug, so make child runs fail loudly
+_OFFLINE_GUARD = """
+import socket
+
+def _blocked(*args, **kwargs):
+    raise RuntimeError("Network access attempted during import")
+
+socket.socket.connect = _blocked
+socket.create_connection = _blocked
+"""
+
+
+class MissingModule(ModuleType):
+    """
+    Stand-in for an optional dependency that isn't installed: importing the
+    module that needs it still works, & the error surfaces on first use.
+    """
+
+    def __getattr__(self, attr: str):
+        # Dunder probes (repr, pickling, hasattr checks) shouldn't count as use
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        raise ModuleNotFoundError(f"No module named '{self.__name__}'")
+
+
+def lazy_import(module_name: str) -> ModuleType:
+    """
+    Return a module whose real import runs on first attribute access.
+
+    Uses importlib's LazyLoader, so `torch = lazy_import("torch")` at module
+    level costs almost nothing until e.g. `torch.no_grad()` is first called.
+    Annotations referencing the module must stay as strings (evaluating
+    `torch.nn.Module` in a signature would trigger the import right away).
+    If the module isn't installed, ModuleNotFoundError is raised on first
+    attribute access instead of at import time.
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    spec = importlib.util.find_spec(module_name)
+    if spec is None:
+        return MissingModule(module_name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    loader.exec_module(module)
+
+    return module
+
+
+# Cache any zero/low-arg loader so its resource is built once, on first call
+lazy_resource = lru_cache(maxsize=None)
+
+
+def time_module_import(module_name: str) -> float:
+    # Fresh interpreter per module, so nothing is already cached in sys.modules
+    code = (
+        _OFFLINE_GUARD
+        + "import time\n"
+        + "start = time.perf_counter()\n"
+        + f"import {module_name}\n"
+        + "print(time.perf_counter() - start)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True
+    )
+
+    # A dependency that isn't installed here is skipped, not a failure
+    if result.returncode != 0 and "ModuleNotFoundError" in result.stderr:
+        raise ModuleNotFoundError(result.stderr.strip().splitlines()[-1])
+
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"Error, failed to import {module_name}:\n{result.stderr.strip()}"
+        )
+
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def benchmark_imports(module_names: list[str] = IMPORT_BENCHMARK_MODULES) -> dict:
+    timings = {}
+
+    for module_name in module_names:
+        try:
+            elapsed = time_module_import(module_name)
+            timings[module_name] = elapsed
+            print(f"{module_name}: {elapsed:.3f}s")
+        except ModuleNotFoundError as e:
+            timings[module_name] = None
+            print(f"{module_name}: skipped ({e})")
+        except RuntimeError as e:
+            timings[module_name] = None
+            print(e)
+
+    return timings
+
+
+if __name__ == "__main__":
+    benchmark_imports()
@@ -18,6 +18,10 @@ from src.utils.data_utils import (
     move_column_after,
     read_csv,
 )
+from src.utils.http_cache import (
+    cached_call,
+    get_cached_session,
+)
 
 GBIF_STORY_SHARKS_NAMED_CSV = "outputs/gbif_story_sharks_named.csv"
 GBIF_STORY_SHARKS_NAMED_JSON = "website/src/assets/data/gbif_story_sharks_named.json"
@@ -94,7 +98,7 @@ def prompt_API_LLM(prompt: str) -> str:
         # response = requests.get(f"{TEXT_GEN_URL_BASE}/{prompt}", params=API_PARAMS)
 
         # Use POST instead of GET for more reliability & security
-        response = requests.post(
+        response = get_cached_session().post(
             TEXT_GEN_URL_BASE,
             json={
                 "messages": [
@@ -117,20 +121,30 @@ def prompt_local_LLM(prompt: str, method: Literal["chat", "generate"]) -> str:
     if method not in {"chat", "generate"}:
         raise ValueError("Error, must specify either 'chat' or 'generate' method")
 
+    # Ollama client isn't requests-based, so record / replay its text output
+    payload = {"model": LOCAL_LLM_MODEL, "prompt": prompt}
+
     # Chat mode with user roles
     if method == "chat":
-        response = ollama.chat(
-            model=LOCAL_LLM_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            stream=False,
+        response_text = cached_call(
+            "ollama/chat",
+            payload,
+            lambda: ollama.chat(
+                model=LOCAL_LLM_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                stream=False,
+            )["message"]["content"],
         )
-        name = response["message"]["content"].strip()
 
     # Generate mode for simple output (method == "generate")
     else:
-        response = ollama.generate(model=LOCAL_LLM_MODEL, prompt=prompt, stream=False)
-        name = response["response"].strip()
+        response_text = cached_call(
+            "ollama/generate",
+            payload,
+            lambda: ollama.generate(model=LOCAL_LLM_MODEL, prompt=prompt)["response"],
+        )
 
+    name = response_text.strip()
     return name
 
 
@@ -239,7 +253,7 @@ def generate_image_API(prompt: str, shark_ID: str) -> str:
     seed = random.randint(0, 99999)
 
     try:
-        response = requests.get(
+        response = get_cached_session().get(
             f"{IMAGE_GEN_URL_BASE}/{prompt}?seed={seed}", params=API_IMAGE_PARAMS
         )
         response.raise_for_status()
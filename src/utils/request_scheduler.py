@@ -0,0 +1,294 @@
+###############################################################################
+##  `request_scheduler.py`                                                   ##
+##                                                                           ##
+##  Purpose: Shared per-host request scheduler (token bucket rate limit,     ##
+##           AIMD concurrency, jittered retries) for GBIF & media hosts      ##
+###############################################################################
+
+
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from src.utils.lazy_utils import lazy_resource
+
+logger = logging.getLogger(__name__)
+
+# Per-host ceilings: (requests / second, burst size, max concurrent requests).
+# GBIF is a shared public API, so it's kept modest; media hosts (S3 buckets
+# behind iNaturalist / Flickr etc) tolerate more
+HOST_RATE_LIMITS = {
+    "api.gbif.org": (10.0, 10, 8),
+}
+DEFAULT_RATE_LIMIT = (20.0, 20, 16)
+
+# Concurrency starts low & ramps up while responses stay healthy
+INITIAL_CONCURRENCY = 2
+MIN_CONCURRENCY = 1
+
+# AIMD: +1 slot per window of healthy responses, halve on trouble (at most
+# once per cooldown, so one burst of 429s doesn't collapse the limit)
+DECREASE_FACTOR = 0.5
+DECREASE_COOLDOWN_SECONDS = 1.0
+
+# Response slower than this multiple of the running average counts as a spike
+LATENCY_SPIKE_FACTOR = 3.0
+LATENCY_EWMA_ALPHA = 0.1
+LATENCY_MIN_SAMPLES = 10
+
+# Retries: full-jitter exponential backoff (honouring Retry-After if given).
+# Only idempotent methods are retried: resending e.g. a job-creation POST
+# could create the job twice
+RETRY_METHODS = {"GET", "HEAD"}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+
+
+def parse_retry_after(response: requests.Response) -> Optional[float]:
+    # Retry-After is either delay in seconds or an HTTP date
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def get_backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    delay = random.uniform(
+        0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2**attempt)
+    )
+    return max(delay, retry_after or 0.0)
+
+
+class HostLimiter:
+    """
+    Rate & concurrency limiter for a single host.
+
+    Requests first take a token (refilled at `rate` per second, up to `burst`),
+    then wait for one of `limit` concurrency slots. `limit` follows AIMD: it
+    grows by ~1 per window of healthy responses, up to `max_concurrency`, &
+    is cut by DECREASE_FACTOR on throttling, server errors, or latency spikes.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_concurrency: int,
+        initial_concurrency: int = INITIAL_CONCURRENCY,
+    ):
+        if rate <= 0 or burst < 1 or max_concurrency < 1:
+            raise ValueError("Error, rate, burst & max_concurrency must be positive")
+
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.limit = float(min(initial_concurrency, max_concurrency))
+
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._latency_ewma = None
+        self._latency_samples = 0
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._last_refill) * self.rate
+        )
+        self._last_refill = now
+
+    def acquire(self) -> None:
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+
+                # Paused (e.g. server sent Retry-After), out of tokens, or full
+                wait = self._paused_until - now
+                if wait <= 0 and self._tokens < 1:
+                    wait = (1 - self._tokens) / self.rate
+                if wait <= 0 and self._in_flight >= int(self.limit):
+                    wait = None
+
+                if wait is not None and wait <= 0:
+                    self._tokens -= 1
+                    self._in_flight += 1
+                    return
+
+                self._cond.wait(timeout=wait)
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def record_success(self, latency: float) -> None:
+        with self._cond:
+            is_spike = (
+                self._latency_samples >= LATENCY_MIN_SAMPLES
+                and latency > LATENCY_SPIKE_FACTOR * self._latency_ewma
+            )
+
+            if self._latency_ewma is None:
+                self._latency_ewma = latency
+            else:
+                self._latency_ewma += LATENCY_EWMA_ALPHA * (
+                    latency - self._latency_ewma
+                )
+            self._latency_samples += 1
+
+            if is_spike:
+                self._decrease()
+            else:
+                # Additive increase: +1/limit per response ~ +1 per full window
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+
+            self._cond.notify_all()
+
+    def record_failure(self, pause: float = 0.0) -> None:
+        with self._cond:
+            self._decrease()
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            self._cond.notify_all()
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < DECREASE_COOLDOWN_SECONDS:
+            return
+
+        self.limit = max(MIN_CONCURRENCY, self.limit * DECREASE_FACTOR)
+        self._last_decrease = now
+
+
+def hold_slot_until_closed(response: requests.Response, limiter: HostLimiter) -> None:
+    # A streamed body downloads after send() returns, so give the host slot
+    # back only once the caller closes the response (e.g. leaves its `with`)
+    close = response.close
+    released = threading.Event()
+
+    def close_and_release() -> None:
+        try:
+            close()
+        finally:
+            if not released.is_set():
+                released.set()
+                limiter.release()
+
+    response.close = close_and_release
+
+
+class RequestScheduler:
+    """
+    Routes each request through its host's HostLimiter & retries transient
+    failures (429 / 5xx / connection errors) of idempotent (GET / HEAD)
+    requests with jittered backoff; other methods get a single attempt.
+    Thread-safe, so one scheduler can be shared by every worker.
+
+    Streamed responses keep their concurrency slot until closed, so large
+    downloads count against the host's limit (callers must close them).
+    """
+
+    def __init__(
+        self,
+        host_limits: Optional[dict] = None,
+        default_limit: tuple = DEFAULT_RATE_LIMIT,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self.host_limits = HOST_RATE_LIMITS if host_limits is None else host_limits
+        self.default_limit = default_limit
+        self.max_retries = max_retries
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def get_limiter(self, url: str) -> HostLimiter:
+        host = urlsplit(url).hostname or ""
+
+        with self._lock:
+            if host not in self._limiters:
+                rate, burst, max_concurrency = self.host_limits.get(
+                    host, self.default_limit
+                )
+                self._limiters[host] = HostLimiter(rate, burst, max_concurrency)
+
+            return self._limiters[host]
+
+    def request(
+        self,
+        url: str,
+        send: Callable[[], requests.Response],
+        method: str = "GET",
+        stream: bool = False,
+    ) -> requests.Response:
+        limiter = self.get_limiter(url)
+        max_retries = self.max_retries if method.upper() in RETRY_METHODS else 0
+
+        for attempt in range(max_retries + 1):
+            is_last_attempt = attempt == max_retries
+
+            limiter.acquire()
+            start = time.monotonic()
+            try:
+                response = send()
+            except (requests.ConnectionError, requests.Timeout):
+                limiter.release()
+                limiter.record_failure()
+                if is_last_attempt:
+                    raise
+
+                # Back off outside the slot, so other requests can proceed meanwhile
+                time.sleep(get_backoff_delay(attempt))
+                continue
+            except BaseException:
+                limiter.release()
+                raise
+
+            # A streamed body is still to come, so it keeps the slot until closed
+            will_retry = response.status_code in RETRY_STATUSES and not is_last_attempt
+            if stream and not will_retry:
+                hold_slot_until_closed(response, limiter)
+            else:
+                limiter.release()
+
+            if response.status_code not in RETRY_STATUSES:
+                limiter.record_success(time.monotonic() - start)
+                return response
+
+            retry_after = parse_retry_after(response)
+            is_throttled = response.status_code in THROTTLE_STATUSES
+            limiter.record_failure(pause=(retry_after or 0.0) if is_throttled else 0.0)
+
+            # Out of retries: hand back last response (caller raises for status)
+            if is_last_attempt:
+                return response
+
+            logger.warning(
+                "Got HTTP %s from %s, retrying...", response.status_code, url
+            )
+            response.close()
+            time.sleep(get_backoff_delay(attempt, retry_after))
+
+
+@lazy_resource
+def get_request_scheduler() -> RequestScheduler:
+    # One scheduler per process, so every session shares the same host budgets
+    return RequestScheduler()
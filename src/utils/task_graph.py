@@ -0,0 +1,127 @@
+###############################################################################
+##  `task_graph.py`                                                          ##
+##                                                                           ##
+##  Purpose: Runs small graphs of dependent tasks on a thread pool (each     ##
+##           task starts once its dependencies finish), timing each task     ##
+###############################################################################
+
+
+import time
+import tracemalloc
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, NamedTuple, Optional
+
+MIB = 1024 * 1024
+
+
+class Task(NamedTuple):
+    func: Callable
+
+    # Names of tasks whose results func takes, as keyword args of those names
+    depends_on: tuple[str, ...] = ()
+
+
+class TaskStats(NamedTuple):
+    seconds: float
+
+    # Traced memory (bytes) held when the task started, & its peak while running
+    # (only when tracing memory, else None)
+    start_memory: Optional[int] = None
+    peak_memory: Optional[int] = None
+
+
+def run_task(
+    func: Callable, kwargs: dict, trace_memory: bool = False
+) -> tuple[Any, TaskStats]:
+    if not trace_memory:
+        start = time.perf_counter()
+        result = func(**kwargs)
+        return result, TaskStats(seconds=time.perf_counter() - start)
+
+    tracemalloc.reset_peak()
+    start_memory, _ = tracemalloc.get_traced_memory()
+
+    start = time.perf_counter()
+    result = func(**kwargs)
+    seconds = time.perf_counter() - start
+
+    _, peak_memory = tracemalloc.get_traced_memory()
+    return result, TaskStats(seconds, start_memory, peak_memory)
+
+
+def format_task_stats(name: str, stats: TaskStats) -> str:
+    report = f"Finished {name} in {stats.seconds:.2f}s"
+    if stats.peak_memory is None:
+        return report
+
+    added_memory = (stats.peak_memory - stats.start_memory) / MIB
+    return f"{report} (peak {stats.peak_memory / MIB:.1f} MiB, +{added_memory:.1f})"
+
+
+def run_task_graph(
+    tasks: dict[str, Task], max_workers: int, trace_memory: bool = False
+) -> dict[str, Any]:
+    """
+    Run every task as soon as all of its dependencies have finished, so
+    independent branches run concurrently & share results (read-only) rather
+    than each copying them. Prints each task's time & the total wall time,
+    then returns every task's result by name.
+
+    With trace_memory, tasks run one at a time under tracemalloc, so each
+    task's peak (& what it adds on top of results already held) is its own.
+    Only allocations tracemalloc sees are counted (Python objects & numpy
+    buffers, not e.g. Arrow-backed string columns).
+    """
+    if not isinstance(max_workers, int) or max_workers < 1:
+        raise ValueError("Error, max_workers must be a positive int")
+
+    for name, task in tasks.items():
+        unknown = [dep for dep in task.depends_on if dep not in tasks]
+        if unknown:
+            raise ValueError(f"Error, task '{name}' depends on unknown {unknown}")
+
+    results = {}
+    waiting = dict(tasks)
+    running = {}
+    peak_memory = 0
+
+    if trace_memory:
+        max_workers = 1
+        tracemalloc.start()
+
+    start = time.perf_counter()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while waiting or running:
+                ready = [
+                    name
+                    for name, task in waiting.items()
+                    if all(dep in results for dep in task.depends_on)
+                ]
+                for name in ready:
+                    task = waiting.pop(name)
+                    kwargs = {dep: results[dep] for dep in task.depends_on}
+                    future = executor.submit(run_task, task.func, kwargs, trace_memory)
+                    running[future] = name
+
+                # Nothing can start & nothing will finish, so the rest are stuck
+                if not running:
+                    raise ValueError(f"Error, dependency cycle among {list(waiting)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name], stats = future.result()
+                    print(format_task_stats(name, stats))
+                    peak_memory = max(peak_memory, stats.peak_memory or 0)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    print(f"Finished all {len(tasks)} tasks in {time.perf_counter() - start:.2f}s")
+
+    if trace_memory:
+        print(f"Peak traced memory: {peak_memory / MIB:.1f} MiB")
+
+    return results
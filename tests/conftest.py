@@ -0,0 +1,33 @@
+import os
+import shutil
+import zipfile
+
+import pytest
+from src.utils.http_cache import CachedSession, HTTPCache
+from src.utils.request_scheduler import RequestScheduler
+
+from tests.record_fixtures import DWCA_FIXTURES, HTTP_CACHE_FIXTURES
+
+
+@pytest.fixture
+def replay_session(tmp_path):
+    # Copy, since cache hits touch file mtimes (& must never hit the network)
+    folder = tmp_path / "http_cache"
+    shutil.copytree(HTTP_CACHE_FIXTURES, folder)
+
+    with CachedSession(
+        cache=HTTPCache(str(folder)), mode="replay", scheduler=RequestScheduler()
+    ) as session:
+        yield session
+
+
+@pytest.fixture
+def dwca_zip(tmp_path) -> str:
+    # Small DWCA archive: occurrence core + multimedia extension
+    zip_file = tmp_path / "gbif_download.zip"
+
+    with zipfile.ZipFile(zip_file, "w") as archive:
+        for file_name in sorted(os.listdir(DWCA_FIXTURES)):
+            archive.write(os.path.join(DWCA_FIXTURES, file_name), arcname=file_name)
+
+    return str(zip_file)
@@ -0,0 +1,145 @@
+###############################################################################
+##  `fakes.py`                                                               ##
+##                                                                           ##
+##  Purpose: Stand-in GBIF API (a requests transport adapter) used to record ##
+##           the replay fixtures & serve download archives in tests          ##
+###############################################################################
+
+
+import io
+import json
+from typing import Callable, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+TEST_SPECIES_KEY = 5216658
+TEST_GBIF_USER = "test-user"
+TEST_GBIF_PASS = "test-pass"
+TEST_SEARCH_CAP = 10
+TEST_DOWNLOAD_KEY = "0000001-240101000000000"
+TEST_DOWNLOAD_LINK = (
+    f"https://api.gbif.org/v1/occurrence/download/request/{TEST_DOWNLOAD_KEY}.zip"
+)
+
+# Facet counts per (filters, facet field), under TEST_SEARCH_CAP. Totals
+# that differ from the facet sums leave records no partition can reach
+SEARCH_FACET_COUNTS = {
+    ((), "datasetKey"): (30, {"dataset-a": 8, "dataset-b": 20}),
+    ((("datasetKey", "dataset-b"),), "year"): (20, {"2019": 6, "2020": 14}),
+    ((("datasetKey", "dataset-b"), ("year", "2020")), "country"): (
+        14,
+        {"US": 3, "MX": 11},
+    ),
+}
+
+# Search params that aren't partition filters
+SEARCH_BASE_PARAMS = {
+    "offset",
+    "limit",
+    "scientificName",
+    "speciesKey",
+    "facet",
+    "facetLimit",
+}
+
+
+def make_response(
+    request: requests.PreparedRequest,
+    body: bytes,
+    status_code: int = 200,
+    content_type: str = "application/json",
+) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.reason = "OK" if status_code == 200 else "Error"
+    response.headers = CaseInsensitiveDict({"Content-Type": content_type})
+    response.url = request.url
+    response.request = request
+
+    # Served as a raw stream, so streamed downloads read it in chunks too
+    response.raw = io.BytesIO(body)
+
+    return response
+
+
+def answer_search(request: requests.PreparedRequest) -> Optional[bytes]:
+    params = dict(parse_qsl(urlsplit(request.url).query))
+    field = params.get("facet")
+    filters = tuple(
+        sorted(
+            (name, value)
+            for name, value in params.items()
+            if name not in SEARCH_BASE_PARAMS
+        )
+    )
+
+    if (filters, field) not in SEARCH_FACET_COUNTS:
+        return None
+
+    total_count, facet_counts = SEARCH_FACET_COUNTS[(filters, field)]
+    data = {
+        "offset": 0,
+        "limit": 0,
+        "count": total_count,
+        "results": [],
+        "facets": [
+            {
+                "field": field,
+                "counts": [
+                    {"name": name, "count": count}
+                    for name, count in facet_counts.items()
+                ],
+            }
+        ],
+    }
+    return json.dumps(data).encode("utf-8")
+
+
+def answer_download(request: requests.PreparedRequest) -> Optional[bytes]:
+    path = urlsplit(request.url).path
+
+    if request.method == "POST" and path.endswith("/occurrence/download/request"):
+        return TEST_DOWNLOAD_KEY.encode("utf-8")
+
+    if request.method == "GET" and path.endswith(f"/download/{TEST_DOWNLOAD_KEY}"):
+        data = {
+            "key": TEST_DOWNLOAD_KEY,
+            "status": "SUCCEEDED",
+            "downloadLink": TEST_DOWNLOAD_LINK,
+        }
+        return json.dumps(data).encode("utf-8")
+
+    return None
+
+
+class FakeGBIFAdapter(BaseAdapter):
+    """
+    Transport adapter answering requests from canned responses (404 for
+    anything unknown), & counting requests so tests can check what hit it.
+    """
+
+    def __init__(
+        self,
+        responders: list[Callable[[requests.PreparedRequest], Optional[bytes]]],
+        content_type: str = "application/json",
+    ):
+        super().__init__()
+        self.responders = responders
+        self.content_type = content_type
+        self.requests = []
+
+    def send(self, request, **kwargs) -> requests.Response:
+        self.requests.append(request)
+
+        for responder in self.responders:
+            body = responder(request)
+            if body is not None:
+                return make_response(request, body, content_type=self.content_type)
+
+        return make_response(request, b"", status_code=404)
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,61 @@
+###############################################################################
+##  `record_fixtures.py`                                                     ##
+##                                                                           ##
+##  Purpose: Re-records the HTTP cache fixtures that tests replay offline,   ##
+##           by running the real fetch code against the fake GBIF adapter    ##
+###############################################################################
+
+
+import os
+import shutil
+
+from src.gbif import fetch_download
+from src.gbif.fetch import BASE_URL
+from src.gbif.fetch_partitioned import plan_partitions
+from src.utils.http_cache import CachedSession, HTTPCache
+from src.utils.request_scheduler import RequestScheduler
+
+from tests.fakes import (
+    TEST_DOWNLOAD_KEY,
+    TEST_SEARCH_CAP,
+    TEST_SPECIES_KEY,
+    FakeGBIFAdapter,
+    answer_download,
+    answer_search,
+)
+
+FIXTURES_FOLDER = os.path.join(os.path.dirname(__file__), "fixtures")
+HTTP_CACHE_FIXTURES = os.path.join(FIXTURES_FOLDER, "http_cache")
+DWCA_FIXTURES = os.path.join(FIXTURES_FOLDER, "dwca")
+
+
+def record_download_fixtures(session: CachedSession) -> None:
+    # Only the finished job's status: the job-creation POST is never cached,
+    # & wait_for_download never records the (changing) status itself
+    url_endpoint = (
+        f"{BASE_URL}/{fetch_download.DOWNLOAD_STATUS_ENDPOINT}/{TEST_DOWNLOAD_KEY}"
+    )
+    session.get(url_endpoint).raise_for_status()
+
+
+def record_partition_fixtures(session: CachedSession) -> None:
+    # Every facet count search the partition plan makes
+    plan_partitions(cap=TEST_SEARCH_CAP, key=TEST_SPECIES_KEY, session=session)
+
+
+def record_fixtures(folder: str = HTTP_CACHE_FIXTURES) -> None:
+    shutil.rmtree(folder, ignore_errors=True)
+
+    adapter = FakeGBIFAdapter([answer_search, answer_download])
+    with CachedSession(
+        cache=HTTPCache(folder), mode="revalidate", scheduler=RequestScheduler()
+    ) as session:
+        session.mount("https://", adapter)
+        record_download_fixtures(session)
+        record_partition_fixtures(session)
+
+    print(f"Recorded {len(adapter.requests)} responses to {folder}")
+
+
+if __name__ == "__main__":
+    record_fixtures()
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+from src.gbif import clean
+from src.gbif.clean import build_occurrences_df, get_all_extracted_occurrences
+from src.utils.data_utils import export_to_jsonl
+
+OCCURRENCES = [
+    {"key": 1, "year": 2017, "sex": "female", "media": [{"identifier": "a.jpg"}]},
+    {"key": 2, "year": None, "sex": None, "media": []},
+    {"key": 3, "year": 2019, "country": "Mexico"},
+    {"key": 4, "year": 2020, "sex": "male", "media": None},
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 10])
+def test_build_occurrences_df_matches_one_big_frame(chunk_size):
+    occurrences_df = build_occurrences_df(iter(OCCURRENCES), chunk_size=chunk_size)
+
+    pd.testing.assert_frame_equal(occurrences_df, pd.DataFrame(OCCURRENCES))
+
+
+def test_build_occurrences_df_handles_no_records():
+    assert build_occurrences_df(iter([])).empty
+
+
+def test_download_source_reads_raw_records_lazily(tmp_path, monkeypatch):
+    jsonl_file = str(tmp_path / "gbif_raw.jsonl.gz")
+    monkeypatch.setattr(clean, "GBIF_RAW_JSONL", jsonl_file)
+    monkeypatch.setattr(
+        clean,
+        "stream_download_occurrences_raw",
+        lambda jsonl_file, fields: export_to_jsonl(jsonl_file, OCCURRENCES),
+    )
+
+    occurrences = get_all_extracted_occurrences(source="download")
+
+    assert not isinstance(occurrences, list)
+    assert list(occurrences) == OCCURRENCES
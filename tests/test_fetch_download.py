@@ -0,0 +1,162 @@
+import pytest
+from src.gbif import fetch_download
+from src.gbif.fetch import BASE_URL
+from src.gbif.fetch_download import (
+    download_archive,
+    iter_download_occurrences,
+    request_occurrence_download,
+    wait_for_download,
+)
+from src.utils.http_cache import CacheMissError, HTTPCache
+
+from tests.fakes import (
+    TEST_DOWNLOAD_KEY,
+    TEST_DOWNLOAD_LINK,
+    TEST_GBIF_PASS,
+    TEST_GBIF_USER,
+    TEST_SPECIES_KEY,
+    FakeGBIFAdapter,
+    answer_download,
+)
+
+FIELDS = ["key", "year", "month", "day", "decimalLatitude", "decimalLongitude"]
+
+IMAGE_0 = {
+    "type": "StillImage",
+    "format": "image/jpeg",
+    "identifier": "https://example.org/0.jpg",
+}
+IMAGE_103_A = {
+    "type": "StillImage",
+    "format": "image/jpeg",
+    "identifier": "https://example.org/103-a.jpg",
+    "creator": "Observer C",
+}
+IMAGE_103_B = {**IMAGE_103_A, "identifier": "https://example.org/103-b.jpg"}
+
+EXPECTED_OCCURRENCES = [
+    {
+        "key": 0,
+        "year": 2017,
+        "month": 5,
+        "day": 12,
+        "decimalLatitude": -21.9,
+        "decimalLongitude": 113.9,
+        "media": [IMAGE_0],
+    },
+    {
+        "key": 101,
+        "year": 2017,
+        "month": 6,
+        "day": None,
+        "decimalLatitude": 20.6,
+        "decimalLongitude": -86.9,
+        "media": [],
+    },
+    {
+        "key": 102,
+        "year": None,
+        "month": None,
+        "day": None,
+        "decimalLatitude": None,
+        "decimalLongitude": None,
+        "media": [],
+    },
+    {
+        "key": 103,
+        "year": 2019,
+        "month": 3,
+        "day": 1,
+        "decimalLatitude": -8.5,
+        "decimalLongitude": 115.2,
+        "media": [IMAGE_103_A, IMAGE_103_B],
+    },
+]
+
+
+@pytest.fixture
+def gbif_account(monkeypatch):
+    monkeypatch.setattr(fetch_download, "GBIF_USER", TEST_GBIF_USER)
+    monkeypatch.setattr(fetch_download, "GBIF_PASS", TEST_GBIF_PASS)
+    monkeypatch.setattr(fetch_download, "GBIF_EMAIL", None)
+
+
+class StaleCache(HTTPCache):
+    # Every lookup "hits" an old download job's response
+    def load(self, key: str):
+        return {"status_code": 200, "headers": {}}, b"0000000-190101000000000"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 10])
+def test_iter_download_occurrences_joins_media_per_chunk(dwca_zip, chunk_size):
+    occurrences = iter_download_occurrences(
+        dwca_zip, fields=FIELDS + ["media"], chunk_size=chunk_size
+    )
+
+    assert list(occurrences) == EXPECTED_OCCURRENCES
+
+
+def test_iter_download_occurrences_skips_media_unless_asked(dwca_zip):
+    occurrences = list(iter_download_occurrences(dwca_zip, fields=FIELDS))
+
+    assert occurrences == [
+        {field: value for field, value in occurrence.items() if field != "media"}
+        for occurrence in EXPECTED_OCCURRENCES
+    ]
+
+
+def test_download_requests_new_job_then_replays_poll_and_streams_archive(
+    replay_session, dwca_zip, tmp_path, gbif_account
+):
+    with open(dwca_zip, "rb") as f:
+        archive_bytes = f.read()
+
+    # Only the (uncached) job request & streamed archive body reach the transport
+    adapter = FakeGBIFAdapter(
+        [
+            answer_download,
+            lambda request: (
+                archive_bytes if request.url == TEST_DOWNLOAD_LINK else None
+            ),
+        ]
+    )
+    replay_session.mount("https://", adapter)
+
+    download_key = request_occurrence_download(
+        key=TEST_SPECIES_KEY, session=replay_session
+    )
+    download_link = wait_for_download(
+        download_key, poll_interval=0, session=replay_session
+    )
+    zip_file = download_archive(
+        download_link,
+        zip_file=str(tmp_path / "download" / "gbif_download.zip"),
+        session=replay_session,
+    )
+
+    assert download_key == TEST_DOWNLOAD_KEY
+    assert [(request.method, request.url) for request in adapter.requests] == [
+        ("POST", f"{BASE_URL}/{fetch_download.DOWNLOAD_REQUEST_ENDPOINT}"),
+        ("GET", TEST_DOWNLOAD_LINK),
+    ]
+
+    occurrences = iter_download_occurrences(zip_file, fields=FIELDS + ["media"])
+    assert list(occurrences) == EXPECTED_OCCURRENCES
+
+
+def test_replay_never_returns_cached_download_key(replay_session, gbif_account):
+    replay_session.cache = StaleCache(replay_session.cache.folder)
+    adapter = FakeGBIFAdapter([answer_download])
+    replay_session.mount("https://", adapter)
+
+    download_key = request_occurrence_download(
+        key=TEST_SPECIES_KEY, session=replay_session
+    )
+
+    assert download_key == TEST_DOWNLOAD_KEY
+    assert len(adapter.requests) == 1
+
+
+def test_replay_raises_on_unrecorded_request(replay_session):
+    with pytest.raises(CacheMissError):
+        wait_for_download("unrecorded-download", session=replay_session)
@@ -0,0 +1,38 @@
+import pytest
+from src.gbif.fetch_partitioned import plan_partitions
+
+from tests.fakes import TEST_SEARCH_CAP, TEST_SPECIES_KEY
+
+
+def test_plan_partitions_splits_until_under_cap(replay_session, capsys):
+    plan = plan_partitions(
+        cap=TEST_SEARCH_CAP, key=TEST_SPECIES_KEY, session=replay_session
+    )
+
+    assert plan.partitions == [
+        ({"datasetKey": "dataset-a"}, 8),
+        ({"datasetKey": "dataset-b", "year": "2019"}, 6),
+        ({"datasetKey": "dataset-b", "year": "2020", "country": "US"}, 3),
+        ({"datasetKey": "dataset-b", "year": "2020", "country": "MX"}, 10),
+    ]
+
+    # Out of facets: MX is harvested up to the cap; 2 records lack a datasetKey
+    assert (plan.uncovered_count, plan.capped_count) == (2, 1)
+    assert not plan.is_complete
+
+    output = capsys.readouterr().out
+    assert "'country': 'MX'} (11) exceeds cap" in output
+    assert "2 records in all have no 'datasetKey' value" in output
+
+
+def test_plan_partitions_keeps_search_under_cap_whole(replay_session, capsys):
+    plan = plan_partitions(cap=30, key=TEST_SPECIES_KEY, session=replay_session)
+
+    assert plan.partitions == [({}, 30)]
+    assert plan.is_complete
+    assert "Warning" not in capsys.readouterr().out
+
+
+def test_plan_partitions_requires_a_facet(replay_session):
+    with pytest.raises(ValueError):
+        plan_partitions(facet_fields=[], session=replay_session)
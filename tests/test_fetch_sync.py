@@ -0,0 +1,62 @@
+import pytest
+from src.gbif import fetch_sync
+from src.gbif.fetch import SEARCH_OFFSET_CAP
+from src.gbif.fetch_partitioned import PartitionPlan
+from src.gbif.fetch_sync import sync_occurrences_raw
+from src.gbif.store import connect_store, upsert_raw_occurrences
+
+
+def make_occurrence(key: int) -> dict:
+    return {"key": key, "lastInterpreted": "2025-01-01T00:00:00.000+00:00"}
+
+
+@pytest.fixture
+def store_file(tmp_path) -> str:
+    db_file = str(tmp_path / "gbif_store.sqlite")
+
+    conn = connect_store(db_file)
+    upsert_raw_occurrences(conn, [make_occurrence(key) for key in [1, 2, 3]])
+    conn.close()
+
+    return db_file
+
+
+def run_full_partitioned_sync(monkeypatch, db_file: str, plan: PartitionPlan):
+    # Over the offset cap, so the sync harvests by partition (only keys 1 & 2)
+    monkeypatch.setattr(
+        fetch_sync,
+        "get_occurrence_search",
+        lambda *args, **kwargs: {"count": SEARCH_OFFSET_CAP + 1},
+    )
+    monkeypatch.setattr(fetch_sync, "plan_partitions", lambda **kwargs: plan)
+    monkeypatch.setattr(
+        fetch_sync,
+        "iter_partitioned_occurrences",
+        lambda **kwargs: iter([make_occurrence(1), make_occurrence(2)]),
+    )
+
+    sync_occurrences_raw(db_file, full=True)
+
+    conn = connect_store(db_file)
+    stored_keys = [key for (key,) in conn.execute("SELECT key FROM raw_occurrences")]
+    conn.close()
+
+    return sorted(stored_keys)
+
+
+def test_full_sync_keeps_records_a_capped_partition_missed(monkeypatch, store_file):
+    plan = PartitionPlan([({"country": "MX"}, SEARCH_OFFSET_CAP)], capped_count=1)
+
+    assert run_full_partitioned_sync(monkeypatch, store_file, plan) == [1, 2, 3]
+
+
+def test_full_sync_keeps_records_without_facet_values(monkeypatch, store_file):
+    plan = PartitionPlan([({"datasetKey": "a"}, 2)], uncovered_count=1)
+
+    assert run_full_partitioned_sync(monkeypatch, store_file, plan) == [1, 2, 3]
+
+
+def test_full_sync_removes_missing_records_when_fully_covered(monkeypatch, store_file):
+    plan = PartitionPlan([({"datasetKey": "a"}, 2)])
+
+    assert run_full_partitioned_sync(monkeypatch, store_file, plan) == [1, 2]
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from src.utils import geomap_utils
+from src.utils.geomap_utils import get_LME_from_coords, get_LMEs_from_coords
+
+shapely = pytest.importorskip("shapely")
+
+
+@pytest.fixture(autouse=True)
+def lme_tree(monkeypatch):
+    # Two boxes (lon x lat) standing in for the LME shapefile
+    polygons = np.array([shapely.box(-50, -20, 20, 30), shapely.box(100, -40, 160, 10)])
+    shapely.prepare(polygons)
+    names = np.array(["Box A", "Box B"], dtype=object)
+
+    monkeypatch.setattr(
+        geomap_utils, "get_lme_tree", lambda: (shapely.STRtree(polygons), names)
+    )
+    geomap_utils._get_LME_from_rounded_coords.cache_clear()
+
+
+def test_batch_lookup_marks_missing_coords_unknown():
+    nan = float("nan")
+    lmes = get_LMEs_from_coords(
+        [10.0, nan, 10.0, -5.0, np.inf, 60.0], [10.0, 10.0, nan, 110.0, 0.0, 0.0]
+    )
+
+    assert list(lmes) == ["Box A", "Unknown", "Unknown", "Box B", "Unknown", "Unknown"]
+
+
+def test_batch_lookup_handles_no_valid_coords():
+    assert list(get_LMEs_from_coords([], [])) == []
+    assert list(get_LMEs_from_coords([float("nan")], [0.0])) == ["Unknown"]
+
+
+def test_single_lookup_shares_rounded_cache_key():
+    for offset in [1e-7, 2e-7, 3e-7]:
+        assert get_LME_from_coords(10.0 + offset, 10.0) == "Box A"
+
+    cache_info = geomap_utils._get_LME_from_rounded_coords.cache_info()
+    assert (cache_info.hits, cache_info.misses) == (2, 1)
@@ -0,0 +1,78 @@
+import io
+
+import pytest
+import requests
+from src.utils import request_scheduler
+from src.utils.request_scheduler import RequestScheduler
+
+URL = "https://api.gbif.org/v1/occurrence/search"
+
+
+def make_sender(status_codes: list[int]):
+    sent = []
+
+    def send() -> requests.Response:
+        response = requests.Response()
+        response.status_code = status_codes[len(sent)]
+        response.raw = io.BytesIO(b"")
+        sent.append(response)
+        return response
+
+    return send, sent
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(request_scheduler.time, "sleep", lambda seconds: None)
+
+
+def test_get_is_retried_on_server_errors():
+    send, sent = make_sender([503, 502, 200])
+
+    response = RequestScheduler().request(URL, send, method="GET")
+
+    assert response.status_code == 200
+    assert len(sent) == 3
+
+
+@pytest.mark.parametrize("method", ["POST", "PUT", "DELETE"])
+def test_non_idempotent_methods_get_one_attempt(method):
+    send, sent = make_sender([503, 200])
+
+    response = RequestScheduler().request(URL, send, method=method)
+
+    assert response.status_code == 503
+    assert len(sent) == 1
+
+
+def test_post_connection_error_is_not_retried():
+    attempts = []
+
+    def send() -> requests.Response:
+        attempts.append(1)
+        raise requests.ConnectionError("reset")
+
+    with pytest.raises(requests.ConnectionError):
+        RequestScheduler().request(URL, send, method="POST")
+
+    assert len(attempts) == 1
+
+
+def test_streamed_response_holds_slot_until_closed():
+    scheduler = RequestScheduler()
+    limiter = scheduler.get_limiter(URL)
+    send, _ = make_sender([200])
+
+    with scheduler.request(URL, send, stream=True):
+        assert limiter._in_flight == 1
+
+    assert limiter._in_flight == 0
+
+
+def test_buffered_response_releases_slot_on_return():
+    scheduler = RequestScheduler()
+    send, _ = make_sender([200])
+
+    scheduler.request(URL, send)
+
+    assert scheduler.get_limiter(URL)._in_flight == 0